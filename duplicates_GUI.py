@@ -7,10 +7,27 @@ Detects duplicate rows, duplicate columns, or duplicate values within columns in
 import os
 import threading
 import tkinter as tk
+from functools import partial
 from pathlib import Path
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 
-import pandas as pd
+from duplicates_cache import CACHE_FILENAME
+from duplicates_corpus import CORPUS_REPORT_FILENAME, find_corpus_duplicates
+from duplicates_engine import (
+    DEFAULT_CHUNKSIZE,
+    KEEP_POLICIES,
+    clean_file,
+    default_workers,
+    parse_key_columns,
+    parse_sheet_names,
+    process_file,
+    run_file_tasks,
+)
+from duplicates_io import FILE_DIALOG_TYPES, SUPPORTED_EXTENSIONS
+from duplicates_log import QueuedLog
+from duplicates_near import DEFAULT_SIMILARITY
+from duplicates_normalize import NORMALIZE_HELP, Normalizer
+from duplicates_schema import SCHEMA_FILENAME
 
 
 class DuplicateDetectorGUI:
@@ -24,8 +41,24 @@ class DuplicateDetectorGUI:
         self.input_files = []
         self.output_directory = tk.StringVar()
         self.detection_mode = tk.StringVar(value="row")  # Default to row detection
+        self.stream_csv = tk.BooleanVar(value=False)
+        self.use_cache = tk.BooleanVar(value=False)
+        self.use_schema = tk.BooleanVar(value=False)
+        self.incremental = tk.BooleanVar(value=False)
+        self.scan_csv = tk.BooleanVar(value=False)
+        self.similarity = tk.DoubleVar(value=DEFAULT_SIMILARITY)
+        self.key_columns = tk.StringVar()
+        self.keep_policy = tk.StringVar(value="none")
+        self.max_column = tk.StringVar()
+        self.sheets = tk.StringVar()
+        self.remove_in_pass = tk.BooleanVar(value=False)
+        self.save_removed = tk.BooleanVar(value=False)
+        self.across_files = tk.BooleanVar(value=False)
+        self.normalize = tk.StringVar()
+        self.workers = tk.IntVar(value=default_workers())
 
         self.create_widgets()
+        self.log_queue = QueuedLog(self.root, self.log_text, "duplicate_detector")
 
     def create_widgets(self):
         # Main frame
@@ -65,7 +98,14 @@ class DuplicateDetectorGUI:
             text="Column Values Detection",
             variable=self.detection_mode,
             value="column_values",
-        ).grid(row=0, column=2, sticky=tk.W)
+        ).grid(row=0, column=2, sticky=tk.W, padx=(0, 20))
+
+        ttk.Radiobutton(
+            mode_frame,
+            text="Near-Duplicate Rows",
+            variable=self.detection_mode,
+            value="near_row",
+        ).grid(row=0, column=3, sticky=tk.W)
 
         # Mode description
         self.mode_description = ttk.Label(
@@ -76,9 +116,112 @@ class DuplicateDetectorGUI:
             wraplength=800,
         )
         self.mode_description.grid(
-            row=1, column=0, columnspan=3, sticky=tk.W, pady=(5, 0)
+            row=1, column=0, columnspan=4, sticky=tk.W, pady=(5, 0)
+        )
+
+        ttk.Checkbutton(
+            mode_frame,
+            text="Stream CSV and .xlsx files in chunks (row detection, for files larger than memory)",
+            variable=self.stream_csv,
+        ).grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+
+        ttk.Checkbutton(
+            mode_frame,
+            text="Reuse results for unchanged files (cache kept in the output directory)",
+            variable=self.use_cache,
+        ).grid(row=3, column=0, columnspan=2, sticky=tk.W)
+
+        ttk.Checkbutton(
+            mode_frame,
+            text="Learn compact column types (CSV)",
+            variable=self.use_schema,
+        ).grid(row=3, column=2, columnspan=2, sticky=tk.W)
+
+        ttk.Checkbutton(
+            mode_frame,
+            text="Incremental: only read rows appended since the last run (row detection, CSV)",
+            variable=self.incremental,
+        ).grid(row=4, column=0, columnspan=3, sticky=tk.W)
+
+        ttk.Checkbutton(
+            mode_frame,
+            text="Fast scan: hash raw CSV records without parsing them (row detection)",
+            variable=self.scan_csv,
+        ).grid(row=5, column=0, columnspan=3, sticky=tk.W)
+
+        similarity_frame = ttk.Frame(mode_frame)
+        similarity_frame.grid(row=6, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+
+        ttk.Label(similarity_frame, text="Near-duplicate similarity (0.5 - 1.0):").pack(
+            side=tk.LEFT
+        )
+        ttk.Spinbox(
+            similarity_frame,
+            from_=0.5,
+            to=1.0,
+            increment=0.05,
+            textvariable=self.similarity,
+            width=5,
+        ).pack(side=tk.LEFT, padx=(5, 0))
+
+        keys_frame = ttk.Frame(mode_frame)
+        keys_frame.grid(row=7, column=0, columnspan=4, sticky=tk.W, pady=(5, 0))
+
+        ttk.Label(keys_frame, text="Key columns (comma-separated, blank = all):").pack(
+            side=tk.LEFT
+        )
+        ttk.Entry(keys_frame, textvariable=self.key_columns, width=25).pack(
+            side=tk.LEFT, padx=(5, 15)
+        )
+        ttk.Label(keys_frame, text="Keep:").pack(side=tk.LEFT)
+        ttk.Combobox(
+            keys_frame,
+            textvariable=self.keep_policy,
+            values=KEEP_POLICIES,
+            state="readonly",
+            width=6,
+        ).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(keys_frame, text="Max by column:").pack(side=tk.LEFT)
+        ttk.Entry(keys_frame, textvariable=self.max_column, width=15).pack(
+            side=tk.LEFT, padx=(5, 0)
+        )
+
+        clean_frame = ttk.Frame(mode_frame)
+        clean_frame.grid(row=8, column=0, columnspan=4, sticky=tk.W, pady=(5, 0))
+
+        ttk.Checkbutton(
+            clean_frame,
+            text="Detect and remove in one pass: write cleaned files (row detection)",
+            variable=self.remove_in_pass,
+        ).pack(side=tk.LEFT)
+        ttk.Checkbutton(
+            clean_frame,
+            text="Also save removed rows",
+            variable=self.save_removed,
+        ).pack(side=tk.LEFT, padx=(15, 0))
+
+        sheets_frame = ttk.Frame(mode_frame)
+        sheets_frame.grid(row=9, column=0, columnspan=4, sticky=tk.W, pady=(5, 0))
+
+        ttk.Label(
+            sheets_frame, text="Excel sheets (comma-separated, blank = all):"
+        ).pack(side=tk.LEFT)
+        ttk.Entry(sheets_frame, textvariable=self.sheets, width=25).pack(
+            side=tk.LEFT, padx=(5, 15)
+        )
+        ttk.Label(sheets_frame, text=f"Normalize ({NORMALIZE_HELP}):").pack(
+            side=tk.LEFT
+        )
+        ttk.Entry(sheets_frame, textvariable=self.normalize, width=20).pack(
+            side=tk.LEFT, padx=(5, 0)
         )
 
+        ttk.Checkbutton(
+            mode_frame,
+            text="Across files: report rows that appear in more than one input file (row detection)",
+            variable=self.across_files,
+        ).grid(row=10, column=0, columnspan=4, sticky=tk.W, pady=(5, 0))
+
         # Bind radio button changes to update description
         self.detection_mode.trace("w", self.update_mode_description)
 
@@ -140,6 +283,18 @@ class DuplicateDetectorGUI:
             output_frame, text="Browse", command=self.browse_output_directory
         ).grid(row=0, column=1)
 
+        workers_frame = ttk.Frame(output_frame)
+        workers_frame.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+
+        ttk.Label(workers_frame, text="Worker processes:").pack(side=tk.LEFT)
+        ttk.Spinbox(
+            workers_frame,
+            from_=1,
+            to=max(default_workers(), 64),
+            textvariable=self.workers,
+            width=5,
+        ).pack(side=tk.LEFT, padx=(5, 0))
+
         # Process Button
         self.process_button = ttk.Button(
             main_frame,
@@ -178,8 +333,10 @@ class DuplicateDetectorGUI:
             description = "Row Detection: Identifies duplicate rows in your data"
         elif self.detection_mode.get() == "column":
             description = "Column Detection: Identifies columns that have identical data (entire columns are duplicates)"
-        else:  # column_values
+        elif self.detection_mode.get() == "column_values":
             description = "Column Values Detection: Identifies duplicate values within each individual column"
+        else:  # near_row
+            description = "Near-Duplicate Rows: Groups rows whose text is similar (ignoring case and spacing) into clusters"
 
         self.mode_description.config(text=description)
 
@@ -187,12 +344,7 @@ class DuplicateDetectorGUI:
         """Add individual files to the processing list."""
         files = filedialog.askopenfilenames(
             title="Select Files",
-            filetypes=[
-                ("Supported files", "*.csv *.xlsx *.xls"),
-                ("CSV files", "*.csv"),
-                ("Excel files", "*.xlsx *.xls"),
-                ("All files", "*.*"),
-            ],
+            filetypes=FILE_DIALOG_TYPES,
         )
 
         for file in files:
@@ -208,11 +360,10 @@ class DuplicateDetectorGUI:
         if not directory:
             return
 
-        supported_extensions = [".csv", ".xlsx", ".xls"]
         files_added = 0
 
         for file_path in Path(directory).iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in supported_extensions:
+            if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
                 full_path = str(file_path)
                 if full_path not in self.input_files:
                     self.input_files.append(full_path)
@@ -248,10 +399,8 @@ class DuplicateDetectorGUI:
             self.output_directory.set(directory)
 
     def log(self, message):
-        """Add message to the log."""
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Queue a message for the log; safe to call from the worker thread."""
+        self.log_queue(message)
 
     def validate_inputs(self):
         """Validate user inputs before processing."""
@@ -267,292 +416,176 @@ class DuplicateDetectorGUI:
             messagebox.showerror("Error", "Output directory does not exist.")
             return False
 
-        return True
-
-    def detect_duplicate_columns(self, df):
-        """Detect duplicate columns in the dataframe."""
-        # Transpose the dataframe to treat columns as rows for duplicate detection
-        df_transposed = df.T
-
-        # Find duplicate columns (now rows in transposed df)
-        duplicate_cols = df_transposed.duplicated(keep=False)
-
-        # Get the names of duplicate columns
-        duplicate_column_names = df_transposed[duplicate_cols].index.tolist()
-
-        return duplicate_column_names, duplicate_cols
-
-    def detect_duplicate_values_in_columns(self, df):
-        """Detect duplicate values within each column."""
-        column_duplicates = {}
-        duplicate_info = {}
-
-        for column in df.columns:
-            # Get the series for this column
-            col_series = df[column]
-
-            # Find duplicates in this column
-            duplicates_mask = col_series.duplicated(keep=False)
-
-            if duplicates_mask.any():
-                # Get duplicate values and their positions
-                duplicate_values = col_series[duplicates_mask]
-                unique_duplicate_values = duplicate_values.unique()
-
-                column_duplicates[column] = duplicates_mask
-                duplicate_info[column] = {
-                    "count": duplicates_mask.sum(),
-                    "unique_duplicate_values": unique_duplicate_values,
-                    "duplicate_positions": duplicate_values.index.tolist(),
-                }
-
-        return column_duplicates, duplicate_info
-
-    def process_single_file(self, file_path):
-        """Process a single file for duplicates."""
-        try:
-            file_path = Path(file_path)
-            mode = self.detection_mode.get()
-            self.log(
-                f"Processing: {file_path.name} (Mode: {mode.replace('_', ' ').title()} Detection)"
+        if self.remove_in_pass.get() and self.detection_mode.get() != "row":
+            messagebox.showerror(
+                "Error", "Detect and remove in one pass works in Row Detection mode."
             )
+            return False
 
-            # Read file based on extension
-            if file_path.suffix.lower() == ".csv":
-                df = pd.read_csv(file_path)
-            elif file_path.suffix.lower() in [".xlsx", ".xls"]:
-                df = pd.read_excel(file_path)
-            else:
-                self.log(f"Unsupported file format: {file_path.suffix}")
-                return
-
-            if mode == "row":
-                # Row duplicate detection (original functionality)
-                duplicates = df.duplicated(keep=False)
-                duplicate_count = duplicates.sum()
-                total_items = len(df)
-                item_type = "rows"
-
-                self.log(
-                    f"Found {duplicate_count} duplicate {item_type} out of {total_items} total {item_type}"
-                )
-
-                # Add a column to mark duplicates
-                df["is_duplicate_row"] = duplicates
-
-                # Create output filename
-                output_filename = f"{file_path.stem}_row_duplicates_detected.csv"
-                output_path = Path(self.output_directory.get()) / output_filename
-
-                # Save as CSV
-                df.to_csv(output_path, index=False)
-                self.log(f"Saved: {output_filename}")
-
-                # Log duplicate information
-                if duplicate_count > 0:
-                    self.log(f"Duplicate rows in {file_path.name}:")
-                    duplicate_rows = df[duplicates].drop("is_duplicate_row", axis=1)
-                    for idx, row in duplicate_rows.iterrows():
-                        row_str = " | ".join(
-                            [f"{col}: {val}" for col, val in row.items()][:3]
-                        )  # Show first 3 columns
-                        self.log(f"  Row {idx + 1}: {row_str}...")
-                else:
-                    self.log(f"No duplicate rows found in {file_path.name}")
-
-            elif mode == "column":
-                # Column duplicate detection (identical columns)
-                duplicate_column_names, duplicate_cols = self.detect_duplicate_columns(
-                    df
-                )
-                duplicate_count = len(duplicate_column_names)
-                total_items = len(df.columns)
-                item_type = "columns"
+        if self.across_files.get() and (
+            self.detection_mode.get() != "row" or self.remove_in_pass.get()
+        ):
+            messagebox.showerror(
+                "Error",
+                "Across files works in Row Detection mode, without removing rows.",
+            )
+            return False
 
-                self.log(
-                    f"Found {duplicate_count} duplicate {item_type} out of {total_items} total {item_type}"
-                )
+        try:
+            Normalizer.from_text(self.normalize.get())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return False
 
-                # Create a new dataframe with duplicate column information
-                result_df = df.copy()
-
-                # Add a row at the top to indicate which columns are duplicates
-                duplicate_indicator = []
-                for col in df.columns:
-                    if col in duplicate_column_names:
-                        duplicate_indicator.append("DUPLICATE_COLUMN")
-                    else:
-                        duplicate_indicator.append("UNIQUE_COLUMN")
-
-                # Insert the indicator row at the top
-                new_row = pd.DataFrame([duplicate_indicator], columns=df.columns)
-                result_df = pd.concat([new_row, result_df], ignore_index=True)
-
-                # Create output filename
-                output_filename = f"{file_path.stem}_column_duplicates_detected.csv"
-                output_path = Path(self.output_directory.get()) / output_filename
-
-                # Save as CSV
-                result_df.to_csv(output_path, index=False)
-                self.log(f"Saved: {output_filename}")
-
-                # Log duplicate information
-                if duplicate_count > 0:
-                    self.log(f"Duplicate columns in {file_path.name}:")
-                    for col_name in duplicate_column_names:
-                        self.log(f"  Column: {col_name}")
-
-                    # Group duplicate columns
-                    duplicate_groups = {}
-                    processed_cols = set()
-
-                    for col in duplicate_column_names:
-                        if col in processed_cols:
-                            continue
-
-                        # Find all columns identical to this one
-                        identical_cols = []
-                        col_data = df[col]
-
-                        for other_col in df.columns:
-                            if other_col != col and df[other_col].equals(col_data):
-                                identical_cols.append(other_col)
-
-                        if identical_cols:
-                            group = [col] + identical_cols
-                            duplicate_groups[f"Group {len(duplicate_groups) + 1}"] = (
-                                group
-                            )
-                            processed_cols.update(group)
-
-                    if duplicate_groups:
-                        self.log("Duplicate column groups:")
-                        for group_name, cols in duplicate_groups.items():
-                            self.log(f"  {group_name}: {', '.join(cols)}")
-                else:
-                    self.log(f"No duplicate columns found in {file_path.name}")
+        if self.keep_policy.get() == "max" and not self.max_column.get().strip():
+            messagebox.showerror(
+                "Error", "Enter the column to compare for the 'max' keep policy."
+            )
+            return False
 
-            else:  # column_values mode
-                # Duplicate values within columns detection
-                column_duplicates, duplicate_info = (
-                    self.detect_duplicate_values_in_columns(df)
-                )
+        return True
 
-                if column_duplicates:
-                    total_duplicate_values = sum(
-                        info["count"] for info in duplicate_info.values()
-                    )
-                    self.log(
-                        f"Found duplicate values in {len(column_duplicates)} columns with {total_duplicate_values} total duplicate entries"
-                    )
-
-                    # Create result dataframe with duplicate marking for each column
-                    result_df = df.copy()
-
-                    for column, duplicates_mask in column_duplicates.items():
-                        result_df[f"{column}_is_duplicate"] = duplicates_mask
-
-                    # Create output filename
-                    output_filename = (
-                        f"{file_path.stem}_column_values_duplicates_detected.csv"
-                    )
-                    output_path = Path(self.output_directory.get()) / output_filename
-
-                    # Save as CSV
-                    result_df.to_csv(output_path, index=False)
-                    self.log(f"Saved: {output_filename}")
-
-                    # Log detailed duplicate information
-                    self.log(f"Duplicate values details for {file_path.name}:")
-                    for column, info in duplicate_info.items():
-                        self.log(
-                            f"  Column '{column}': {info['count']} duplicate entries"
-                        )
-                        self.log(
-                            f"    Duplicate values: {list(info['unique_duplicate_values'])}"
-                        )
-
-                        # Show sample positions for each duplicate value
-                        for dup_val in info["unique_duplicate_values"]:
-                            positions = df[df[column] == dup_val].index.tolist()
-                            self.log(
-                                f"    Value '{dup_val}' appears at rows: {[pos + 1 for pos in positions[:5]]}"
-                                + (
-                                    f" (and {len(positions) - 5} more)"
-                                    if len(positions) > 5
-                                    else ""
-                                )
-                            )
-                else:
-                    self.log(
-                        f"No duplicate values found within any columns in {file_path.name}"
-                    )
+    def log_file_result(self, file_path, lines, error):
+        """Log the output of one processed file."""
+        for line in lines:
+            self.log(line)
 
-                    # Still create output file but without duplicate markers
-                    output_filename = (
-                        f"{file_path.stem}_column_values_duplicates_detected.csv"
-                    )
-                    output_path = Path(self.output_directory.get()) / output_filename
-                    df.to_csv(output_path, index=False)
-                    self.log(f"Saved: {output_filename}")
+        if error is not None:
+            self.log(f"Error processing {Path(file_path).name}: {error}")
+            return
 
-            self.log("-" * 50)
+        self.log("-" * 50)
 
-        except Exception as e:
-            self.log(f"Error processing {file_path.name}: {str(e)}")
+    def process_files(self, input_files, output_directory, mode, func, workers):
+        """Process all selected files.
 
-    def process_files(self):
-        """Process all selected files."""
+        Runs on the worker thread; Tk updates go through the log queue.
+        """
         try:
-            mode = self.detection_mode.get()
             mode_display = mode.replace("_", " ").title()
             self.log(f"Starting {mode_display} duplicate detection process...")
-            self.log(f"Processing {len(self.input_files)} file(s)")
+            self.log(f"Processing {len(input_files)} file(s)")
             self.log("=" * 50)
 
-            for file_path in self.input_files:
-                self.process_single_file(file_path)
+            tasks = [(file_path,) for file_path in input_files]
+            results = run_file_tasks(func, tasks, workers)
+
+            total_duplicates = 0
+            failed_files = 0
+            for file_path, (result, lines, error) in zip(input_files, results):
+                self.log_file_result(file_path, lines, error)
+                if error is None:
+                    total_duplicates += result["duplicate_count"]
+                else:
+                    failed_files += 1
 
             self.log("=" * 50)
             self.log("Duplicate detection completed!")
-            self.log(f"Output files saved to: {self.output_directory.get()}")
+            item_type = {
+                "row": "rows",
+                "column": "columns",
+                "near_row": "rows",
+                "clean": "rows",
+            }.get(mode, "entries")
+            self.log(f"Total duplicate {item_type} found: {total_duplicates:,}")
+            if failed_files:
+                self.log(f"Files with errors: {failed_files}")
+            self.log(f"Output files saved to: {output_directory}")
 
             if mode == "row":
                 info_text = (
                     f"Processing completed!\n\n"
-                    f"Processed {len(self.input_files)} file(s)\n"
-                    f"Output saved to: {self.output_directory.get()}\n\n"
+                    f"Processed {len(input_files)} file(s)\n"
+                    f"Output saved to: {output_directory}\n\n"
                     f"Each output CSV file includes an 'is_duplicate_row' column "
                     f"where TRUE indicates duplicate rows."
                 )
             elif mode == "column":
                 info_text = (
                     f"Processing completed!\n\n"
-                    f"Processed {len(self.input_files)} file(s)\n"
-                    f"Output saved to: {self.output_directory.get()}\n\n"
+                    f"Processed {len(input_files)} file(s)\n"
+                    f"Output saved to: {output_directory}\n\n"
                     f"Each output CSV file has a header row indicating "
                     f"'DUPLICATE_COLUMN' or 'UNIQUE_COLUMN' for each column."
                 )
+            elif mode == "clean":
+                info_text = (
+                    f"Processing completed!\n\n"
+                    f"Processed {len(input_files)} file(s)\n"
+                    f"Output saved to: {output_directory}\n\n"
+                    f"Each '_cleaned' file holds the rows kept by the keep policy; "
+                    f"dropped rows go to '_removed' files when requested."
+                )
+            elif mode == "near_row":
+                info_text = (
+                    f"Processing completed!\n\n"
+                    f"Processed {len(input_files)} file(s)\n"
+                    f"Output saved to: {output_directory}\n\n"
+                    f"Each output file includes a 'near_duplicate_cluster' column "
+                    f"grouping similar rows, and an 'is_near_duplicate' column."
+                )
             else:  # column_values
                 info_text = (
                     f"Processing completed!\n\n"
-                    f"Processed {len(self.input_files)} file(s)\n"
-                    f"Output saved to: {self.output_directory.get()}\n\n"
+                    f"Processed {len(input_files)} file(s)\n"
+                    f"Output saved to: {output_directory}\n\n"
                     f"Each output CSV file includes '[ColumnName]_is_duplicate' columns "
                     f"indicating duplicate values within each column."
                 )
 
-            messagebox.showinfo("Success", info_text)
+            self.log_queue.call(messagebox.showinfo, "Success", info_text)
 
         except Exception as e:
             error_msg = f"An error occurred during processing: {str(e)}"
             self.log(error_msg)
-            messagebox.showerror("Error", error_msg)
+            self.log_queue.call(messagebox.showerror, "Error", error_msg)
 
         finally:
             # Re-enable the process button and stop progress bar
-            self.process_button.config(state=tk.NORMAL)
-            self.progress.stop()
+            self.log_queue.call(self.process_button.config, state=tk.NORMAL)
+            self.log_queue.call(self.progress.stop)
+
+    def process_corpus(
+        self, input_files, output_directory, key_columns, sheets, normalizer, workers
+    ):
+        """Report rows shared between the selected files.
+
+        Runs on the worker thread; Tk updates go through the log queue.
+        """
+        try:
+            self.log("Starting cross-file duplicate detection...")
+            self.log("=" * 50)
+            result = find_corpus_duplicates(
+                input_files,
+                output_directory,
+                key_columns=key_columns,
+                sheets=sheets,
+                workers=workers,
+                log=self.log,
+                normalizer=normalizer,
+            )
+            self.log("=" * 50)
+            self.log("Duplicate detection completed!")
+            if result["failures"]:
+                self.log(f"Files with errors: {result['failures']}")
+
+            info_text = (
+                f"Processing completed!\n\n"
+                f"Rows found in more than one file: {result['duplicate_count']:,}\n"
+                f"Report saved to: {Path(output_directory) / CORPUS_REPORT_FILENAME}"
+                f"\n\nEach report line gives the file and row number of one "
+                f"occurrence; lines with the same 'group' hold the same row."
+            )
+            self.log_queue.call(messagebox.showinfo, "Success", info_text)
+
+        except Exception as e:
+            error_msg = f"An error occurred during processing: {str(e)}"
+            self.log(error_msg)
+            self.log_queue.call(messagebox.showerror, "Error", error_msg)
+
+        finally:
+            self.log_queue.call(self.process_button.config, state=tk.NORMAL)
+            self.log_queue.call(self.progress.stop)
 
     def start_processing(self):
         """Start the duplicate detection process in a separate thread."""
@@ -564,10 +597,73 @@ class DuplicateDetectorGUI:
         self.progress.start()
 
         # Clear previous logs
-        self.log_text.delete(1.0, tk.END)
+        self.log_queue.clear()
+
+        # Read the settings here; the worker thread never touches Tk
+        output_directory = self.output_directory.get()
+        mode = self.detection_mode.get()
+        key_columns = parse_key_columns(self.key_columns.get())
+        max_column = self.max_column.get().strip() or None
+        sheets = parse_sheet_names(self.sheets.get())
+        normalizer = Normalizer.from_text(self.normalize.get())
+        schema_path = (
+            Path(output_directory) / SCHEMA_FILENAME if self.use_schema.get() else None
+        )
+        func = partial(
+            process_file,
+            output_directory=output_directory,
+            mode=mode,
+            chunksize=DEFAULT_CHUNKSIZE if self.stream_csv.get() else None,
+            cache_path=(
+                Path(output_directory) / CACHE_FILENAME
+                if self.use_cache.get()
+                else None
+            ),
+            incremental=self.incremental.get(),
+            scan=self.scan_csv.get(),
+            similarity=self.similarity.get(),
+            key_columns=key_columns,
+            keep=self.keep_policy.get(),
+            max_column=max_column,
+            schema_path=schema_path,
+            sheets=sheets,
+            normalizer=normalizer,
+        )
+        if self.remove_in_pass.get():
+            mode = "clean"
+            func = partial(
+                clean_file,
+                output_directory=output_directory,
+                chunksize=DEFAULT_CHUNKSIZE if self.stream_csv.get() else None,
+                key_columns=key_columns,
+                keep=self.keep_policy.get(),
+                max_column=max_column,
+                save_removed=self.save_removed.get(),
+                schema_path=schema_path,
+                sheets=sheets,
+                normalizer=normalizer,
+            )
+        target = self.process_files
+        args = (
+            list(self.input_files),
+            output_directory,
+            mode,
+            func,
+            self.workers.get(),
+        )
+        if self.across_files.get():
+            target = self.process_corpus
+            args = (
+                list(self.input_files),
+                output_directory,
+                key_columns,
+                sheets,
+                normalizer,
+                self.workers.get(),
+            )
 
         # Start processing in a separate thread to keep GUI responsive
-        processing_thread = threading.Thread(target=self.process_files)
+        processing_thread = threading.Thread(target=target, args=args)
         processing_thread.daemon = True
         processing_thread.start()
 
@@ -0,0 +1,96 @@
+"""
+Bloom Filter
+Compact probabilistic set of 64-bit row keys, used to screen out rows that
+cannot have a match before the exact comparison. Keys are added and looked
+up a whole array at a time.
+"""
+
+import math
+
+import numpy as np
+
+DEFAULT_FILTER_BYTES = 64 * 1024 * 1024
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+MAX_HASH_FUNCTIONS = 16
+STEP_SEED = np.uint64(0x9E3779B97F4A7C15)
+
+
+def mix64(values):
+    """Scramble uint64 values with the splitmix64 finalizer."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+class BloomFilter:
+    """Bloom filter over uint64 keys in a packed bit array.
+
+    Each key sets num_hashes bits picked by double hashing. A key that was
+    added is always reported as present; one that was not is reported with a
+    probability close to the false positive rate the filter was sized for.
+    """
+
+    def __init__(self, num_bits, num_hashes):
+        self.num_bits = max(int(num_bits), 8)
+        self.num_hashes = num_hashes
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+
+    @classmethod
+    def for_capacity(
+        cls,
+        capacity,
+        false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE,
+        max_bytes=DEFAULT_FILTER_BYTES,
+    ):
+        """Size a filter for capacity keys at a false positive rate.
+
+        The bit array never grows past max_bytes; a filter capped that way
+        has a higher false positive rate than asked for.
+        """
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("The false positive rate must be between 0 and 1")
+
+        capacity = max(int(capacity), 1)
+        num_bits = math.ceil(
+            -capacity * math.log(false_positive_rate) / math.log(2) ** 2
+        )
+        num_bits = max(min(num_bits, int(max_bytes) * 8), 8)
+        num_hashes = round(num_bits / capacity * math.log(2))
+        return cls(num_bits, min(max(num_hashes, 1), MAX_HASH_FUNCTIONS))
+
+    @property
+    def nbytes(self):
+        """Size of the bit array in bytes."""
+        return self.bits.nbytes
+
+    def expected_false_positive_rate(self, count):
+        """Return the false positive rate once count distinct keys are in."""
+        fill = 1 - math.exp(-self.num_hashes * count / self.num_bits)
+        return fill**self.num_hashes
+
+    def positions(self, keys):
+        """Yield the bit position of every key for each hash function."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        first = mix64(keys)
+        step = mix64(keys ^ STEP_SEED) | np.uint64(1)
+        num_bits = np.uint64(self.num_bits)
+        for i in range(self.num_hashes):
+            yield (first + np.uint64(i) * step) % num_bits
+
+    def add(self, keys):
+        """Add an array of keys."""
+        for positions in self.positions(keys):
+            masks = np.left_shift(
+                np.uint8(1), (positions & np.uint64(7)).astype(np.uint8)
+            )
+            np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+
+    def contains(self, keys):
+        """Return whether each key may have been added."""
+        found = np.ones(len(keys), dtype=bool)
+        for positions in self.positions(keys):
+            shifts = (positions & np.uint64(7)).astype(np.uint8)
+            found &= (self.bits[positions >> np.uint64(3)] >> shifts) & np.uint8(1) == 1
+        return found
@@ -0,0 +1,179 @@
+"""
+Fingerprint Cache
+Remembers the detection results of input files in a SQLite database so that
+unchanged files are not parsed again on the next run.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+CACHE_FILENAME = ".duplicates_cache.sqlite"
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+DIGEST_BLOCK_SIZE = 1024 * 1024
+# Bumped whenever the entries table or the results it holds change; older
+# caches are recreated
+CACHE_VERSION = 4
+
+
+def file_digest(file_path):
+    """Return the blake2b digest of a file's contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(DIGEST_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_signature(file_path):
+    """Return the (size, mtime in nanoseconds) of a file."""
+    stat = Path(file_path).stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+class FingerprintCache:
+    """SQLite cache of per-file detection results with LRU eviction.
+
+    Entries are keyed by the resolved input path and the detection options.
+    An entry is valid while the input's size and mtime are unchanged, or, if
+    only the mtime moved, while its content digest still matches. Cached
+    results are only replayed when every output file they produced, such as
+    the annotated file and its duplicate report, is still in place and
+    unchanged.
+    """
+
+    def __init__(self, db_path, max_bytes=DEFAULT_CACHE_BYTES):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(self.db_path, timeout=60)
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != CACHE_VERSION:
+            self.connection.execute("DROP TABLE IF EXISTS entries")
+            self.connection.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                path TEXT NOT NULL,
+                options TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                outputs TEXT NOT NULL,
+                result TEXT NOT NULL,
+                log_lines TEXT NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (path, options)
+            )
+            """)
+        self.connection.commit()
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def lookup(self, file_path, options):
+        """Return the cached entry for an unchanged file, or None.
+
+        The entry is a dict with the result and the log lines.
+        """
+        path = str(Path(file_path).resolve())
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, digest, outputs, result, log_lines "
+            "FROM entries WHERE path = ? AND options = ?",
+            (path, options),
+        ).fetchone()
+        if row is None:
+            return None
+
+        size, mtime_ns, digest, outputs = row[:4]
+        current_size, current_mtime_ns = file_signature(file_path)
+        if current_size != size:
+            return None
+
+        # A touched but unmodified file still matches on its content digest
+        if current_mtime_ns != mtime_ns:
+            if file_digest(file_path) != digest:
+                return None
+            self.connection.execute(
+                "UPDATE entries SET mtime_ns = ? WHERE path = ? AND options = ?",
+                (current_mtime_ns, path, options),
+            )
+
+        for output_path, output_size, output_mtime_ns in json.loads(outputs):
+            output_path = Path(output_path)
+            if not output_path.exists() or file_signature(output_path) != (
+                output_size,
+                output_mtime_ns,
+            ):
+                return None
+
+        self.connection.execute(
+            "UPDATE entries SET last_used = ? WHERE path = ? AND options = ?",
+            (time.time(), path, options),
+        )
+        self.connection.commit()
+
+        return {"result": json.loads(row[4]), "log_lines": json.loads(row[5])}
+
+    def store(self, file_path, options, output_paths, result, log_lines):
+        """Record the result of processing a file and evict old entries.
+
+        Output_paths are the files the run wrote; their signatures are kept
+        so that a changed or missing output invalidates the entry.
+        """
+        path = str(Path(file_path).resolve())
+        size, mtime_ns = file_signature(file_path)
+        outputs = json.dumps(
+            [
+                [str(Path(output_path).resolve()), *file_signature(output_path)]
+                for output_path in output_paths
+            ]
+        )
+        result_json = json.dumps(result)
+        log_json = json.dumps(log_lines)
+        nbytes = len(result_json) + len(log_json)
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries VALUES " "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                path,
+                options,
+                size,
+                mtime_ns,
+                file_digest(file_path),
+                outputs,
+                result_json,
+                log_json,
+                nbytes,
+                time.time(),
+            ),
+        )
+        self.evict()
+        self.connection.commit()
+
+    def evict(self):
+        """Drop the least recently used entries until the cache fits its cap."""
+        total = self.connection.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.connection.execute(
+            "SELECT path, options, nbytes FROM entries ORDER BY last_used"
+        ).fetchall()
+        for path, options, nbytes in rows:
+            if total <= self.max_bytes:
+                break
+            self.connection.execute(
+                "DELETE FROM entries WHERE path = ? AND options = ?", (path, options)
+            )
+            total -= nbytes
@@ -0,0 +1,834 @@
+#!/usr/bin/env python3
+"""
+File Comparison Engine
+Finds rows shared between two files by hashing the compared columns of every
+row into a single uint64 key. Used by the File Comparison Tool and runnable
+from the command line.
+"""
+
+import argparse
+import itertools
+import shutil
+import sys
+import tempfile
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from duplicates_bloom import (
+    DEFAULT_FALSE_POSITIVE_RATE,
+    DEFAULT_FILTER_BYTES,
+    BloomFilter,
+)
+from duplicates_engine import (
+    DEFAULT_CHUNKSIZE,
+    RowHashCounter,
+    combine_hashes,
+    find_hashes,
+    hash_series,
+    null_log,
+    read_input_files,
+    row_keys,
+)
+from duplicates_io import iter_file_chunks, read_columns, write_output_file
+from duplicates_normalize import (
+    NORMALIZE_HELP,
+    Normalizer,
+    parse_normalizer,
+)
+from duplicates_schema import SCHEMA_FILENAME
+from duplicates_xlsx import write_workbook
+
+COMPARISON_MODES = ["exact", "case_insensitive", "selected_columns"]
+OUTPUT_FORMATS = ["csv", "xlsx", "parquet", "feather"]
+DEFAULT_PARTITIONS = 64
+KEY_COLUMN = "__row_key"
+
+
+def comparison_columns(df1, df2, mode="exact", selected_columns=None):
+    """Return the columns to compare, in the column order of the first file."""
+    if mode == "selected_columns":
+        if not selected_columns:
+            raise ValueError("No columns selected for comparison")
+        missing = [
+            col
+            for col in selected_columns
+            if col not in df1.columns or col not in df2.columns
+        ]
+        if missing:
+            raise ValueError(f"Selected columns not found in both files: {missing}")
+        return list(selected_columns)
+
+    columns = [col for col in df1.columns if col in df2.columns]
+    if not columns:
+        raise ValueError("No common columns found between the files")
+    return columns
+
+
+def comparison_normalizer(mode="exact", normalizer=None):
+    """Return the normalizer of a comparison; case_insensitive mode folds case."""
+    if mode != "case_insensitive":
+        return normalizer
+    return (normalizer or Normalizer()).with_casefold()
+
+
+def align_column_pair(series1, series2, normalizer=None):
+    """Bring one column of each file to a common dtype so equal values hash alike.
+
+    The normalizer, if any, is applied to both columns after that.
+    """
+    if series1.dtype != series2.dtype:
+        if pd.api.types.is_numeric_dtype(series1) and pd.api.types.is_numeric_dtype(
+            series2
+        ):
+            series1 = series1.astype("float64")
+            series2 = series2.astype("float64")
+        else:
+            series1 = series1.astype(str)
+            series2 = series2.astype(str)
+
+    if normalizer:
+        series1 = normalizer.series(series1)
+        series2 = normalizer.series(series2)
+
+    return series1, series2
+
+
+def comparison_keys(df1, df2, columns, normalizer=None):
+    """Hash the compared columns of every row into one uint64 key per row."""
+    hashes1 = []
+    hashes2 = []
+    for column in columns:
+        series1, series2 = align_column_pair(df1[column], df2[column], normalizer)
+        hashes1.append(hash_series(series1))
+        hashes2.append(hash_series(series2))
+
+    return combine_hashes(hashes1, len(df1)), combine_hashes(hashes2, len(df2))
+
+
+def compare_dataframes(
+    df1,
+    df2,
+    mode="exact",
+    selected_columns=None,
+    include_unique=True,
+    labels=("File_1", "File_2"),
+    normalizer=None,
+):
+    """Find rows present in both dataframes and rows unique to either one.
+
+    Rows are matched on whole-row keys over the compared columns, so memory
+    stays linear in the number of rows however often keys repeat. Values
+    are cleaned by the normalizer, if any, column by column as they are
+    hashed.
+
+    Returns the duplicate rows and the unique rows of both files, each tagged
+    with a source_file column.
+    """
+    columns = comparison_columns(df1, df2, mode, selected_columns)
+    keys1, keys2 = comparison_keys(
+        df1, df2, columns, comparison_normalizer(mode, normalizer)
+    )
+
+    in_file2 = np.isin(keys1, keys2)
+    in_file1 = np.isin(keys2, keys1)
+
+    duplicates_df = pd.concat(
+        [
+            df1[in_file2].assign(source_file=labels[0]),
+            df2[in_file1].assign(source_file=labels[1]),
+        ],
+        ignore_index=True,
+    )
+
+    if include_unique:
+        unique_df = pd.concat(
+            [
+                df1[~in_file2].assign(source_file=labels[0]),
+                df2[~in_file1].assign(source_file=labels[1]),
+            ],
+            ignore_index=True,
+        )
+    else:
+        unique_df = pd.DataFrame()
+
+    return duplicates_df, unique_df
+
+
+def append_csv(df, path):
+    """Append a dataframe to a CSV file, writing the header on first use."""
+    path = Path(path)
+    write_header = not path.exists()
+    df.to_csv(path, mode="a", header=write_header, index=False)
+
+
+def spill_partitions(
+    file_path,
+    columns,
+    spill_dir,
+    prefix,
+    partitions,
+    chunksize,
+    normalizer=None,
+    sheet_name=None,
+    prefilter=None,
+    screened=None,
+):
+    """Stream a file into on-disk partitions by row key and return its row count.
+
+    With a prefilter (a BloomFilter of the other file's keys), only rows that
+    may have a match are spilled; the others are handed to screened.
+    """
+    total_rows = 0
+    for chunk in iter_file_chunks(file_path, chunksize, sheet_name=sheet_name):
+        keys = row_keys(chunk, columns, normalizer)
+        total_rows += len(chunk)
+        if prefilter is not None:
+            candidates = prefilter.contains(keys)
+            if screened is not None and not candidates.all():
+                screened(chunk[~candidates])
+            chunk = chunk[candidates]
+            keys = keys[candidates]
+
+        chunk = chunk.assign(**{KEY_COLUMN: keys})
+        partition_ids = keys % np.uint64(partitions)
+
+        for partition_id, part in chunk.groupby(partition_ids, sort=False):
+            append_csv(part, Path(spill_dir) / f"{prefix}_{partition_id}.csv")
+    return total_rows
+
+
+def write_screened_rows(rows, path, output_columns, label, counts, count_name):
+    """Append rows ruled out by the prefilter to a unique rows file."""
+    append_csv(rows.assign(source_file=label).reindex(columns=output_columns), path)
+    counts[count_name] += len(rows)
+
+
+def partition_filter(
+    spill_dir, prefix, partitions, capacity, max_bytes, false_positive_rate
+):
+    """Build a Bloom filter over the keys of one file's spilled partitions."""
+    prefilter = BloomFilter.for_capacity(capacity, false_positive_rate, max_bytes)
+    for partition_id in range(partitions):
+        path = Path(spill_dir) / f"{prefix}_{partition_id}.csv"
+        if path.exists():
+            keys = pd.read_csv(path, usecols=[KEY_COLUMN], dtype=str)[KEY_COLUMN]
+            prefilter.add(keys.astype("uint64").to_numpy())
+    return prefilter
+
+
+def read_partition(path, header):
+    """Read one spilled partition, or an empty frame if nothing was spilled."""
+    if not Path(path).exists():
+        return pd.DataFrame(columns=header + [KEY_COLUMN]).astype(
+            {KEY_COLUMN: "uint64"}
+        )
+    partition = pd.read_csv(path, dtype=str, keep_default_na=False)
+    partition[KEY_COLUMN] = partition[KEY_COLUMN].astype("uint64")
+    return partition
+
+
+def concatenate_csv_files(paths, output_path):
+    """Concatenate CSV files sharing one header, skipping missing files."""
+    written_header = False
+    with open(output_path, "w", newline="", encoding="utf-8") as output:
+        for path in paths:
+            if not Path(path).exists():
+                continue
+            with open(path, newline="", encoding="utf-8") as source:
+                header = source.readline()
+                if not written_header:
+                    output.write(header)
+                    written_header = True
+                shutil.copyfileobj(source, output)
+    return written_header
+
+
+def compare_files_partitioned(
+    file1_path,
+    file2_path,
+    output_dir,
+    base_filename,
+    mode="exact",
+    selected_columns=None,
+    include_unique=True,
+    partitions=DEFAULT_PARTITIONS,
+    chunksize=DEFAULT_CHUNKSIZE,
+    labels=("File_1", "File_2"),
+    log=null_log,
+    sheet_names=(None, None),
+    prefilter=False,
+    filter_bytes=DEFAULT_FILTER_BYTES,
+    false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE,
+    normalizer=None,
+):
+    """Compare two files that do not fit in memory through hash partitioning.
+
+    Both files are streamed in chunks and their rows spilled into on-disk
+    partitions by row key, so that matching rows always land in the same
+    partition pair. Each pair is then compared in memory and the results are
+    appended to the output CSV files. Memory is bounded by partition size.
+
+    Fields are read as text and keyed by row_keys, so numbers match by value
+    as in compare_dataframes, after the normalizer's clean-up if there is
+    one. Rows come out grouped by partition rather than in input order.
+    Sheet_names gives the sheet read from each file when it is an Excel
+    workbook.
+
+    With prefilter, the smaller file is spilled first and a Bloom filter of
+    its keys, of at most filter_bytes, screens the rows of the larger file:
+    rows the filter rules out cannot match and go straight to the unique
+    output, so only candidate rows are spilled and compared exactly.
+
+    Returns a dict of row counts.
+    """
+    output_dir = Path(output_dir)
+    sheet1, sheet2 = sheet_names
+    header1 = read_columns(file1_path, sheet1)
+    header2 = read_columns(file2_path, sheet2)
+    columns = comparison_columns(
+        pd.DataFrame(columns=header1),
+        pd.DataFrame(columns=header2),
+        mode,
+        selected_columns,
+    )
+    output_columns = (
+        header1 + [col for col in header2 if col not in header1] + ["source_file"]
+    )
+    normalizer = comparison_normalizer(mode, normalizer)
+
+    counts = dict.fromkeys(
+        ["rows1", "rows2", "duplicates1", "duplicates2", "unique1", "unique2"], 0
+    )
+
+    with tempfile.TemporaryDirectory(dir=output_dir) as spill_dir:
+        spill_dir = Path(spill_dir)
+
+        file_paths = [file1_path, file2_path]
+        prefixes = ["left", "right"]
+        first, second = 0, 1
+        if (
+            prefilter
+            and Path(file2_path).stat().st_size < Path(file1_path).stat().st_size
+        ):
+            first, second = 1, 0
+
+        log(
+            f"Partitioning {Path(file_paths[first]).name} into {partitions} partitions..."
+        )
+        counts[f"rows{first + 1}"] = spill_partitions(
+            file_paths[first],
+            columns,
+            spill_dir,
+            prefixes[first],
+            partitions,
+            chunksize,
+            normalizer,
+            sheet_names[first],
+        )
+
+        # Rows of the second file that the filter rules out are unique
+        screen = None
+        screened = None
+        if prefilter:
+            capacity = counts[f"rows{first + 1}"]
+            screen = partition_filter(
+                spill_dir,
+                prefixes[first],
+                partitions,
+                capacity,
+                filter_bytes,
+                false_positive_rate,
+            )
+            log(
+                f"Prefilter: {screen.nbytes / 1024:,.0f} KB, estimated false "
+                f"positive rate {screen.expected_false_positive_rate(capacity):.2%}"
+            )
+            if include_unique:
+                screened = partial(
+                    write_screened_rows,
+                    path=spill_dir / f"unique{second + 1}.csv",
+                    output_columns=output_columns,
+                    label=labels[second],
+                    counts=counts,
+                    count_name=f"unique{second + 1}",
+                )
+
+        log(
+            f"Partitioning {Path(file_paths[second]).name} into {partitions} partitions..."
+        )
+        counts[f"rows{second + 1}"] = spill_partitions(
+            file_paths[second],
+            columns,
+            spill_dir,
+            prefixes[second],
+            partitions,
+            chunksize,
+            normalizer,
+            sheet_names[second],
+            prefilter=screen,
+            screened=screened,
+        )
+
+        log("Comparing partitions...")
+        for partition_id in range(partitions):
+            left = read_partition(spill_dir / f"left_{partition_id}.csv", header1)
+            right = read_partition(spill_dir / f"right_{partition_id}.csv", header2)
+            if left.empty and right.empty:
+                continue
+
+            in_file2 = np.isin(
+                left[KEY_COLUMN].to_numpy(), right[KEY_COLUMN].to_numpy()
+            )
+            in_file1 = np.isin(
+                right[KEY_COLUMN].to_numpy(), left[KEY_COLUMN].to_numpy()
+            )
+            left = left.drop(columns=KEY_COLUMN).assign(source_file=labels[0])
+            right = right.drop(columns=KEY_COLUMN).assign(source_file=labels[1])
+
+            outputs = [
+                ("duplicates1", left[in_file2]),
+                ("duplicates2", right[in_file1]),
+            ]
+            if include_unique:
+                outputs += [
+                    ("unique1", left[~in_file2]),
+                    ("unique2", right[~in_file1]),
+                ]
+
+            for name, rows in outputs:
+                if not rows.empty:
+                    append_csv(
+                        rows.reindex(columns=output_columns), spill_dir / f"{name}.csv"
+                    )
+                    counts[name] += len(rows)
+
+        duplicates_path = output_dir / f"{base_filename}_duplicates.csv"
+        if concatenate_csv_files(
+            [spill_dir / "duplicates1.csv", spill_dir / "duplicates2.csv"],
+            duplicates_path,
+        ):
+            log(f"Duplicates saved to: {duplicates_path.name}")
+        else:
+            duplicates_path.unlink()
+
+        if include_unique:
+            unique_path = output_dir / f"{base_filename}_unique.csv"
+            if concatenate_csv_files(
+                [spill_dir / "unique1.csv", spill_dir / "unique2.csv"], unique_path
+            ):
+                log(f"Unique rows saved to: {unique_path.name}")
+            else:
+                unique_path.unlink()
+
+    return counts
+
+
+def common_columns(headers, mode="exact", selected_columns=None):
+    """Return the columns compared across several files, in the first file's order."""
+    columns = list(headers[0])
+    for header in headers[1:]:
+        columns = comparison_columns(
+            pd.DataFrame(columns=columns),
+            pd.DataFrame(columns=header),
+            mode,
+            selected_columns,
+        )
+    return columns
+
+
+def parse_combination(text):
+    """Parse a '1,3,7' list of 1-based file numbers into a tuple."""
+    try:
+        return tuple(sorted({int(number) for number in text.split(",")}))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Not a list of file numbers: {text}")
+
+
+def default_combinations(file_count):
+    """Return every pair of files, and all files together when there are more."""
+    combinations = list(itertools.combinations(range(1, file_count + 1), 2))
+    if file_count > 2:
+        combinations.append(tuple(range(1, file_count + 1)))
+    return combinations
+
+
+def membership_mask(file_numbers, file_count):
+    """Return the packed membership bitmap of a set of 1-based file numbers."""
+    bits = np.zeros(file_count, dtype=bool)
+    bits[np.asarray(file_numbers) - 1] = True
+    return np.packbits(bits, bitorder="little")
+
+
+def describe_memberships(patterns, file_count):
+    """Return the file numbers ('1,3,7') and file count of each packed bitmap."""
+    bits = np.unpackbits(patterns, axis=1, count=file_count, bitorder="little").astype(
+        bool
+    )
+    numbers = np.arange(1, file_count + 1).astype(str)
+    return np.array([",".join(numbers[row]) for row in bits], dtype=object), bits.sum(
+        axis=1
+    )
+
+
+def compare_many_files(
+    file_paths,
+    output_dir,
+    base_filename,
+    mode="exact",
+    selected_columns=None,
+    combinations=None,
+    chunksize=DEFAULT_CHUNKSIZE,
+    sheet_names=None,
+    log=null_log,
+    normalizer=None,
+):
+    """Compare any number of files with one hash pass over each.
+
+    Every file is streamed once. The keys of its rows give the set of
+    distinct rows it holds, and the first occurrence of every distinct row
+    across all files is spilled to disk. The sets are merged into one
+    membership bitmap per distinct row, bit i set when file i+1 holds it,
+    from which the counts of rows shared by every requested combination of
+    files follow without comparing the files pairwise. Combinations are
+    tuples of 1-based file numbers; by default every pair, and all files.
+
+    Writes <base>_membership.csv, one line per distinct row with its compared
+    columns, the numbers of the files holding it and their count, and
+    <base>_intersections.csv with the number of distinct rows present in all
+    files of each combination. Rows are keyed by row_keys, so numbers match
+    by value across formats, after the normalizer's clean-up if there is one.
+
+    Returns the intersection counts as a dataframe.
+    """
+    output_dir = Path(output_dir)
+    file_count = len(file_paths)
+    if file_count < 2:
+        raise ValueError("At least two files are needed for a comparison")
+    if sheet_names is None:
+        sheet_names = [None] * file_count
+    if combinations is None:
+        combinations = default_combinations(file_count)
+    for combination in combinations:
+        if not combination or min(combination) < 1 or max(combination) > file_count:
+            raise ValueError(
+                f"File combination out of range 1-{file_count}: {combination}"
+            )
+
+    headers = [
+        read_columns(path, sheet) for path, sheet in zip(file_paths, sheet_names)
+    ]
+    columns = common_columns(headers, mode, selected_columns)
+    normalizer = comparison_normalizer(mode, normalizer)
+
+    with tempfile.TemporaryDirectory(dir=output_dir) as spill_dir:
+        rows_path = Path(spill_dir) / "rows.csv"
+        seen = RowHashCounter()
+        file_keys = []
+
+        # One pass per file: its distinct keys, and rows no file had before
+        for number, (file_path, sheet_name) in enumerate(
+            zip(file_paths, sheet_names), start=1
+        ):
+            distinct = RowHashCounter()
+            total_rows = 0
+            chunks = iter_file_chunks(
+                file_path, chunksize, columns=columns, sheet_name=sheet_name
+            )
+            for chunk in chunks:
+                keys = row_keys(chunk, columns, normalizer)
+                distinct.add(keys)
+                new = ~pd.Series(keys).duplicated().to_numpy() & ~seen.contains(keys)
+                seen.add(keys[new])
+                if new.any():
+                    append_csv(
+                        chunk[new][columns].assign(**{KEY_COLUMN: keys[new]}),
+                        rows_path,
+                    )
+                total_rows += len(chunk)
+
+            distinct.fold()
+            file_keys.append(distinct.hashes)
+            log(
+                f"File_{number}: {Path(file_path).name} "
+                f"({total_rows:,} rows, {len(distinct.hashes):,} distinct)"
+            )
+
+        # Membership bitmaps, packed 8 files to a byte
+        seen.fold()
+        all_keys = seen.hashes
+        bitmaps = np.zeros((len(all_keys), (file_count + 7) // 8), dtype=np.uint8)
+        for index, keys in enumerate(file_keys):
+            positions, _ = find_hashes(all_keys, keys)
+            bitmaps[positions, index // 8] |= np.uint8(1 << (index % 8))
+        del file_keys
+
+        # Rows with the same membership are counted together
+        patterns, pattern_index, pattern_counts = np.unique(
+            bitmaps, axis=0, return_inverse=True, return_counts=True
+        )
+        pattern_index = pattern_index.reshape(-1)
+        del bitmaps
+        file_lists, file_totals = describe_memberships(patterns, file_count)
+
+        intersections = []
+        for combination in combinations:
+            mask = membership_mask(combination, file_count)
+            shared = np.all(patterns & mask == mask, axis=1)
+            intersections.append(
+                {
+                    "files": ",".join(map(str, combination)),
+                    "file_count": len(combination),
+                    "rows": int(pattern_counts[shared].sum()),
+                }
+            )
+        intersections = pd.DataFrame(
+            intersections, columns=["files", "file_count", "rows"]
+        )
+        intersections_path = output_dir / f"{base_filename}_intersections.csv"
+        intersections.to_csv(intersections_path, index=False)
+        log(f"Distinct rows: {len(all_keys):,}")
+        for files, rows in zip(intersections["files"], intersections["rows"]):
+            log(f"  In files {files}: {rows:,} rows")
+        log(f"Intersections saved to: {intersections_path.name}")
+
+        membership_path = output_dir / f"{base_filename}_membership.csv"
+        pd.DataFrame(columns=columns + ["files", "file_count"]).to_csv(
+            membership_path, index=False
+        )
+        if rows_path.exists():
+            for chunk in pd.read_csv(
+                rows_path, dtype=str, keep_default_na=False, chunksize=chunksize
+            ):
+                positions, _ = find_hashes(
+                    all_keys, chunk.pop(KEY_COLUMN).astype("uint64").to_numpy()
+                )
+                chunk_patterns = pattern_index[positions]
+                chunk["files"] = file_lists[chunk_patterns]
+                chunk["file_count"] = file_totals[chunk_patterns]
+                chunk.to_csv(membership_path, mode="a", header=False, index=False)
+        log(f"Membership saved to: {membership_path.name}")
+
+    return intersections
+
+
+def save_comparison_results(
+    duplicates_df,
+    unique_df,
+    output_dir,
+    base_filename,
+    output_format="csv",
+    include_unique=True,
+    highlight_duplicates=True,
+    log=null_log,
+):
+    """Save comparison results as one Excel workbook or as separate data files."""
+    output_dir = Path(output_dir)
+
+    if output_format != "xlsx":
+        # Save as separate files
+        if not duplicates_df.empty:
+            duplicates_path = output_dir / f"{base_filename}_duplicates.{output_format}"
+            write_output_file(duplicates_df, duplicates_path)
+            log(f"Duplicates saved to: {duplicates_path.name}")
+
+        if not unique_df.empty and include_unique:
+            unique_path = output_dir / f"{base_filename}_unique.{output_format}"
+            write_output_file(unique_df, unique_path)
+            log(f"Unique rows saved to: {unique_path.name}")
+
+    else:  # Excel format
+        excel_path = output_dir / f"{base_filename}.xlsx"
+
+        sheets = {}
+        if not duplicates_df.empty:
+            sheets["Duplicates"] = duplicates_df
+        if not unique_df.empty and include_unique:
+            sheets["Unique_Rows"] = unique_df
+        if not sheets:
+            sheets["Duplicates"] = duplicates_df
+
+        # Highlighting is one conditional format over the duplicate rows
+        highlight = ["Duplicates"] if highlight_duplicates else []
+        write_workbook(excel_path, sheets, highlight=highlight)
+
+        log(f"Results saved to: {excel_path.name}")
+
+
+def build_parser():
+    """Build the command line argument parser."""
+    parser = argparse.ArgumentParser(
+        description="Find rows shared between CSV, Excel or columnar files."
+    )
+    parser.add_argument(
+        "files",
+        nargs="+",
+        help="Input files; more than two run a membership comparison",
+    )
+    parser.add_argument(
+        "-o", "--output-dir", required=True, help="Directory for comparison results"
+    )
+    parser.add_argument(
+        "-m", "--mode", choices=COMPARISON_MODES, default="exact", help="Match mode"
+    )
+    parser.add_argument(
+        "-c",
+        "--columns",
+        nargs="+",
+        help="Columns to compare (selected_columns mode)",
+    )
+    parser.add_argument(
+        "--normalize",
+        type=parse_normalizer,
+        help=f"Comma-separated clean-up before comparing rows: {NORMALIZE_HELP}",
+    )
+    parser.add_argument(
+        "-f", "--format", choices=OUTPUT_FORMATS, default="csv", help="Output format"
+    )
+    parser.add_argument(
+        "--no-unique", action="store_true", help="Do not write unique rows"
+    )
+    parser.add_argument(
+        "--sheet1",
+        help="Sheet to read when the first file is an Excel workbook (default: first)",
+    )
+    parser.add_argument(
+        "--sheet2",
+        help="Sheet to read when the second file is an Excel workbook (default: first)",
+    )
+    parser.add_argument(
+        "--combinations",
+        nargs="+",
+        type=parse_combination,
+        help="File number lists such as 1,3,7 whose shared rows are counted "
+        "(membership comparison, default: every pair and all files)",
+    )
+    parser.add_argument(
+        "--partitions",
+        type=int,
+        help="Compare out of core through this many on-disk partitions (CSV output)",
+    )
+    parser.add_argument(
+        "--prefilter",
+        action="store_true",
+        help="Screen the larger file with a Bloom filter of the smaller (--partitions)",
+    )
+    parser.add_argument(
+        "--filter-mb",
+        type=float,
+        default=DEFAULT_FILTER_BYTES / (1024 * 1024),
+        help="Maximum size of the prefilter in MB",
+    )
+    parser.add_argument(
+        "--false-positive-rate",
+        type=float,
+        default=DEFAULT_FALSE_POSITIVE_RATE,
+        help="Target false positive rate of the prefilter",
+    )
+    parser.add_argument(
+        "--schema-cache",
+        action="store_true",
+        help=f"Learn compact CSV column types and reuse them ({SCHEMA_FILENAME})",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print errors")
+    return parser
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if len(args.files) < 2:
+        parser.error("at least two input files are required")
+    log = null_log if args.quiet else print
+
+    if not Path(args.output_dir).is_dir():
+        print(f"Output directory does not exist: {args.output_dir}", file=sys.stderr)
+        return 2
+
+    timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+    if len(args.files) > 2 or args.combinations:
+        try:
+            compare_many_files(
+                args.files,
+                args.output_dir,
+                f"comparison_{len(args.files)}_files_{timestamp}",
+                mode=args.mode,
+                selected_columns=args.columns,
+                combinations=args.combinations,
+                sheet_names=[args.sheet1, args.sheet2] + [None] * (len(args.files) - 2),
+                log=log,
+                normalizer=args.normalize,
+            )
+        except Exception as e:
+            print(f"Error during comparison: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    file1, file2 = args.files
+    base_filename = f"comparison_{Path(file1).stem}_vs_{Path(file2).stem}_{timestamp}"
+
+    try:
+        if args.partitions:
+            counts = compare_files_partitioned(
+                file1,
+                file2,
+                args.output_dir,
+                base_filename,
+                mode=args.mode,
+                selected_columns=args.columns,
+                include_unique=not args.no_unique,
+                partitions=args.partitions,
+                log=log,
+                sheet_names=(args.sheet1, args.sheet2),
+                prefilter=args.prefilter,
+                filter_bytes=int(args.filter_mb * 1024 * 1024),
+                false_positive_rate=args.false_positive_rate,
+                normalizer=args.normalize,
+            )
+            log(f"Duplicate rows: {counts['duplicates1'] + counts['duplicates2']}")
+            if not args.no_unique:
+                log(f"Unique rows: {counts['unique1'] + counts['unique2']}")
+            return 0
+
+        df1, df2 = read_input_files(
+            [file1, file2],
+            workers=2,
+            schema_path=(
+                Path(args.output_dir) / SCHEMA_FILENAME if args.schema_cache else None
+            ),
+            sheet_names=[args.sheet1, args.sheet2],
+        )
+        duplicates_df, unique_df = compare_dataframes(
+            df1,
+            df2,
+            mode=args.mode,
+            selected_columns=args.columns,
+            include_unique=not args.no_unique,
+            normalizer=args.normalize,
+        )
+
+        log(f"Duplicate rows: {len(duplicates_df)}")
+        if not args.no_unique:
+            log(f"Unique rows: {len(unique_df)}")
+
+        save_comparison_results(
+            duplicates_df,
+            unique_df,
+            args.output_dir,
+            base_filename,
+            output_format=args.format,
+            include_unique=not args.no_unique,
+            log=log,
+        )
+    except Exception as e:
+        print(f"Error during comparison: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
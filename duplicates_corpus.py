@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Corpus Duplicate Detection
+Finds rows that appear in more than one file of a corpus. Files are streamed
+one at a time into a single global table of row hashes, so memory grows with
+the number of distinct rows rather than with the volume of data.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from duplicates_engine import (
+    DEFAULT_CHUNKSIZE,
+    RowHashCounter,
+    check_key_columns,
+    default_workers,
+    find_hashes,
+    null_log,
+    parse_key_columns,
+    parse_sheet_names,
+    row_keys,
+    run_file_tasks,
+    select_sheets,
+)
+from duplicates_io import find_input_files, iter_file_chunks
+from duplicates_normalize import NORMALIZE_HELP, parse_normalizer
+from duplicates_report import render_rows
+
+CORPUS_REPORT_FILENAME = "corpus_duplicates_report.csv"
+REPORT_COLUMNS = ["group", "files", "file", "sheet", "row_number", "values"]
+
+
+def iter_source_hashes(
+    file_path, sheet_name, chunksize, key_columns=None, normalizer=None
+):
+    """Yield (chunk, row hashes) for the chunks of one file or sheet.
+
+    Fields are keyed by row_keys, numbers by value, so the same row matches
+    across CSV, Excel and columnar files, after the normalizer's clean-up if
+    there is one.
+    """
+    chunks = iter_file_chunks(file_path, chunksize, sheet_name=sheet_name)
+    for chunk_index, chunk in enumerate(chunks):
+        if chunk_index == 0:
+            check_key_columns(chunk.columns, file_path, key_columns)
+        yield chunk, row_keys(chunk, key_columns, normalizer)
+
+
+def distinct_source_hashes(
+    file_path,
+    sheet_name,
+    chunksize=DEFAULT_CHUNKSIZE,
+    key_columns=None,
+    normalizer=None,
+    log=null_log,
+):
+    """Return the sorted distinct row hashes of one file or sheet."""
+    counter = RowHashCounter()
+    source_hashes = iter_source_hashes(
+        file_path, sheet_name, chunksize, key_columns, normalizer
+    )
+    for _, hashes in source_hashes:
+        counter.add(hashes)
+    counter.fold()
+    return counter.hashes
+
+
+def find_source_rows(
+    file_path,
+    sheet_name,
+    index_path,
+    chunksize=DEFAULT_CHUNKSIZE,
+    key_columns=None,
+    normalizer=None,
+    log=null_log,
+):
+    """Return the rows of one file or sheet whose hash is in the shared index.
+
+    The index is the sorted array of cross-file hashes saved with np.save; it
+    is memory-mapped so parallel workers share it instead of copying it.
+    """
+    index = np.load(index_path, mmap_mode="r")
+    frames = []
+    row_offset = 0
+    for chunk, hashes in iter_source_hashes(
+        file_path, sheet_name, chunksize, key_columns, normalizer
+    ):
+        positions, found = find_hashes(index, hashes)
+        if found.any():
+            rows = chunk[found]
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "group": positions[found] + 1,
+                        "row_number": row_offset + np.flatnonzero(found) + 1,
+                        "values": render_rows(
+                            rows, key_columns or rows.columns, names=False
+                        ).to_numpy(),
+                    }
+                )
+            )
+        row_offset += len(chunk)
+
+    if not frames:
+        return pd.DataFrame(columns=["group", "row_number", "values"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def list_sources(input_files, sheets=None, log=null_log):
+    """Return the (file, sheet) pairs to scan; unreadable workbooks are skipped."""
+    sources = []
+    for file_path in input_files:
+        try:
+            sheet_names = select_sheets(file_path, sheets)
+        except Exception as e:
+            log(f"Error processing {Path(file_path).name}: {e}")
+            continue
+        sources += [(file_path, sheet_name) for sheet_name in sheet_names]
+    return sources
+
+
+def find_corpus_duplicates(
+    input_files,
+    output_directory,
+    chunksize=DEFAULT_CHUNKSIZE,
+    key_columns=None,
+    sheets=None,
+    workers=None,
+    log=null_log,
+    normalizer=None,
+):
+    """Report every row that appears in more than one file of the corpus.
+
+    A first pass adds the distinct row hashes of each file, or of each sheet
+    of a workbook, to a global count of the files holding each hash. A second
+    pass lists every occurrence of a hash held by two or more files as one
+    line of the report: the duplicate group, the number of files sharing it,
+    the file, sheet and 1-based row number, and the row's values. Rows are
+    compared on key_columns, or on all columns by position, after the
+    normalizer's clean-up if there is one.
+    """
+    sources = list_sources(input_files, sheets, log)
+    log(f"Indexing rows of {len(input_files)} file(s)")
+
+    # First pass: one global table of how many files hold each row hash
+    file_counts = RowHashCounter()
+    scanned = []
+    failures = len(input_files) - len({file_path for file_path, _ in sources})
+    distinct = partial(
+        distinct_source_hashes,
+        chunksize=chunksize,
+        key_columns=key_columns,
+        normalizer=normalizer,
+    )
+    for source, (hashes, lines, error) in zip(
+        sources, run_file_tasks(distinct, sources, workers)
+    ):
+        for line in lines:
+            log(line)
+        if error is not None:
+            log(f"Error processing {Path(source[0]).name}: {error}")
+            failures += 1
+            continue
+        file_counts.add(hashes)
+        scanned.append(source)
+
+    shared_hashes, shared_counts = file_counts.duplicate_counts()
+    del file_counts
+    log(f"Rows found in more than one file: {len(shared_hashes):,}")
+
+    report_path = Path(output_directory) / CORPUS_REPORT_FILENAME
+    pd.DataFrame(columns=REPORT_COLUMNS).to_csv(report_path, index=False)
+    occurrences = 0
+
+    # Second pass: list where each shared row occurs
+    if len(shared_hashes):
+        index_file, index_path = tempfile.mkstemp(suffix=".npy")
+        os.close(index_file)
+        try:
+            np.save(index_path, shared_hashes)
+            find = partial(
+                find_source_rows,
+                index_path=index_path,
+                chunksize=chunksize,
+                key_columns=key_columns,
+                normalizer=normalizer,
+            )
+            for (file_path, sheet_name), (rows, lines, error) in zip(
+                scanned, run_file_tasks(find, scanned, workers)
+            ):
+                for line in lines:
+                    log(line)
+                if error is not None:
+                    log(f"Error processing {Path(file_path).name}: {error}")
+                    failures += 1
+                    continue
+                if rows.empty:
+                    continue
+
+                rows.insert(1, "files", shared_counts[rows["group"] - 1])
+                rows.insert(2, "file", Path(file_path).name)
+                rows.insert(3, "sheet", sheet_name or "")
+                rows.to_csv(report_path, mode="a", header=False, index=False)
+                occurrences += len(rows)
+                name = Path(file_path).name
+                if sheet_name is not None:
+                    name = f"{name} [{sheet_name}]"
+                log(f"{name}: {len(rows):,} rows also found in other files")
+        finally:
+            os.remove(index_path)
+
+    log(f"Occurrences listed: {occurrences:,}")
+    log(f"Report saved: {report_path.name}")
+
+    return {
+        "output": report_path.name,
+        "duplicate_count": len(shared_hashes),
+        "occurrences": occurrences,
+        "total_items": len(scanned),
+        "failures": failures,
+    }
+
+
+def build_parser():
+    """Build the command line argument parser."""
+    parser = argparse.ArgumentParser(
+        description="Find rows that appear in more than one file of a corpus."
+    )
+    parser.add_argument("inputs", nargs="+", help="Input files or directories to scan")
+    parser.add_argument(
+        "-o", "--output-dir", required=True, help="Directory for the report"
+    )
+    parser.add_argument(
+        "--keys",
+        help="Comma-separated key columns to compare rows on (default: all)",
+    )
+    parser.add_argument(
+        "--normalize",
+        type=parse_normalizer,
+        help=f"Comma-separated clean-up before comparing rows: {NORMALIZE_HELP}",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=DEFAULT_CHUNKSIZE,
+        help="Rows read per chunk while streaming each file",
+    )
+    parser.add_argument(
+        "--sheets",
+        help="Comma-separated sheets to check in Excel workbooks (default: all)",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="Number of files to hash in parallel (default: CPU count)",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print errors")
+    return parser
+
+
+def main(argv=None):
+    """Command line entry point."""
+    args = build_parser().parse_args(argv)
+    log = null_log if args.quiet else print
+
+    if not Path(args.output_dir).is_dir():
+        print(f"Output directory does not exist: {args.output_dir}", file=sys.stderr)
+        return 2
+
+    try:
+        result = find_corpus_duplicates(
+            find_input_files(args.inputs),
+            args.output_dir,
+            chunksize=args.chunksize,
+            key_columns=parse_key_columns(args.keys),
+            sheets=parse_sheet_names(args.sheets),
+            workers=args.workers,
+            log=log,
+            normalizer=args.normalize,
+        )
+    except Exception as e:
+        print(f"Error during corpus scan: {e}", file=sys.stderr)
+        return 1
+
+    return 1 if result["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2057 @@
+#!/usr/bin/env python3
+"""
+Duplicate Detection Engine
+Headless row, column and column values duplicate detection shared by the GUI tools.
+Runs from the command line for batch jobs on machines without a display.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import mmap
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from duplicates_cache import CACHE_FILENAME, DEFAULT_CACHE_BYTES, FingerprintCache
+from duplicates_io import (
+    CSV_EXTENSIONS,
+    EXCEL_EXTENSIONS,
+    csv_record_ends,
+    excel_sheet_names,
+    find_input_files,
+    iter_file_chunks,
+    output_suffix,
+    read_input_file,
+    write_output_file,
+)
+from duplicates_near import DEFAULT_SIMILARITY, near_duplicate_clusters
+from duplicates_normalize import NORMALIZE_HELP, canonical_text, parse_normalizer
+from duplicates_report import preview_lines, report_path_for, write_duplicate_report
+from duplicates_schema import SCHEMA_FILENAME
+from duplicates_scan import (
+    RecordHasher,
+    iter_record_blocks,
+    suspect_records,
+    write_flagged_records,
+)
+
+DETECTION_MODES = ["row", "column", "column_values", "near_row"]
+KEEP_POLICIES = ["none", "first", "last", "max"]
+FLAG_COLUMNS = ["is_duplicate", "is_duplicate_row"]
+# Flag fields as written by the detector, by pandas and by hand; blanks are unflagged
+FLAG_TEXT = {
+    "true": True,
+    "1": True,
+    "1.0": True,
+    "false": False,
+    "0": False,
+    "0.0": False,
+    "": False,
+}
+STREAMED_EXTENSIONS = CSV_EXTENSIONS + [".xlsx"]
+DEFAULT_CHUNKSIZE = 100_000
+PREVIEW_ROWS = 20
+INCREMENTAL_BLOCK_SIZE = 64 * 1024 * 1024
+# Bumped whenever incremental row keys change; older state files are ignored
+INCREMENTAL_VERSION = 2
+VALUE_FLAG_BLOCK_ROWS = 100_000
+SCAN_PARSE_ROWS = 100_000
+PREFIX_DIGEST_BYTES = 64 * 1024
+
+
+def null_log(message):
+    """Discard a log message."""
+
+
+def hash_series(series):
+    """Return one uint64 hash per value of the series."""
+    return pd.util.hash_pandas_object(series, index=False).to_numpy(dtype=np.uint64)
+
+
+def combine_hashes(column_hashes, length):
+    """Combine per-column hash arrays into one order-sensitive hash per row."""
+    combined = np.full(length, 0x345678, dtype=np.uint64)
+    multiplier = np.uint64(1000003)
+    for i, hashes in enumerate(column_hashes):
+        combined ^= hashes
+        combined *= multiplier
+        multiplier += np.uint64(82520 + 2 * i)
+    return combined + np.uint64(97531)
+
+
+def hash_rows(df, columns=None, normalizer=None):
+    """Return one uint64 hash per row over all or the given columns.
+
+    With a normalizer, each column is normalized just before it is hashed.
+    """
+    if columns is None:
+        column_data = [df.iloc[:, position] for position in range(df.shape[1])]
+    else:
+        column_data = [df[column] for column in columns]
+    if normalizer:
+        column_data = map(normalizer.series, column_data)
+    return combine_hashes([hash_series(series) for series in column_data], len(df))
+
+
+def row_keys(df, columns=None, normalizer=None):
+    """Hash the text fields of one chunk into a uint64 key per row.
+
+    Fields go through canonical_text after the normalizer, if any, so that
+    text read out of core keys like the typed values compared in memory:
+    '5' matches 5.0 and 'NA' an empty field. Columns are taken by position
+    when None.
+    """
+    if columns is None:
+        column_data = [df.iloc[:, position] for position in range(df.shape[1])]
+    else:
+        column_data = [df[column] for column in columns]
+
+    hashes = []
+    for series in column_data:
+        if normalizer:
+            series = normalizer.series(series)
+        hashes.append(hash_series(canonical_text(series)))
+    return combine_hashes(hashes, len(df))
+
+
+def row_groups(df, columns=None, normalizer=None):
+    """Return an int64 label per row, equal exactly for rows with equal values.
+
+    Rows are hashed first, and only rows whose hash repeats are grouped on
+    their actual values, so a hash collision never joins two different rows
+    and values that merely hash alike, such as 1 and '1' in one column, stay
+    apart as they do with DataFrame.duplicated.
+    """
+    hashes = hash_rows(df, columns, normalizer)
+    uniques, labels, counts = np.unique(hashes, return_inverse=True, return_counts=True)
+    candidates = np.flatnonzero(counts[labels] > 1)
+    if len(candidates) == 0 or df.shape[1] == 0:
+        return labels.astype(np.int64)
+
+    if columns is None:
+        column_data = [df.iloc[candidates, position] for position in range(df.shape[1])]
+    else:
+        column_data = [df[column].iloc[candidates] for column in columns]
+    if normalizer:
+        column_data = map(normalizer.series, column_data)
+    values = pd.DataFrame(
+        {position: series.to_numpy() for position, series in enumerate(column_data)}
+    )
+    groups = values.groupby(list(values.columns), sort=False, dropna=False).ngroup()
+
+    labels = labels.astype(np.int64)
+    labels[candidates] = len(uniques) + groups.to_numpy()
+    return labels
+
+
+def parse_sheet_names(text):
+    """Split a comma-separated list of sheet names; None when empty."""
+    if not text:
+        return None
+    return [name.strip() for name in text.split(",") if name.strip()]
+
+
+def select_sheets(file_path, sheets=None):
+    """Return the sheets of a file to process: the given ones, or all.
+
+    Files other than Excel workbooks give [None]; so does a workbook with a
+    single sheet when none are given, so its outputs keep their plain names.
+    """
+    if Path(file_path).suffix.lower() not in EXCEL_EXTENSIONS:
+        return [None]
+
+    names = excel_sheet_names(file_path)
+    if sheets:
+        missing = [sheet for sheet in sheets if sheet not in names]
+        if missing:
+            raise ValueError(
+                f"Sheets not found in {Path(file_path).name}: {', '.join(missing)}"
+            )
+        return list(sheets)
+    return names if len(names) > 1 else [None]
+
+
+def sheet_label(file_path, sheet_name=None):
+    """Return the path whose name labels the outputs of one sheet."""
+    file_path = Path(file_path)
+    if sheet_name is None or file_path.suffix.lower() not in EXCEL_EXTENSIONS:
+        return file_path
+    return file_path.with_name(f"{file_path.stem}_{sheet_name}{file_path.suffix}")
+
+
+def combine_sheet_results(file_path, mode, sheet_names, results):
+    """Merge the results of the sheets of one workbook into one result."""
+    return {
+        "output": results[0]["output"],
+        "duplicate_count": sum(result["duplicate_count"] for result in results),
+        "total_items": sum(result["total_items"] for result in results),
+        "file": str(file_path),
+        "mode": mode,
+        "sheets": [
+            dict(result, sheet=sheet_name)
+            for sheet_name, result in zip(sheet_names, results)
+        ],
+    }
+
+
+def parse_key_columns(text):
+    """Split a comma-separated list of key columns; None when it is empty."""
+    columns = [column.strip() for column in (text or "").split(",")]
+    return [column for column in columns if column] or None
+
+
+def check_key_columns(
+    columns, file_path, key_columns=None, keep="none", max_column=None
+):
+    """Raise ValueError when a key column or the max column is missing."""
+    if keep not in KEEP_POLICIES:
+        raise ValueError(f"Unknown keep policy: {keep}")
+
+    required = list(key_columns or [])
+    if keep == "max":
+        if not max_column:
+            raise ValueError("The 'max' keep policy needs a column to compare")
+        required.append(max_column)
+
+    missing = [column for column in required if column not in columns]
+    if missing:
+        raise ValueError(
+            f"Columns not found in {Path(file_path).name}: {', '.join(missing)}"
+        )
+
+
+def describe_keep_policy(key_columns=None, keep="none", max_column=None):
+    """Return a short description of the key columns and keep policy."""
+    keys = ", ".join(key_columns) if key_columns else "all columns"
+    if keep == "none":
+        policy = "flag every copy"
+    elif keep == "max":
+        policy = f"keep the row with the highest {max_column}"
+    else:
+        policy = f"keep the {keep} copy"
+    return f"Keys: {keys}; {policy}"
+
+
+def ranking_values(series):
+    """Return the values rows are compared by under the 'max' keep policy.
+
+    Numbers compare as numbers; a column without any numbers compares as
+    dates. Missing or unparseable values rank lowest.
+    """
+    values = pd.to_numeric(series, errors="coerce")
+    if values.isna().all():
+        dates = pd.to_datetime(series, errors="coerce", format="mixed", utc=True)
+        values = (dates - pd.Timestamp(0, tz="UTC")).dt.total_seconds()
+    return values.to_numpy(dtype=float, na_value=-np.inf)
+
+
+def flag_row_duplicates(hashes, keep="none", values=None):
+    """Flag duplicate rows from their keys under a keep policy.
+
+    'none' flags every copy of a repeated key, 'first' and 'last' flag all
+    but the first or last copy, and 'max' all but the copy with the highest
+    value (the earliest one on ties).
+    """
+    if keep != "max":
+        return (
+            pd.Series(hashes)
+            .duplicated(keep=False if keep == "none" else keep)
+            .to_numpy()
+        )
+
+    flags = np.ones(len(hashes), dtype=bool)
+    if len(hashes) == 0:
+        return flags
+
+    # Sorting by key, then highest value, then position puts each key's
+    # kept row first in its run
+    order = np.lexsort((np.arange(len(hashes)), -values, hashes))
+    sorted_hashes = hashes[order]
+    kept = np.concatenate([[True], sorted_hashes[1:] != sorted_hashes[:-1]])
+    flags[order[kept]] = False
+    return flags
+
+
+def find_hashes(sorted_hashes, hashes):
+    """Return the position of each hash in a sorted array and whether it is there."""
+    if len(sorted_hashes) == 0:
+        return np.zeros(len(hashes), dtype=np.int64), np.zeros(len(hashes), dtype=bool)
+
+    positions = np.minimum(
+        np.searchsorted(sorted_hashes, hashes), len(sorted_hashes) - 1
+    )
+    return positions, sorted_hashes[positions] == hashes
+
+
+class RowHashCounter:
+    """Count row hashes in compact sorted arrays instead of keeping the rows.
+
+    Hashes are buffered per chunk and folded into the sorted unique/count
+    arrays once the buffer grows past the size of the table, so memory stays
+    proportional to the number of distinct rows.
+    """
+
+    def __init__(self, min_fold_size=1_000_000):
+        self.min_fold_size = min_fold_size
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.pending = []
+        self.pending_size = 0
+
+    def add(self, hashes):
+        """Add a chunk of row hashes."""
+        self.pending.append(np.asarray(hashes, dtype=np.uint64))
+        self.pending_size += len(hashes)
+        if self.pending_size >= max(self.min_fold_size, len(self.hashes)):
+            self.fold()
+
+    def fold(self):
+        """Merge the buffered hashes into the sorted count table."""
+        if not self.pending:
+            return
+
+        chunk_hashes, chunk_counts = np.unique(
+            np.concatenate(self.pending), return_counts=True
+        )
+        merged, inverse = np.unique(
+            np.concatenate([self.hashes, chunk_hashes]), return_inverse=True
+        )
+        self.counts = np.bincount(
+            inverse,
+            weights=np.concatenate([self.counts, chunk_counts]),
+            minlength=len(merged),
+        ).astype(np.int64)
+        self.hashes = merged
+        self.pending = []
+        self.pending_size = 0
+
+    def contains(self, hashes):
+        """Return whether each hash has been added before."""
+        _, found = find_hashes(self.hashes, hashes)
+        for pending in self.pending:
+            found |= np.isin(hashes, pending)
+        return found
+
+    def duplicate_counts(self):
+        """Return the sorted hashes seen more than once and their counts."""
+        self.fold()
+        repeated = self.counts > 1
+        return self.hashes[repeated], self.counts[repeated]
+
+
+def numeric_column(series):
+    """Return a numeric or boolean column as float64, other columns unchanged."""
+    if pd.api.types.is_numeric_dtype(series) and series.dtype != np.float64:
+        return series.astype("float64")
+    return series
+
+
+def columns_equal(series1, series2):
+    """Return whether two columns hold equal values, numbers compared by value."""
+    if series1.dtype == series2.dtype:
+        return series1.equals(series2)
+    return numeric_column(series1).equals(numeric_column(series2))
+
+
+def column_fingerprint(series):
+    """Return a 64-bit fingerprint of a column's values in row order.
+
+    Numbers are fingerprinted by value, so an int column and its float copy
+    share a fingerprint.
+    """
+    hashes = hash_series(numeric_column(series))
+    digest = hashlib.blake2b(hashes.tobytes(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def detect_duplicate_columns(df):
+    """Detect groups of columns that hold identical data.
+
+    Each column is reduced to one fingerprint and columns are bucketed by
+    it; only columns sharing a bucket are compared exactly, to rule out
+    hash collisions. Numeric and boolean columns are compared by value, so
+    1,2,3 and 1.0,2.0,3.0 are duplicates, as are True/False and 1/0.
+
+    Returns the duplicate column names in column order and a dict of
+    duplicate groups.
+    """
+    buckets = {}
+    for position in range(len(df.columns)):
+        fingerprint = column_fingerprint(df.iloc[:, position])
+        buckets.setdefault(fingerprint, []).append(position)
+
+    groups = []
+    for positions in buckets.values():
+        if len(positions) < 2:
+            continue
+
+        # Split the bucket into runs of exactly equal columns
+        verified = []
+        for position in positions:
+            col_data = df.iloc[:, position]
+            for group in verified:
+                if columns_equal(df.iloc[:, group[0]], col_data):
+                    group.append(position)
+                    break
+            else:
+                verified.append([position])
+
+        groups.extend(group for group in verified if len(group) > 1)
+
+    groups.sort(key=lambda group: group[0])
+    duplicate_groups = {
+        f"Group {i + 1}": [df.columns[position] for position in group]
+        for i, group in enumerate(groups)
+    }
+    duplicate_positions = sorted(position for group in groups for position in group)
+    duplicate_column_names = [df.columns[position] for position in duplicate_positions]
+
+    return duplicate_column_names, duplicate_groups
+
+
+def summarize_column_duplicates(series, max_positions=5, max_values=PREVIEW_ROWS):
+    """Find the duplicate values of one column from its factorized codes.
+
+    The column is factorized once into integer codes; the duplicate mask is
+    a lookup of the per-code counts. Returns the mask, the number of
+    distinct duplicated values and, for the first max_values of them in
+    order of first appearance, a tuple of (value, first row positions,
+    occurrences). Returns None when the column has no duplicates.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    counts = np.bincount(codes, minlength=len(uniques))
+    repeated = counts > 1
+    if not repeated.any():
+        return None
+    duplicates_mask = repeated[codes]
+
+    # Only the rows of the listed values are grouped, by code in row order
+    duplicate_codes = np.flatnonzero(repeated)
+    listed_codes = duplicate_codes[:max_values]
+    listed = np.zeros(len(uniques), dtype=bool)
+    listed[listed_codes] = True
+    listed_rows = np.flatnonzero(listed[codes])
+    grouped_rows = listed_rows[np.argsort(codes[listed_rows], kind="stable")]
+
+    listed_counts = counts[listed_codes]
+    starts = np.cumsum(listed_counts) - listed_counts
+    listed_values = uniques.take(listed_codes).tolist()
+
+    value_positions = [
+        (value, grouped_rows[start : start + min(n, max_positions)].tolist(), int(n))
+        for value, start, n in zip(listed_values, starts, listed_counts)
+    ]
+    return duplicates_mask, len(duplicate_codes), value_positions
+
+
+def detect_duplicate_values_in_columns(df):
+    """Detect duplicate values within each column.
+
+    Returns the columns holding duplicates, their duplicate masks packed
+    into one bit array with a row of bits per column, and per-column
+    details.
+    """
+    duplicate_columns = []
+    packed_masks = []
+    duplicate_info = {}
+
+    for position, column in enumerate(df.columns):
+        summary = summarize_column_duplicates(df.iloc[:, position])
+
+        if summary is not None:
+            duplicates_mask, value_count, value_positions = summary
+            duplicate_columns.append(column)
+            packed_masks.append(np.packbits(duplicates_mask))
+            duplicate_info[column] = {
+                "count": int(duplicates_mask.sum()),
+                "value_count": value_count,
+                "value_positions": value_positions,
+            }
+
+    packed = (
+        np.stack(packed_masks)
+        if packed_masks
+        else np.empty((0, (len(df) + 7) // 8), dtype=np.uint8)
+    )
+    return duplicate_columns, packed, duplicate_info
+
+
+def unpack_masks(packed, start, stop):
+    """Return the (rows, columns) boolean masks of rows start:stop.
+
+    Start must be a multiple of 8, the number of rows per byte.
+    """
+    bits = np.unpackbits(
+        packed[:, start // 8 : (stop + 7) // 8], axis=1, count=stop - start
+    )
+    return bits.T.astype(bool)
+
+
+def write_value_flags(df, flag_names, packed, output_path):
+    """Write a dataframe with one duplicate flag column per packed mask.
+
+    CSV output is written in blocks of rows so that only one block's flags
+    are ever unpacked.
+    """
+    if Path(output_path).suffix.lower() not in CSV_EXTENSIONS:
+        flags = pd.DataFrame(
+            unpack_masks(packed, 0, len(df)), columns=flag_names, index=df.index
+        )
+        write_output_file(pd.concat([df, flags], axis=1), output_path)
+        return
+
+    for start in range(0, max(len(df), 1), VALUE_FLAG_BLOCK_ROWS):
+        stop = min(start + VALUE_FLAG_BLOCK_ROWS, len(df))
+        block = df.iloc[start:stop]
+        flags = pd.DataFrame(
+            unpack_masks(packed, start, stop), columns=flag_names, index=block.index
+        )
+        pd.concat([block, flags], axis=1).to_csv(
+            output_path, mode="w" if start == 0 else "a", header=start == 0, index=False
+        )
+
+
+def log_duplicate_rows(log, file_path, preview, duplicate_count, report_path):
+    """Log the preview of duplicate rows and where the full listing went."""
+    if duplicate_count == 0:
+        log(f"No duplicate rows found in {file_path.name}")
+        return
+
+    log(f"Duplicate rows in {file_path.name}:")
+    for line in preview:
+        log(line)
+    if duplicate_count > len(preview):
+        log(f"  ... and {duplicate_count - len(preview)} more rows")
+    log(f"Full listing saved: {Path(report_path).name}")
+
+
+def detect_row_duplicates_in_file(
+    df,
+    file_path,
+    output_directory,
+    log,
+    key_columns=None,
+    keep="none",
+    max_column=None,
+    normalizer=None,
+):
+    """Mark duplicate rows and save the annotated file.
+
+    Rows are compared on the key columns, or on all columns when none are
+    given, after the normalizer's clean-up if there is one. The keep policy
+    decides which copy of a key stays unflagged.
+    """
+    check_key_columns(df.columns, file_path, key_columns, keep, max_column)
+    values = ranking_values(df[max_column]) if keep == "max" else None
+    duplicates = flag_row_duplicates(
+        row_groups(df, key_columns, normalizer), keep, values
+    )
+    duplicate_count = int(duplicates.sum())
+    total_items = len(df)
+
+    if key_columns or keep != "none":
+        log(describe_keep_policy(key_columns, keep, max_column))
+    if normalizer:
+        log(f"Values normalized: {normalizer}")
+    log(f"Found {duplicate_count} duplicate rows out of {total_items} total rows")
+
+    # Add a column to mark duplicates
+    df["is_duplicate_row"] = duplicates
+
+    output_filename = (
+        f"{file_path.stem}_row_duplicates_detected{output_suffix(file_path)}"
+    )
+    output_path = Path(output_directory) / output_filename
+    write_output_file(df, output_path)
+    log(f"Saved: {output_filename}")
+
+    # List every duplicate row in the report, and a sample of them in the log
+    duplicate_rows = df[duplicates].drop("is_duplicate_row", axis=1)
+    row_numbers = np.flatnonzero(duplicates) + 1
+    report_path = report_path_for(output_path)
+    write_duplicate_report(duplicate_rows, row_numbers, report_path)
+
+    preview = preview_lines(
+        duplicate_rows.head(PREVIEW_ROWS), row_numbers[:PREVIEW_ROWS]
+    )
+    log_duplicate_rows(log, file_path, preview, duplicate_count, report_path)
+
+    return {
+        "output": output_filename,
+        "report": report_path.name,
+        "duplicate_count": duplicate_count,
+        "total_items": total_items,
+    }
+
+
+def detect_column_duplicates_in_file(df, file_path, output_directory, log):
+    """Mark identical columns and save the annotated file."""
+    duplicate_column_names, duplicate_groups = detect_duplicate_columns(df)
+    duplicate_count = len(duplicate_column_names)
+    total_items = len(df.columns)
+
+    log(f"Found {duplicate_count} duplicate columns out of {total_items} total columns")
+
+    # Add a row at the top to indicate which columns are duplicates
+    duplicate_set = set(duplicate_column_names)
+    duplicate_indicator = [
+        "DUPLICATE_COLUMN" if col in duplicate_set else "UNIQUE_COLUMN"
+        for col in df.columns
+    ]
+    new_row = pd.DataFrame([duplicate_indicator], columns=df.columns)
+    result_df = pd.concat([new_row, df], ignore_index=True)
+
+    # The indicator row mixes text into every column, so this output stays CSV
+    output_filename = f"{file_path.stem}_column_duplicates_detected.csv"
+    result_df.to_csv(Path(output_directory) / output_filename, index=False)
+    log(f"Saved: {output_filename}")
+
+    # Log duplicate information
+    if duplicate_count > 0:
+        log(f"Duplicate columns in {file_path.name}:")
+        for col_name in duplicate_column_names:
+            log(f"  Column: {col_name}")
+
+        if duplicate_groups:
+            log("Duplicate column groups:")
+            for group_name, cols in duplicate_groups.items():
+                log(f"  {group_name}: {', '.join(cols)}")
+    else:
+        log(f"No duplicate columns found in {file_path.name}")
+
+    return {
+        "output": output_filename,
+        "duplicate_count": duplicate_count,
+        "total_items": total_items,
+    }
+
+
+def detect_column_value_duplicates_in_file(df, file_path, output_directory, log):
+    """Mark duplicate values within each column and save the annotated file."""
+    duplicate_columns, packed, duplicate_info = detect_duplicate_values_in_columns(df)
+    output_filename = (
+        f"{file_path.stem}_column_values_duplicates_detected{output_suffix(file_path)}"
+    )
+    output_path = Path(output_directory) / output_filename
+
+    if not duplicate_columns:
+        log(f"No duplicate values found within any columns in {file_path.name}")
+
+        # Still create output file but without duplicate markers
+        write_output_file(df, output_path)
+        log(f"Saved: {output_filename}")
+        return {
+            "output": output_filename,
+            "duplicate_count": 0,
+            "total_items": len(df.columns),
+        }
+
+    total_duplicate_values = int(sum(info["count"] for info in duplicate_info.values()))
+    log(
+        f"Found duplicate values in {len(duplicate_columns)} columns with "
+        f"{total_duplicate_values} total duplicate entries"
+    )
+
+    # Add a duplicate marking for each column with duplicates
+    flag_names = [f"{column}_is_duplicate" for column in duplicate_columns]
+    write_value_flags(df, flag_names, packed, output_path)
+    log(f"Saved: {output_filename}")
+
+    # Log detailed duplicate information
+    log(f"Duplicate values details for {file_path.name}:")
+    for column, info in duplicate_info.items():
+        log(f"  Column '{column}': {info['count']} duplicate entries")
+        listed_values = [value for value, _, _ in info["value_positions"]]
+        log(
+            f"    Duplicate values: {listed_values}"
+            + (
+                f" (and {info['value_count'] - len(listed_values)} more values)"
+                if info["value_count"] > len(listed_values)
+                else ""
+            )
+        )
+
+        # Show sample positions for each duplicate value
+        for dup_val, positions, occurrences in info["value_positions"]:
+            log(
+                f"    Value '{dup_val}' appears at rows: {[pos + 1 for pos in positions]}"
+                + (f" (and {occurrences - 5} more)" if occurrences > 5 else "")
+            )
+
+    return {
+        "output": output_filename,
+        "duplicate_count": total_duplicate_values,
+        "total_items": len(df.columns),
+    }
+
+
+def detect_near_duplicate_rows_in_file(
+    df, file_path, output_directory, log, similarity=DEFAULT_SIMILARITY
+):
+    """Cluster rows with similar text and save the annotated file.
+
+    Similarity is the estimated Jaccard similarity of the rows' character
+    shingles, after casefolding and collapsing whitespace.
+    """
+    cluster_ids, cluster_count = near_duplicate_clusters(df, similarity)
+    near = cluster_ids > 0
+    duplicate_count = int(near.sum())
+    total_items = len(df)
+
+    log(
+        f"Found {duplicate_count} near-duplicate rows in {cluster_count} clusters "
+        f"out of {total_items} total rows (similarity >= {similarity:g})"
+    )
+
+    # Add the cluster of every row, empty for rows without a near duplicate
+    columns = list(df.columns)
+    df["near_duplicate_cluster"] = pd.Series(
+        cluster_ids, index=df.index, dtype="Int64"
+    ).mask(~near)
+    df["is_near_duplicate"] = near
+
+    output_filename = (
+        f"{file_path.stem}_near_row_duplicates_detected{output_suffix(file_path)}"
+    )
+    output_path = Path(output_directory) / output_filename
+    write_output_file(df, output_path)
+    log(f"Saved: {output_filename}")
+
+    # List the near duplicates cluster by cluster
+    rows = np.flatnonzero(near)
+    rows = rows[np.argsort(cluster_ids[rows], kind="stable")]
+    listing = df.iloc[rows][["near_duplicate_cluster"] + columns]
+    report_path = report_path_for(output_path)
+    write_duplicate_report(listing, rows + 1, report_path)
+
+    preview = preview_lines(listing.head(PREVIEW_ROWS), rows[:PREVIEW_ROWS] + 1)
+    log_duplicate_rows(log, file_path, preview, duplicate_count, report_path)
+
+    return {
+        "output": output_filename,
+        "report": report_path.name,
+        "duplicate_count": duplicate_count,
+        "total_items": total_items,
+    }
+
+
+def best_rows_by_value(
+    file_path,
+    chunksize,
+    duplicate_hashes,
+    key_columns,
+    max_column,
+    sheet_name=None,
+    normalizer=None,
+):
+    """Find the row with the highest max_column value for each repeated key.
+
+    Returns the global row number kept for every hash in duplicate_hashes;
+    the earliest row wins ties.
+    """
+    best_values = np.full(len(duplicate_hashes), -np.inf)
+    best_rows = np.full(len(duplicate_hashes), -1, dtype=np.int64)
+
+    row_offset = 0
+    for chunk in iter_file_chunks(file_path, chunksize, sheet_name=sheet_name):
+        positions, found = find_hashes(
+            duplicate_hashes, row_keys(chunk, key_columns, normalizer)
+        )
+        keys = positions[found]
+        values = ranking_values(chunk[max_column])[found]
+        rows = row_offset + np.flatnonzero(found)
+        row_offset += len(chunk)
+
+        # The chunk's best row per key, then merged into the running best
+        order = np.lexsort((rows, -values, keys))
+        keys, values, rows = keys[order], values[order], rows[order]
+        first = np.concatenate([[True], keys[1:] != keys[:-1]])[: len(keys)]
+        keys, values, rows = keys[first], values[first], rows[first]
+
+        better = (values > best_values[keys]) | (best_rows[keys] < 0)
+        best_values[keys[better]] = values[better]
+        best_rows[keys[better]] = rows[better]
+
+    return best_rows
+
+
+def iter_flagged_chunks(
+    file_path,
+    chunksize,
+    key_columns=None,
+    keep="none",
+    max_column=None,
+    sheet_name=None,
+    normalizer=None,
+):
+    """Yield (chunk, duplicate flags) for the chunks of a CSV file or sheet.
+
+    With the 'first' policy a row is flagged as soon as its key has been
+    seen, so the file is read once. Other policies need the key counts of a
+    whole first pass before flagging, and 'max' one more pass to find the
+    kept row of every repeated key.
+    """
+    chunks = partial(iter_file_chunks, file_path, chunksize, sheet_name=sheet_name)
+    if keep == "first":
+        seen = RowHashCounter()
+        for chunk_index, chunk in enumerate(chunks()):
+            if chunk_index == 0:
+                check_key_columns(chunk.columns, file_path, key_columns, keep)
+            hashes = row_keys(chunk, key_columns, normalizer)
+            repeated = seen.contains(hashes)
+            duplicates = pd.Series(hashes).duplicated().to_numpy() | repeated
+            seen.add(hashes[~duplicates])
+            yield chunk, duplicates
+        return
+
+    counter = RowHashCounter()
+    for chunk_index, chunk in enumerate(chunks()):
+        if chunk_index == 0:
+            check_key_columns(chunk.columns, file_path, key_columns, keep, max_column)
+        counter.add(row_keys(chunk, key_columns, normalizer))
+    duplicate_hashes, duplicate_counts = counter.duplicate_counts()
+
+    if keep == "max":
+        best_rows = best_rows_by_value(
+            file_path,
+            chunksize,
+            duplicate_hashes,
+            key_columns,
+            max_column,
+            sheet_name,
+            normalizer,
+        )
+    seen = np.zeros(len(duplicate_hashes), dtype=np.int64)
+
+    row_offset = 0
+    for chunk in chunks():
+        positions, duplicates = find_hashes(
+            duplicate_hashes, row_keys(chunk, key_columns, normalizer)
+        )
+        if keep == "max":
+            rows = row_offset + np.arange(len(chunk))
+            duplicates &= best_rows[positions] != rows
+        elif keep == "last":
+            # Number every copy of a key across chunks to find the last one
+            keys = positions[duplicates]
+            occurrence = (
+                seen[keys] + pd.Series(keys).groupby(keys).cumcount().to_numpy()
+            )
+            seen += np.bincount(keys, minlength=len(seen))
+            duplicates[duplicates] = occurrence < duplicate_counts[keys] - 1
+
+        row_offset += len(chunk)
+        yield chunk, duplicates
+
+
+def detect_row_duplicates_streaming(
+    file_path,
+    output_directory,
+    chunksize=DEFAULT_CHUNKSIZE,
+    log=null_log,
+    key_columns=None,
+    keep="none",
+    max_column=None,
+    sheet_name=None,
+    normalizer=None,
+):
+    """Mark duplicate rows of a CSV file or .xlsx sheet without loading it whole.
+
+    Rows are flagged from their keys chunk by chunk (see iter_flagged_chunks)
+    and each annotated chunk is appended to the CSV output file. Fields are
+    keyed by row_keys, numbers by value, so the flags match those of a file
+    read whole.
+    """
+    file_path = Path(file_path)
+    label = sheet_label(file_path, sheet_name)
+
+    output_filename = f"{label.stem}_row_duplicates_detected.csv"
+    output_path = Path(output_directory) / output_filename
+    report_path = report_path_for(output_path)
+
+    duplicate_count = 0
+    total_items = 0
+    preview = []
+    flagged_chunks = iter_flagged_chunks(
+        file_path, chunksize, key_columns, keep, max_column, sheet_name, normalizer
+    )
+    for chunk_index, (chunk, duplicates) in enumerate(flagged_chunks):
+        duplicate_rows = chunk[duplicates]
+        row_numbers = total_items + np.flatnonzero(duplicates) + 1
+        write_duplicate_report(
+            duplicate_rows, row_numbers, report_path, append=chunk_index > 0
+        )
+        if len(preview) < PREVIEW_ROWS:
+            remaining = PREVIEW_ROWS - len(preview)
+            preview += preview_lines(
+                duplicate_rows.head(remaining), row_numbers[:remaining]
+            )
+
+        chunk["is_duplicate_row"] = duplicates
+        chunk.to_csv(
+            output_path,
+            mode="w" if chunk_index == 0 else "a",
+            header=chunk_index == 0,
+            index=False,
+        )
+        duplicate_count += int(duplicates.sum())
+        total_items += len(chunk)
+
+    if key_columns or keep != "none":
+        log(describe_keep_policy(key_columns, keep, max_column))
+    if normalizer:
+        log(f"Values normalized: {normalizer}")
+    log(f"Found {duplicate_count} duplicate rows out of {total_items} total rows")
+    log(f"Saved: {output_filename}")
+    log_duplicate_rows(log, label, preview, duplicate_count, report_path)
+
+    return {
+        "output": output_filename,
+        "report": report_path.name,
+        "duplicate_count": duplicate_count,
+        "total_items": total_items,
+    }
+
+
+def parse_records(data, starts, stops, columns):
+    """Parse selected raw CSV records into a frame of text fields."""
+    if len(starts) == 0:
+        return pd.DataFrame(columns=columns, dtype=str)
+
+    text = b"\n".join(data[start:stop].tobytes() for start, stop in zip(starts, stops))
+    return pd.read_csv(
+        io.BytesIO(text),
+        header=None,
+        names=columns,
+        dtype=str,
+        keep_default_na=False,
+        skip_blank_lines=False,
+    )
+
+
+def canonical_fields(parsed, positions=None):
+    """Return the text fields of parsed records through canonical_text.
+
+    With positions, only the columns at those positions are rewritten.
+    """
+    return pd.DataFrame(
+        {
+            position: (
+                canonical_text(parsed.iloc[:, position])
+                if positions is None or position in positions
+                else parsed.iloc[:, position].astype(object)
+            )
+            for position in range(parsed.shape[1])
+        }
+    )
+
+
+def canonical_record_hashes(hasher, parsed, positions):
+    """Hash parsed records from their canonical fields, as raw records are hashed.
+
+    Only the columns at positions are rewritten. The fields are joined by
+    commas, so a record whose fields are already canonical gets the hash of
+    its raw bytes.
+    """
+    fields = canonical_fields(parsed, positions)
+    lines = fields[0].str.cat(
+        [fields[position] for position in fields.columns[1:]], ","
+    )
+    encoded = [line.encode("utf-8") for line in lines]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    stops = np.cumsum(lengths)
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return hasher.hash_records(data, stops - lengths, stops)
+
+
+def detect_row_duplicates_scan(file_path, output_directory, log=null_log):
+    """Mark duplicate rows of a CSV file by hashing raw records.
+
+    The file is memory-mapped and split into records on unquoted newlines;
+    each record's bytes are hashed without parsing its fields. Only records
+    whose hash repeats are parsed, to confirm they hold equal fields and to
+    report them. The output copies every record and appends its flag.
+
+    Fields are compared like row_keys does, numbers by value: records with a
+    field canonical_text may rewrite (see suspect_records) are parsed and
+    hashed from their canonical fields instead of their raw bytes.
+    """
+    file_path = Path(file_path)
+    if file_path.stat().st_size == 0:
+        raise ValueError(f"No columns to parse from {file_path.name}")
+
+    output_filename = f"{file_path.stem}_row_duplicates_detected.csv"
+    output_path = Path(output_directory) / output_filename
+
+    with open(file_path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        data = np.frombuffer(mm, dtype=np.uint8)
+
+        hasher = RecordHasher()
+        starts, stops, hashes, suspects = [], [], [], []
+        suspect_positions = set()
+        for block_starts, block_stops in iter_record_blocks(data):
+            starts.append(block_starts)
+            stops.append(block_stops)
+            hashes.append(hasher.hash_records(data, block_starts, block_stops))
+            flags, positions = suspect_records(data, block_starts, block_stops)
+            suspects.append(flags)
+            suspect_positions |= positions
+        starts = np.concatenate(starts)
+        stops = np.concatenate(stops)
+        hashes = np.concatenate(hashes)
+        suspects = np.concatenate(suspects)
+
+        header = data[starts[0] : stops[0]].tobytes()
+        columns = list(pd.read_csv(io.BytesIO(header), nrows=0).columns)
+
+        # Blank lines are not rows
+        rows = np.flatnonzero(stops[1:] > starts[1:]) + 1
+        starts, stops, hashes = starts[rows], stops[rows], hashes[rows]
+        total_items = len(rows)
+
+        suspect_rows = np.flatnonzero(suspects[rows])
+        for start in range(0, len(suspect_rows), SCAN_PARSE_ROWS):
+            batch = suspect_rows[start : start + SCAN_PARSE_ROWS]
+            parsed = parse_records(data, starts[batch], stops[batch], columns)
+            hashes[batch] = canonical_record_hashes(hasher, parsed, suspect_positions)
+
+        _, inverse, counts = np.unique(hashes, return_inverse=True, return_counts=True)
+        candidates = np.flatnonzero(counts[inverse] > 1)
+
+        # Confirm candidates on their canonical fields to rule out hash collisions
+        parsed = parse_records(data, starts[candidates], stops[candidates], columns)
+        confirmed = canonical_fields(parsed).duplicated(keep=False).to_numpy()
+        duplicates = np.zeros(total_items, dtype=bool)
+        duplicates[candidates[confirmed]] = True
+        duplicate_count = int(duplicates.sum())
+
+        duplicate_rows = parsed[confirmed]
+        row_numbers = candidates[confirmed] + 1
+        report_path = report_path_for(output_path)
+        write_duplicate_report(duplicate_rows, row_numbers, report_path)
+
+        with open(output_path, "wb") as output:
+            output.write(header + b",is_duplicate_row\n")
+            write_flagged_records(output, data, starts, stops, duplicates)
+
+        del data
+
+    log(f"Found {duplicate_count} duplicate rows out of {total_items} total rows")
+    log(f"Saved: {output_filename}")
+    preview = preview_lines(
+        duplicate_rows.head(PREVIEW_ROWS), row_numbers[:PREVIEW_ROWS]
+    )
+    log_duplicate_rows(log, file_path, preview, duplicate_count, report_path)
+
+    return {
+        "output": output_filename,
+        "report": report_path.name,
+        "duplicate_count": duplicate_count,
+        "total_items": total_items,
+    }
+
+
+def prefix_digest(file_path, length):
+    """Return the digest of the first bytes of a file."""
+    with open(file_path, "rb") as f:
+        return hashlib.blake2b(f.read(length), digest_size=16).hexdigest()
+
+
+def load_incremental_state(state_path, file_path, output_path):
+    """Load the state of a previous incremental run if it can be extended.
+
+    The state is only usable while it was written by the current version,
+    the input has not shrunk or been rewritten and the output is exactly as
+    the previous run left it.
+    """
+    if not state_path.exists() or not output_path.exists():
+        return None
+
+    with np.load(state_path) as data:
+        meta = json.loads(str(data["meta"]))
+        state = {
+            "meta": meta,
+            "hashes": data["hashes"],
+            "counts": data["counts"],
+            "flag_offsets": data["flag_offsets"],
+        }
+
+    if meta.get("version") != INCREMENTAL_VERSION:
+        return None
+    if file_path.stat().st_size < meta["input_offset"]:
+        return None
+    if output_path.stat().st_size != meta["output_size"]:
+        return None
+    if prefix_digest(file_path, meta["prefix_length"]) != meta["prefix_digest"]:
+        return None
+    return state
+
+
+def save_incremental_state(state_path, meta, hashes, counts, flag_offsets):
+    """Atomically write the state of an incremental run."""
+    temp_path = state_path.with_name(state_path.name + ".tmp.npz")
+    np.savez(
+        temp_path,
+        meta=np.array(json.dumps(meta)),
+        hashes=hashes,
+        counts=counts,
+        flag_offsets=flag_offsets,
+    )
+    os.replace(temp_path, state_path)
+
+
+def detect_row_duplicates_incremental(file_path, output_directory, log=null_log):
+    """Mark duplicate rows of an append-only CSV file, parsing only new data.
+
+    The previous run's input byte offset and distinct row-hash table are kept
+    in a state file next to the output. Only the bytes appended since then are
+    parsed; their rows are appended to the output, and earlier rows that just
+    gained a duplicate have their flag rewritten in place. Flags are written
+    as 1/0 so that rewriting one never changes the file length. Rows are
+    keyed by row_keys, numbers by value, like a full run.
+    """
+    file_path = Path(file_path)
+    output_filename = f"{file_path.stem}_row_duplicates_detected.csv"
+    output_path = Path(output_directory) / output_filename
+    state_path = output_path.with_name(f"{output_path.stem}.state.npz")
+
+    state = load_incremental_state(state_path, file_path, output_path)
+    if state is None:
+        log("No usable state from a previous run, processing the whole file")
+        meta = {
+            "version": INCREMENTAL_VERSION,
+            "input_offset": 0,
+            "output_size": 0,
+            "columns": None,
+            "total_rows": 0,
+            "prefix_length": 0,
+            "prefix_digest": "",
+        }
+        hashes = np.empty(0, dtype=np.uint64)
+        counts = np.empty(0, dtype=np.int64)
+        flag_offsets = np.empty(0, dtype=np.int64)
+    else:
+        meta = state["meta"]
+        hashes = state["hashes"]
+        counts = state["counts"]
+        flag_offsets = state["flag_offsets"]
+        log(f"Resuming after {meta['total_rows']} rows already processed")
+
+    start_rows = meta["total_rows"]
+    flipped = 0
+    preview = []
+    carry = b""
+
+    with open(file_path, "rb") as source, open(
+        output_path, "r+b" if state is not None else "wb"
+    ) as output:
+        source.seek(meta["input_offset"])
+        output_position = meta["output_size"]
+
+        while True:
+            block = source.read(INCREMENTAL_BLOCK_SIZE)
+            if not block:
+                break
+
+            buffer = carry + block
+            ends = csv_record_ends(buffer)
+            if len(ends) == 0:
+                carry = buffer
+                continue
+            complete, carry = buffer[: ends[-1] + 1], buffer[ends[-1] + 1 :]
+            meta["input_offset"] += len(complete)
+
+            if meta["columns"] is None:
+                header_end = int(ends[0]) + 1
+                meta["columns"] = list(
+                    pd.read_csv(io.BytesIO(complete[:header_end]), nrows=0).columns
+                )
+                header = pd.DataFrame(
+                    columns=meta["columns"] + ["is_duplicate_row"]
+                ).to_csv(index=False, lineterminator="\n")
+                output.write(header.encode("utf-8"))
+                output_position += len(header.encode("utf-8"))
+                complete = complete[header_end:]
+                if not complete:
+                    continue
+
+            chunk = pd.read_csv(
+                io.BytesIO(complete),
+                header=None,
+                names=meta["columns"],
+                dtype=str,
+                keep_default_na=False,
+            )
+            chunk_hashes = row_keys(chunk)
+
+            # Merge the new hashes into the distinct-hash table
+            merged, inverse = np.unique(
+                np.concatenate([hashes, chunk_hashes]), return_inverse=True
+            )
+            merged_counts = np.bincount(
+                inverse,
+                weights=np.concatenate([counts, np.ones(len(chunk), dtype=np.int64)]),
+                minlength=len(merged),
+            ).astype(np.int64)
+            old_inverse = inverse[: len(hashes)]
+            new_inverse = inverse[len(hashes) :]
+            duplicates = merged_counts[new_inverse] > 1
+
+            # Earlier rows that were unique until now get their flag rewritten
+            for offset in flag_offsets[
+                (counts == 1) & (merged_counts[old_inverse] > 1)
+            ]:
+                output.seek(int(offset))
+                output.write(b"1")
+                flipped += 1
+
+            text = (
+                chunk.assign(is_duplicate_row=duplicates.astype(np.int8))
+                .to_csv(index=False, header=False, lineterminator="\n")
+                .encode("utf-8")
+            )
+            new_offsets = output_position + csv_record_ends(text) - 1
+            output.seek(output_position)
+            output.write(text)
+            output_position += len(text)
+
+            merged_offsets = np.full(len(merged), -1, dtype=np.int64)
+            merged_offsets[old_inverse] = flag_offsets
+            merged_offsets[new_inverse] = new_offsets
+            merged_offsets[merged_counts > 1] = -1
+
+            if len(preview) < PREVIEW_ROWS:
+                remaining = PREVIEW_ROWS - len(preview)
+                row_numbers = meta["total_rows"] + np.flatnonzero(duplicates) + 1
+                preview += preview_lines(
+                    chunk[duplicates].head(remaining), row_numbers[:remaining]
+                )
+
+            hashes, counts, flag_offsets = merged, merged_counts, merged_offsets
+            meta["total_rows"] += len(chunk)
+
+        meta["output_size"] = output_position
+
+    if carry:
+        log("The last record has no line ending yet; it will be read on the next run")
+
+    if meta["prefix_length"] == 0:
+        meta["prefix_length"] = min(PREFIX_DIGEST_BYTES, meta["input_offset"])
+        meta["prefix_digest"] = prefix_digest(file_path, meta["prefix_length"])
+    save_incremental_state(state_path, meta, hashes, counts, flag_offsets)
+
+    duplicate_count = int(counts[counts > 1].sum())
+    total_items = meta["total_rows"]
+    log(f"Parsed {total_items - start_rows} new rows")
+    log(f"Found {duplicate_count} duplicate rows out of {total_items} total rows")
+    if flipped:
+        log(f"Marked {flipped} earlier rows that now have a duplicate")
+    log(f"Saved: {output_filename}")
+
+    if preview:
+        log(f"New duplicate rows in {file_path.name}:")
+        for line in preview:
+            log(line)
+
+    return {
+        "output": output_filename,
+        "duplicate_count": duplicate_count,
+        "total_items": total_items,
+    }
+
+
+MODE_HANDLERS = {
+    "row": detect_row_duplicates_in_file,
+    "column": detect_column_duplicates_in_file,
+    "column_values": detect_column_value_duplicates_in_file,
+    "near_row": detect_near_duplicate_rows_in_file,
+}
+
+
+def process_file(
+    file_path,
+    output_directory,
+    mode="row",
+    log=null_log,
+    chunksize=None,
+    cache_path=None,
+    cache_bytes=DEFAULT_CACHE_BYTES,
+    incremental=False,
+    scan=False,
+    similarity=DEFAULT_SIMILARITY,
+    key_columns=None,
+    keep="none",
+    max_column=None,
+    schema_path=None,
+    sheets=None,
+    normalizer=None,
+):
+    """Run duplicate detection on a single file and save the annotated output.
+
+    When chunksize is given, CSV files and .xlsx sheets in row mode are
+    streamed in chunks of that many rows instead of being loaded whole. When
+    cache_path is given, files unchanged since the last run replay their
+    cached results instead of being parsed again. When incremental is set,
+    CSV files in row mode only parse the rows appended since the previous
+    run. When scan is set, CSV files in row mode are hashed as raw records
+    from a memory map. Similarity is the threshold of the near_row mode. In
+    row mode, rows are compared on key_columns (all columns when None) and
+    the keep policy ("none", "first", "last" or "max" by max_column) decides
+    which copy of a key stays unflagged. With schema_path, whole CSV files
+    are read with the compact dtypes learned for similarly named files. In
+    row mode, a normalizer (see Normalizer) cleans values before hashing.
+
+    Excel workbooks are checked sheet by sheet: the given sheets, or all of
+    them. Each sheet gets its own outputs, and the result lists them under
+    "sheets".
+    """
+    if mode not in MODE_HANDLERS:
+        raise ValueError(f"Unknown detection mode: {mode}")
+
+    file_path = Path(file_path)
+    log(
+        f"Processing: {file_path.name} (Mode: {mode.replace('_', ' ').title()} Detection)"
+    )
+
+    sheet_names = select_sheets(file_path, sheets)
+    results = []
+    for sheet_name in sheet_names:
+        if sheet_name is not None:
+            log(f"Sheet: {sheet_name}")
+        results.append(
+            process_sheet(
+                file_path,
+                sheet_name,
+                output_directory,
+                mode,
+                log,
+                chunksize,
+                cache_path,
+                cache_bytes,
+                incremental,
+                scan,
+                similarity,
+                key_columns,
+                keep,
+                max_column,
+                schema_path,
+                normalizer,
+            )
+        )
+
+    if sheet_names == [None]:
+        return results[0]
+    return combine_sheet_results(file_path, mode, sheet_names, results)
+
+
+def process_sheet(
+    file_path,
+    sheet_name,
+    output_directory,
+    mode,
+    log,
+    chunksize,
+    cache_path,
+    cache_bytes,
+    incremental,
+    scan,
+    similarity,
+    key_columns,
+    keep,
+    max_column,
+    schema_path,
+    normalizer,
+):
+    """Run duplicate detection on one file, or one sheet of a workbook."""
+    label = sheet_label(file_path, sheet_name)
+    row_csv = mode == "row" and file_path.suffix.lower() in CSV_EXTENSIONS
+    streamed = mode == "row" and file_path.suffix.lower() in STREAMED_EXTENSIONS
+    keyed = mode == "row" and (key_columns or keep != "none")
+    normalized = mode == "row" and bool(normalizer)
+    if (keyed or normalized) and row_csv and (incremental or scan):
+        log(
+            "Key columns, keep policies and normalization need parsed rows, "
+            "skipping incremental/scan"
+        )
+        incremental = scan = False
+
+    if incremental and row_csv:
+        result = detect_row_duplicates_incremental(file_path, output_directory, log)
+        result["file"] = str(file_path)
+        result["mode"] = mode
+        return result
+
+    if scan and row_csv:
+        method = "scan"
+    elif chunksize and streamed:
+        method = "stream"
+    else:
+        method = "memory"
+    options = f"{mode}:{method}"
+    handler = MODE_HANDLERS[mode]
+    if mode == "near_row":
+        options += f":{similarity}"
+        handler = partial(handler, similarity=similarity)
+    if keyed:
+        options += f":{','.join(key_columns or [])}:{keep}:{max_column or ''}"
+        handler = partial(
+            handler, key_columns=key_columns, keep=keep, max_column=max_column
+        )
+    if normalized:
+        options += f":normalize={normalizer}"
+        handler = partial(handler, normalizer=normalizer)
+    if sheet_name is not None:
+        options += f":sheet={sheet_name}"
+
+    if cache_path:
+        with FingerprintCache(cache_path, cache_bytes) as cache:
+            entry = cache.lookup(file_path, options)
+        if entry is not None:
+            for line in entry["log_lines"]:
+                log(line)
+            log(f"Unchanged since last run, reused cached results for {label.name}")
+            return entry["result"]
+
+    lines = []
+
+    def record(message):
+        lines.append(message)
+        log(message)
+
+    if method == "scan":
+        result = detect_row_duplicates_scan(file_path, output_directory, record)
+    elif method == "stream":
+        result = detect_row_duplicates_streaming(
+            file_path,
+            output_directory,
+            chunksize,
+            record,
+            key_columns=key_columns,
+            keep=keep,
+            max_column=max_column,
+            sheet_name=sheet_name,
+            normalizer=normalizer if normalized else None,
+        )
+    else:
+        df = read_input_file(file_path, schema_path=schema_path, sheet_name=sheet_name)
+        result = handler(df, label, output_directory, record)
+    result["file"] = str(file_path)
+    result["mode"] = mode
+
+    if cache_path:
+        # Row modes also name the duplicate report they wrote
+        output_paths = [
+            Path(output_directory) / result[name]
+            for name in ["output", "report"]
+            if result.get(name)
+        ]
+        with FingerprintCache(cache_path, cache_bytes) as cache:
+            cache.store(file_path, options, output_paths, result, lines)
+
+    return result
+
+
+def flag_values(series, file_path):
+    """Read a flag column written as True/False or 1/0, text or typed.
+
+    Missing and blank fields are not flagged; any other value raises a
+    ValueError rather than being taken as a flag.
+    """
+    present = series.notna().to_numpy()
+    text = series[present].astype(str).str.strip().str.casefold()
+    known = text.isin(FLAG_TEXT).to_numpy()
+    if not known.all():
+        value = series[present].iloc[np.argmin(known)]
+        raise ValueError(
+            f"Unrecognised value {value!r} in column '{series.name}' of "
+            f"{Path(file_path).name}; flags must be True/False or 1/0"
+        )
+
+    flags = np.zeros(len(series), dtype=bool)
+    flags[present] = text.map(FLAG_TEXT).to_numpy(dtype=bool)
+    return flags
+
+
+def resolve_flag_column(columns, file_path, flag_column=None):
+    """Return the flag column of a file, by default the first of FLAG_COLUMNS."""
+    candidates = [flag_column] if flag_column else FLAG_COLUMNS
+    for column in candidates:
+        if column in columns:
+            return column
+
+    names = " or ".join(f"'{column}'" for column in candidates)
+    raise ValueError(f"{names} column not found in {Path(file_path).name}")
+
+
+def remove_flagged_rows_streaming(
+    file_path, output_path, flag_column, chunksize, sheet_name=None
+):
+    """Drop flagged rows from a CSV file or .xlsx sheet in one pass over its chunks.
+
+    Fields are copied as their text. The rows are written to a temporary
+    file next to output_path that replaces it at the end, so output_path may
+    be the input file itself. Returns the removal statistics and a preview
+    of the removed rows.
+    """
+    stats = {"original": 0, "removed": 0, "remaining": 0}
+    preview = []
+    output_path = Path(output_path)
+    temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    try:
+        chunks = iter_file_chunks(file_path, chunksize, sheet_name=sheet_name)
+        for chunk_index, chunk in enumerate(chunks):
+            if chunk_index == 0:
+                flag_column = resolve_flag_column(chunk.columns, file_path, flag_column)
+
+            flags = flag_values(chunk[flag_column], file_path)
+            if stats["removed"] < PREVIEW_ROWS:
+                preview.append(chunk[flags].head(PREVIEW_ROWS - stats["removed"]))
+
+            chunk[~flags].drop(flag_column, axis=1).to_csv(
+                temp_path,
+                mode="w" if chunk_index == 0 else "a",
+                header=chunk_index == 0,
+                index=False,
+            )
+            stats["original"] += len(chunk)
+            stats["removed"] += int(flags.sum())
+        os.replace(temp_path, output_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    stats["remaining"] = stats["original"] - stats["removed"]
+
+    return stats, pd.concat(preview)
+
+
+def remove_flagged_rows(
+    file_path,
+    output_path,
+    flag_column=None,
+    log=null_log,
+    chunksize=DEFAULT_CHUNKSIZE,
+    sheet_name=None,
+):
+    """Drop rows flagged as duplicates and save the cleaned file.
+
+    The flags are read from flag_column, by default from whichever of
+    FLAG_COLUMNS the file has. CSV files and .xlsx sheets written to CSV are
+    streamed in chunks of chunksize rows; other formats are read whole.
+    Excel files are read from sheet_name, by default their first sheet.
+    Returns the removal statistics and a preview of the removed rows.
+    """
+    file_path = Path(file_path)
+    if (
+        file_path.suffix.lower() in STREAMED_EXTENSIONS
+        and Path(output_path).suffix.lower() in CSV_EXTENSIONS
+    ):
+        stats, duplicate_rows = remove_flagged_rows_streaming(
+            file_path, output_path, flag_column, chunksize, sheet_name
+        )
+    else:
+        df = read_input_file(file_path, sheet_name=sheet_name)
+        flag_column = resolve_flag_column(df.columns, file_path, flag_column)
+
+        flags = flag_values(df[flag_column], file_path)
+        duplicate_rows = df[flags]
+        clean_df = df[~flags].drop(flag_column, axis=1)
+        write_output_file(clean_df, output_path)
+
+        stats = {
+            "original": len(df),
+            "removed": len(duplicate_rows),
+            "remaining": len(clean_df),
+        }
+
+    log(f"  Original rows: {stats['original']}")
+    log(f"  Removed duplicates: {stats['removed']}")
+    log(f"  Remaining rows: {stats['remaining']}")
+    log(f"  Saved as: {Path(output_path).name}")
+
+    return stats, duplicate_rows.head(PREVIEW_ROWS)
+
+
+def clean_file(
+    file_path,
+    output_directory,
+    log=null_log,
+    chunksize=None,
+    key_columns=None,
+    keep="first",
+    max_column=None,
+    save_removed=False,
+    schema_path=None,
+    sheets=None,
+    normalizer=None,
+):
+    """Detect duplicate rows and write the cleaned file in the same pass.
+
+    Rows flagged under the keep policy are left out of the cleaned output
+    and, when save_removed is set, written to a removed-rows file instead.
+    With a chunksize, CSV files and .xlsx sheets are streamed; the 'first'
+    policy then reads them only once. Excel workbooks are cleaned sheet by
+    sheet, and a normalizer cleans values before hashing, like in
+    process_file.
+    """
+    file_path = Path(file_path)
+    log(f"Processing: {file_path.name} (Mode: Detect and Remove)")
+
+    sheet_names = select_sheets(file_path, sheets)
+    results = []
+    for sheet_name in sheet_names:
+        if sheet_name is not None:
+            log(f"Sheet: {sheet_name}")
+        results.append(
+            clean_sheet(
+                file_path,
+                sheet_name,
+                output_directory,
+                log,
+                chunksize,
+                key_columns,
+                keep,
+                max_column,
+                save_removed,
+                schema_path,
+                normalizer,
+            )
+        )
+
+    if sheet_names == [None]:
+        return results[0]
+    result = combine_sheet_results(file_path, "clean", sheet_names, results)
+    result["removed_output"] = results[0]["removed_output"]
+    return result
+
+
+def clean_sheet(
+    file_path,
+    sheet_name,
+    output_directory,
+    log,
+    chunksize,
+    key_columns,
+    keep,
+    max_column,
+    save_removed,
+    schema_path,
+    normalizer,
+):
+    """Clean one file, or one sheet of a workbook."""
+    label = sheet_label(file_path, sheet_name)
+    suffix = output_suffix(file_path)
+    output_filename = f"{label.stem}_cleaned{suffix}"
+    removed_filename = f"{label.stem}_removed{suffix}"
+    output_path = Path(output_directory) / output_filename
+    removed_path = Path(output_directory) / removed_filename
+
+    if chunksize and file_path.suffix.lower() in STREAMED_EXTENSIONS:
+        duplicate_count = 0
+        total_items = 0
+        flagged_chunks = iter_flagged_chunks(
+            file_path, chunksize, key_columns, keep, max_column, sheet_name, normalizer
+        )
+        for chunk_index, (chunk, duplicates) in enumerate(flagged_chunks):
+            write_mode = "w" if chunk_index == 0 else "a"
+            chunk[~duplicates].to_csv(
+                output_path, mode=write_mode, header=chunk_index == 0, index=False
+            )
+            if save_removed:
+                chunk[duplicates].to_csv(
+                    removed_path, mode=write_mode, header=chunk_index == 0, index=False
+                )
+            duplicate_count += int(duplicates.sum())
+            total_items += len(chunk)
+    else:
+        df = read_input_file(file_path, schema_path=schema_path, sheet_name=sheet_name)
+        check_key_columns(df.columns, label, key_columns, keep, max_column)
+        values = ranking_values(df[max_column]) if keep == "max" else None
+        duplicates = flag_row_duplicates(
+            row_groups(df, key_columns, normalizer), keep, values
+        )
+        write_output_file(df[~duplicates], output_path)
+        if save_removed:
+            write_output_file(df[duplicates], removed_path)
+        duplicate_count = int(duplicates.sum())
+        total_items = len(df)
+
+    log(describe_keep_policy(key_columns, keep, max_column))
+    if normalizer:
+        log(f"Values normalized: {normalizer}")
+    log(f"Removed {duplicate_count} duplicate rows out of {total_items} total rows")
+    log(f"Saved: {output_filename}")
+    if save_removed:
+        log(f"Saved removed rows: {removed_filename}")
+
+    return {
+        "output": output_filename,
+        "removed_output": removed_filename if save_removed else None,
+        "duplicate_count": duplicate_count,
+        "total_items": total_items,
+        "file": str(file_path),
+        "mode": "clean",
+    }
+
+
+def default_workers():
+    """Return the default number of worker processes."""
+    return os.cpu_count() or 1
+
+
+def run_logged(func, args):
+    """Call func(*args) with a log that collects its lines.
+
+    Returns a tuple of (result, log lines, error message). Exceptions are
+    captured so that one bad file does not abort a whole batch.
+    """
+    lines = []
+    try:
+        result = func(*args, log=lines.append)
+    except Exception as e:
+        return None, lines, str(e)
+    return result, lines, None
+
+
+def run_file_tasks(func, tasks, workers=None):
+    """Run func over a list of argument tuples in a pool of processes.
+
+    Yields (result, log lines, error message) for every task in task order
+    as soon as that task and all tasks before it have finished. With a single
+    worker the tasks run in the calling process.
+    """
+    if workers is None:
+        workers = default_workers()
+    workers = max(1, min(workers, len(tasks)))
+
+    if workers == 1:
+        for args in tasks:
+            yield run_logged(func, args)
+        return
+
+    # Spawned workers never inherit the state of a running Tk interpreter
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        yield from executor.map(run_logged, repeat(func), tasks)
+
+
+def read_input_sheet(file_path, sheet_name=None, schema_path=None):
+    """Read a file, or one sheet of an Excel workbook."""
+    return read_input_file(file_path, schema_path=schema_path, sheet_name=sheet_name)
+
+
+def read_input_files(file_paths, workers=None, schema_path=None, sheet_names=None):
+    """Read several files concurrently and return the dataframes in order.
+
+    Sheet_names gives the sheet to read from each file; Excel files without
+    one are read from their first sheet.
+    """
+    if workers is None:
+        workers = default_workers()
+    workers = max(1, min(workers, len(file_paths)))
+    if sheet_names is None:
+        sheet_names = [None] * len(file_paths)
+    read = partial(read_input_sheet, schema_path=schema_path)
+
+    if workers == 1:
+        return [read(*args) for args in zip(file_paths, sheet_names)]
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        return list(executor.map(read, file_paths, sheet_names))
+
+
+def build_parser():
+    """Build the command line argument parser."""
+    parser = argparse.ArgumentParser(
+        description="Headless duplicate detection for CSV and Excel files."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    detect_parser = subparsers.add_parser(
+        "detect", help="Mark duplicate rows, columns or column values"
+    )
+    detect_parser.add_argument(
+        "inputs", nargs="+", help="Input files or directories to scan"
+    )
+    detect_parser.add_argument(
+        "-o", "--output-dir", required=True, help="Directory for annotated output"
+    )
+    detect_parser.add_argument(
+        "-m", "--mode", choices=DETECTION_MODES, default="row", help="Detection mode"
+    )
+    detect_parser.add_argument(
+        "--chunksize",
+        type=int,
+        help="Stream CSV and .xlsx files in chunks of this many rows (row mode only)",
+    )
+    detect_parser.add_argument(
+        "--sheets",
+        help="Comma-separated sheets to check in Excel workbooks (default: all)",
+    )
+    detect_parser.add_argument(
+        "--keys",
+        help="Comma-separated key columns to compare rows on (row mode, default: all)",
+    )
+    detect_parser.add_argument(
+        "--keep",
+        choices=KEEP_POLICIES,
+        default="none",
+        help="Copy of each duplicate key left unflagged (row mode, default: none)",
+    )
+    detect_parser.add_argument(
+        "--max-column",
+        help="Column whose highest value picks the kept row with --keep max",
+    )
+    detect_parser.add_argument(
+        "--normalize",
+        type=parse_normalizer,
+        help=f"Comma-separated clean-up before comparing rows: {NORMALIZE_HELP}",
+    )
+    detect_parser.add_argument(
+        "--similarity",
+        type=float,
+        default=DEFAULT_SIMILARITY,
+        help="Similarity threshold between 0 and 1 (near_row mode)",
+    )
+    detect_parser.add_argument(
+        "--scan",
+        action="store_true",
+        help="Hash raw CSV records from a memory map without parsing (row mode)",
+    )
+    detect_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only parse rows appended since the previous run (row mode, CSV)",
+    )
+    detect_parser.add_argument(
+        "--cache",
+        action="store_true",
+        help=f"Reuse results for unchanged files ({CACHE_FILENAME} in output dir)",
+    )
+    detect_parser.add_argument(
+        "--schema-cache",
+        action="store_true",
+        help=f"Learn compact CSV column types and reuse them ({SCHEMA_FILENAME})",
+    )
+    detect_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_BYTES // (1024 * 1024),
+        help="Maximum cache size in MB before least recently used entries go",
+    )
+    detect_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="Number of files to process in parallel (default: CPU count)",
+    )
+    detect_parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Only print errors"
+    )
+
+    clean_parser = subparsers.add_parser(
+        "clean", help="Detect and drop duplicate rows in one pass"
+    )
+    clean_parser.add_argument(
+        "inputs", nargs="+", help="Input files or directories to clean"
+    )
+    clean_parser.add_argument(
+        "-o", "--output-dir", required=True, help="Directory for cleaned output"
+    )
+    clean_parser.add_argument(
+        "--chunksize",
+        type=int,
+        help="Stream CSV and .xlsx files in chunks of this many rows",
+    )
+    clean_parser.add_argument(
+        "--sheets",
+        help="Comma-separated sheets to clean in Excel workbooks (default: all)",
+    )
+    clean_parser.add_argument(
+        "--keys",
+        help="Comma-separated key columns to compare rows on (default: all)",
+    )
+    clean_parser.add_argument(
+        "--keep",
+        choices=KEEP_POLICIES,
+        default="first",
+        help="Copy of each duplicate key that is kept (default: first)",
+    )
+    clean_parser.add_argument(
+        "--max-column",
+        help="Column whose highest value picks the kept row with --keep max",
+    )
+    clean_parser.add_argument(
+        "--normalize",
+        type=parse_normalizer,
+        help=f"Comma-separated clean-up before comparing rows: {NORMALIZE_HELP}",
+    )
+    clean_parser.add_argument(
+        "--schema-cache",
+        action="store_true",
+        help=f"Learn compact CSV column types and reuse them ({SCHEMA_FILENAME})",
+    )
+    clean_parser.add_argument(
+        "--save-removed",
+        action="store_true",
+        help="Also write the dropped rows to <name>_removed",
+    )
+    clean_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="Number of files to process in parallel (default: CPU count)",
+    )
+    clean_parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Only print errors"
+    )
+
+    remove_parser = subparsers.add_parser(
+        "remove",
+        help="Drop rows flagged in the 'is_duplicate' or 'is_duplicate_row' column",
+    )
+    remove_parser.add_argument(
+        "inputs", nargs="+", help="Input files or directories to clean"
+    )
+    remove_parser.add_argument(
+        "-o", "--output-dir", required=True, help="Directory for cleaned output"
+    )
+    remove_parser.add_argument(
+        "--sheet", help="Sheet to read from Excel workbooks (default: the first)"
+    )
+    remove_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="Number of files to process in parallel (default: CPU count)",
+    )
+    remove_parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Only print errors"
+    )
+
+    return parser
+
+
+def run_over_files(func, input_files, workers, log):
+    """Run func over the input files, log their output and count the failures."""
+    failures = 0
+    results = run_file_tasks(func, [(file_path,) for file_path in input_files], workers)
+    for file_path, (_, lines, error) in zip(input_files, results):
+        for line in lines:
+            log(line)
+        if error is not None:
+            print(f"Error processing {Path(file_path).name}: {error}", file=sys.stderr)
+            failures += 1
+        log("-" * 50)
+    return failures
+
+
+def schema_path_for(args):
+    """Return the schema store in the output directory, if --schema-cache is set."""
+    return Path(args.output_dir) / SCHEMA_FILENAME if args.schema_cache else None
+
+
+def run_detect(args, log):
+    """Run the detect command and return the number of failed files."""
+    input_files = find_input_files(args.inputs)
+    func = partial(
+        process_file,
+        output_directory=args.output_dir,
+        mode=args.mode,
+        chunksize=args.chunksize,
+        cache_path=Path(args.output_dir) / CACHE_FILENAME if args.cache else None,
+        cache_bytes=args.cache_size * 1024 * 1024,
+        incremental=args.incremental,
+        scan=args.scan,
+        similarity=args.similarity,
+        key_columns=parse_key_columns(args.keys),
+        keep=args.keep,
+        max_column=args.max_column,
+        schema_path=schema_path_for(args),
+        sheets=parse_sheet_names(args.sheets),
+        normalizer=args.normalize,
+    )
+    return run_over_files(func, input_files, args.workers, log)
+
+
+def run_clean(args, log):
+    """Run the clean command and return the number of failed files."""
+    input_files = find_input_files(args.inputs)
+    func = partial(
+        clean_file,
+        output_directory=args.output_dir,
+        chunksize=args.chunksize,
+        key_columns=parse_key_columns(args.keys),
+        keep=args.keep,
+        max_column=args.max_column,
+        save_removed=args.save_removed,
+        schema_path=schema_path_for(args),
+        sheets=parse_sheet_names(args.sheets),
+        normalizer=args.normalize,
+    )
+    return run_over_files(func, input_files, args.workers, log)
+
+
+def run_remove(args, log):
+    """Run the remove command and return the number of failed files."""
+    input_files = find_input_files(args.inputs)
+    tasks = [
+        (
+            file_path,
+            Path(args.output_dir) / f"{sheet_label(file_path, args.sheet).stem}_cleaned"
+            f"{output_suffix(file_path)}",
+        )
+        for file_path in input_files
+    ]
+
+    failures = 0
+    remove = partial(remove_flagged_rows, sheet_name=args.sheet)
+    results = run_file_tasks(remove, tasks, args.workers)
+    for file_path, (_, lines, error) in zip(input_files, results):
+        log(f"Processing: {Path(file_path).name}")
+        for line in lines:
+            log(line)
+        if error is not None:
+            print(f"Error processing {Path(file_path).name}: {error}", file=sys.stderr)
+            failures += 1
+    return failures
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "keep", None) == "max" and not args.max_column:
+        parser.error("--keep max requires --max-column")
+
+    if not Path(args.output_dir).is_dir():
+        print(f"Output directory does not exist: {args.output_dir}", file=sys.stderr)
+        return 2
+
+    log = null_log if args.quiet else print
+
+    if args.command == "detect":
+        failures = run_detect(args, log)
+    elif args.command == "clean":
+        failures = run_clean(args, log)
+    else:
+        failures = run_remove(args, log)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
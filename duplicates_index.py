@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Reference Index
+Keeps the row keys of a reference (master) file on disk as a sorted uint64
+array, so files compared against the same reference again and again only
+stream their own rows and probe the memory-mapped keys.
+"""
+
+import argparse
+import json
+import os
+import sys
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from duplicates_cache import file_digest, file_signature
+from duplicates_compare import (
+    COMPARISON_MODES,
+    append_csv,
+    comparison_columns,
+    comparison_normalizer,
+)
+from duplicates_engine import (
+    DEFAULT_CHUNKSIZE,
+    RowHashCounter,
+    default_workers,
+    find_hashes,
+    null_log,
+    row_keys,
+    run_file_tasks,
+)
+from duplicates_io import find_input_files, iter_file_chunks, read_columns
+from duplicates_normalize import NORMALIZE_HELP, Normalizer, parse_normalizer
+
+INDEX_SUFFIX = ".rowindex"
+# Bumped whenever row_keys changes, so older indexes are rebuilt
+INDEX_VERSION = 2
+
+
+def metadata_path(index_path):
+    """Return the path of the JSON description stored next to an index."""
+    index_path = Path(index_path)
+    return index_path.with_name(f"{index_path.name}.json")
+
+
+def build_reference_index(
+    reference_path,
+    index_path,
+    mode="exact",
+    selected_columns=None,
+    chunksize=DEFAULT_CHUNKSIZE,
+    sheet_name=None,
+    log=null_log,
+    normalizer=None,
+):
+    """Stream a reference file once and save the sorted keys of its rows.
+
+    Rows are keyed by row_keys like compare_files_partitioned does, so
+    numbers match by value, after the normalizer's clean-up and case folding
+    in case_insensitive mode. The keys go to index_path as an .npy array and
+    the reference file's signature, columns and normalization to a JSON file
+    next to it.
+    """
+    reference_path = Path(reference_path)
+    header = read_columns(reference_path, sheet_name)
+    frame = pd.DataFrame(columns=header)
+    columns = comparison_columns(frame, frame, mode, selected_columns)
+    normalizer = comparison_normalizer(mode, normalizer)
+
+    log(f"Indexing {reference_path.name}...")
+    counter = RowHashCounter()
+    total_rows = 0
+    for chunk in iter_file_chunks(
+        reference_path, chunksize, columns=columns, sheet_name=sheet_name
+    ):
+        counter.add(row_keys(chunk, columns, normalizer))
+        total_rows += len(chunk)
+    counter.fold()
+
+    size, mtime_ns = file_signature(reference_path)
+    metadata = {
+        "version": INDEX_VERSION,
+        "reference": str(reference_path.resolve()),
+        "sheet": sheet_name,
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "digest": file_digest(reference_path),
+        "mode": mode,
+        "normalize": str(normalizer or ""),
+        "columns": columns,
+        "rows": total_rows,
+        "keys": len(counter.hashes),
+    }
+
+    # Write both files under temporary names so readers never see half an index
+    index_path = Path(index_path)
+    temp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    with open(temp_path, "wb") as f:
+        np.save(f, counter.hashes)
+    os.replace(temp_path, index_path)
+    temp_path.write_text(json.dumps(metadata, indent=1), encoding="utf-8")
+    os.replace(temp_path, metadata_path(index_path))
+
+    log(f"Indexed {total_rows:,} rows ({len(counter.hashes):,} distinct keys)")
+    log(f"Index saved: {index_path.name}")
+    return metadata
+
+
+class ReferenceIndex:
+    """Sorted row keys of a reference file, memory-mapped from disk.
+
+    Opening an index only maps its keys; lookups binary-search them, so a
+    comparison costs time in proportion to the rows of the incoming file.
+    """
+
+    def __init__(self, index_path):
+        self.path = Path(index_path)
+        self.metadata = json.loads(metadata_path(self.path).read_text(encoding="utf-8"))
+        self.keys = np.load(self.path, mmap_mode="r")
+        self.normalizer = Normalizer.from_text(self.metadata["normalize"])
+
+    @property
+    def columns(self):
+        """The compared columns of the reference file."""
+        return self.metadata["columns"]
+
+    def is_current(self):
+        """Return whether the index is up to date with its reference file.
+
+        Indexes keyed by an older version of row_keys are never current.
+        """
+        if self.metadata.get("version") != INDEX_VERSION:
+            return False
+        reference_path = Path(self.metadata["reference"])
+        if not reference_path.exists():
+            return False
+
+        size, mtime_ns = file_signature(reference_path)
+        if size != self.metadata["size"]:
+            return False
+        return (
+            mtime_ns == self.metadata["mtime_ns"]
+            or file_digest(reference_path) == self.metadata["digest"]
+        )
+
+    def contains(self, chunk):
+        """Return whether the key of each row of a text chunk is in the reference."""
+        keys = row_keys(chunk, self.columns, self.normalizer)
+        _, found = find_hashes(self.keys, keys)
+        return found
+
+
+def compare_with_index(
+    file_path,
+    index_path,
+    output_directory,
+    include_unique=True,
+    chunksize=DEFAULT_CHUNKSIZE,
+    sheet_name=None,
+    log=null_log,
+):
+    """Split the rows of a file by whether the reference index holds them.
+
+    The file is streamed in chunks; rows found in the reference go to
+    <file>_vs_<reference>_duplicates.csv and, with include_unique, the other
+    rows to <file>_vs_<reference>_unique.csv. Fields are compared as text,
+    with numbers by value. Returns a dict of row counts.
+    """
+    file_path = Path(file_path)
+    index = ReferenceIndex(index_path)
+    missing = [
+        column
+        for column in index.columns
+        if column not in read_columns(file_path, sheet_name)
+    ]
+    if missing:
+        raise ValueError(
+            f"Indexed columns not found in {file_path.name}: {', '.join(missing)}"
+        )
+
+    base = f"{file_path.stem}_vs_{Path(index.metadata['reference']).stem}"
+    duplicates_path = Path(output_directory) / f"{base}_duplicates.csv"
+    unique_path = Path(output_directory) / f"{base}_unique.csv"
+    for path in [duplicates_path, unique_path]:
+        path.unlink(missing_ok=True)
+
+    counts = {"rows": 0, "duplicates": 0, "unique": 0}
+    for chunk in iter_file_chunks(file_path, chunksize, sheet_name=sheet_name):
+        found = index.contains(chunk)
+        append_csv(chunk[found], duplicates_path)
+        if include_unique:
+            append_csv(chunk[~found], unique_path)
+        counts["rows"] += len(chunk)
+        counts["duplicates"] += int(found.sum())
+        counts["unique"] += int((~found).sum())
+
+    log(
+        f"{file_path.name}: {counts['duplicates']:,} of {counts['rows']:,} rows "
+        f"found in the reference"
+    )
+    log(f"Duplicates saved to: {duplicates_path.name}")
+    if include_unique:
+        log(f"Unique rows saved to: {unique_path.name}")
+    return counts
+
+
+def build_parser():
+    """Build the command line argument parser."""
+    parser = argparse.ArgumentParser(
+        description="Index a reference file once and compare files against it."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser(
+        "build", help="Save the row keys of a reference file"
+    )
+    index_parser.add_argument("reference", help="Reference file to index")
+    index_parser.add_argument(
+        "index", help=f"Index file to write (e.g. master{INDEX_SUFFIX})"
+    )
+    index_parser.add_argument(
+        "-m", "--mode", choices=COMPARISON_MODES, default="exact", help="Match mode"
+    )
+    index_parser.add_argument(
+        "-c",
+        "--columns",
+        nargs="+",
+        help="Columns to compare (selected_columns mode)",
+    )
+    index_parser.add_argument(
+        "--normalize",
+        type=parse_normalizer,
+        help=f"Comma-separated clean-up before comparing rows: {NORMALIZE_HELP}",
+    )
+    index_parser.add_argument(
+        "--sheet", help="Sheet to read from an Excel workbook (default: the first)"
+    )
+    index_parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=DEFAULT_CHUNKSIZE,
+        help="Rows read per chunk while streaming the reference",
+    )
+    index_parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Only print errors"
+    )
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare files against an index"
+    )
+    compare_parser.add_argument("index", help="Index built with the build command")
+    compare_parser.add_argument(
+        "inputs", nargs="+", help="Input files or directories to compare"
+    )
+    compare_parser.add_argument(
+        "-o", "--output-dir", required=True, help="Directory for comparison results"
+    )
+    compare_parser.add_argument(
+        "--no-unique", action="store_true", help="Do not write unique rows"
+    )
+    compare_parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild the index first if the reference file has changed",
+    )
+    compare_parser.add_argument(
+        "--sheet", help="Sheet to read from Excel workbooks (default: the first)"
+    )
+    compare_parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=DEFAULT_CHUNKSIZE,
+        help="Rows read per chunk while streaming each file",
+    )
+    compare_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="Number of files to compare in parallel (default: CPU count)",
+    )
+    compare_parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Only print errors"
+    )
+
+    return parser
+
+
+def run_compare(args, log):
+    """Run the compare command and return the number of failed files."""
+    index = ReferenceIndex(args.index)
+    current = index.is_current()
+    metadata = index.metadata
+    del index  # Release the mapped keys before they can be replaced
+
+    if not current:
+        if not args.rebuild:
+            raise ValueError(
+                "The index is out of date (the reference file changed or it was "
+                "built by an older version); rebuild it or pass --rebuild"
+            )
+        build_reference_index(
+            metadata["reference"],
+            args.index,
+            mode=metadata["mode"],
+            selected_columns=metadata["columns"],
+            chunksize=args.chunksize,
+            sheet_name=metadata["sheet"],
+            log=log,
+            normalizer=Normalizer.from_text(metadata["normalize"]),
+        )
+
+    input_files = find_input_files(args.inputs)
+    compare = partial(
+        compare_with_index,
+        index_path=args.index,
+        output_directory=args.output_dir,
+        include_unique=not args.no_unique,
+        chunksize=args.chunksize,
+        sheet_name=args.sheet,
+    )
+
+    failures = 0
+    results = run_file_tasks(compare, [(path,) for path in input_files], args.workers)
+    for file_path, (_, lines, error) in zip(input_files, results):
+        for line in lines:
+            log(line)
+        if error is not None:
+            print(f"Error processing {Path(file_path).name}: {error}", file=sys.stderr)
+            failures += 1
+    return failures
+
+
+def main(argv=None):
+    """Command line entry point."""
+    args = build_parser().parse_args(argv)
+    log = null_log if args.quiet else print
+
+    if args.command == "compare" and not Path(args.output_dir).is_dir():
+        print(f"Output directory does not exist: {args.output_dir}", file=sys.stderr)
+        return 2
+
+    try:
+        if args.command == "build":
+            build_reference_index(
+                args.reference,
+                args.index,
+                mode=args.mode,
+                selected_columns=args.columns,
+                chunksize=args.chunksize,
+                sheet_name=args.sheet,
+                log=log,
+                normalizer=args.normalize,
+            )
+            return 0
+        failures = run_compare(args, log)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
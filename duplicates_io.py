@@ -0,0 +1,257 @@
+"""
+File Input/Output
+Readers and writers for the file formats supported by the duplicate tools:
+CSV, Excel, and the columnar Parquet, Feather and Arrow IPC formats.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Columnar formats are optional
+    pa = None
+    pq = None
+
+from duplicates_schema import SchemaStore
+from duplicates_xlsx import XlsxReader, write_workbook
+
+CSV_EXTENSIONS = [".csv"]
+EXCEL_EXTENSIONS = [".xlsx", ".xls"]
+COLUMNAR_EXTENSIONS = [".parquet", ".feather", ".arrow"]
+SUPPORTED_EXTENSIONS = CSV_EXTENSIONS + EXCEL_EXTENSIONS + COLUMNAR_EXTENSIONS
+
+FILE_DIALOG_TYPES = [
+    ("Supported files", " ".join(f"*{ext}" for ext in SUPPORTED_EXTENSIONS)),
+    ("CSV files", "*.csv"),
+    ("Excel files", "*.xlsx *.xls"),
+    ("Columnar files", "*.parquet *.feather *.arrow"),
+    ("All files", "*.*"),
+]
+
+
+def require_pyarrow(file_ext):
+    """Raise a helpful error when pyarrow is needed but missing."""
+    if pa is None:
+        raise ImportError(f"pyarrow is required to read and write {file_ext} files")
+
+
+def read_arrow_table(file_path, columns=None):
+    """Read an Arrow IPC file (Feather v2) or IPC stream into a table."""
+    try:
+        with pa.memory_map(str(file_path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        with pa.memory_map(str(file_path)) as source:
+            table = pa.ipc.open_stream(source).read_all()
+
+    if columns is not None:
+        table = table.select(columns)
+    return table
+
+
+def read_parquet_head(file_path, nrows, columns=None):
+    """Read only the first rows of a Parquet file."""
+    parquet_file = pq.ParquetFile(file_path)
+    batches = parquet_file.iter_batches(batch_size=max(nrows, 1), columns=columns)
+    batch = next(batches, None)
+    if batch is None:
+        return parquet_file.schema_arrow.empty_table().to_pandas()
+    return batch.to_pandas().head(nrows)
+
+
+def excel_sheet_names(file_path):
+    """Return the sheet names of an Excel workbook in workbook order."""
+    with pd.ExcelFile(file_path) as workbook:
+        return workbook.sheet_names
+
+
+def read_input_file(
+    file_path, nrows=None, columns=None, schema_path=None, sheet_name=None
+):
+    """Read a supported file based on its extension.
+
+    Columns limits the read to the named columns; columnar formats skip the
+    other columns entirely. With schema_path, whole CSV files are read with
+    the compact dtypes stored there (see SchemaStore). Excel files are read
+    from sheet_name, by default their first sheet.
+    """
+    file_ext = Path(file_path).suffix.lower()
+
+    if file_ext in CSV_EXTENSIONS and schema_path and nrows is None and not columns:
+        return SchemaStore(schema_path).read_csv(file_path)
+    elif file_ext in CSV_EXTENSIONS:
+        return pd.read_csv(file_path, nrows=nrows, usecols=columns)
+    elif file_ext in EXCEL_EXTENSIONS:
+        return pd.read_excel(
+            file_path, sheet_name=sheet_name or 0, nrows=nrows, usecols=columns
+        )
+    elif file_ext == ".parquet":
+        require_pyarrow(file_ext)
+        if nrows is not None:
+            return read_parquet_head(file_path, nrows, columns)
+        return pd.read_parquet(file_path, columns=columns)
+    elif file_ext in [".feather", ".arrow"]:
+        require_pyarrow(file_ext)
+        table = read_arrow_table(file_path, columns)
+        if nrows is not None:
+            table = table.slice(0, nrows)
+        return table.to_pandas()
+    else:
+        raise ValueError(f"Unsupported file format: {file_ext}")
+
+
+def read_columns(file_path, sheet_name=None):
+    """Return the column names of a file without reading its rows.
+
+    Columnar formats only read their schema.
+    """
+    file_ext = Path(file_path).suffix.lower()
+
+    if file_ext == ".parquet":
+        require_pyarrow(file_ext)
+        names = pq.read_schema(file_path).names
+        return [name for name in names if not name.startswith("__index_level_")]
+    elif file_ext in [".feather", ".arrow"]:
+        require_pyarrow(file_ext)
+        with pa.memory_map(str(file_path)) as source:
+            try:
+                return pa.ipc.open_file(source).schema.names
+            except pa.ArrowInvalid:
+                source.seek(0)
+                return pa.ipc.open_stream(source).schema.names
+    return list(read_input_file(file_path, nrows=0, sheet_name=sheet_name).columns)
+
+
+def output_suffix(file_path):
+    """Return the output extension for an input: columnar stays columnar, else CSV."""
+    file_ext = Path(file_path).suffix.lower()
+    return file_ext if file_ext in COLUMNAR_EXTENSIONS else ".csv"
+
+
+def arrow_compatible(df):
+    """Render object columns holding mixed types as text so Arrow can store them.
+
+    Comparison results stack rows of two files, so one column can mix numbers
+    and strings. Missing values stay missing.
+    """
+    mixed = [
+        column
+        for column in df.columns
+        if df[column].dtype == object
+        and pd.api.types.infer_dtype(df[column], skipna=True)
+        in ("mixed", "mixed-integer")
+    ]
+    if not mixed:
+        return df
+
+    df = df.copy()
+    for column in mixed:
+        values = df[column]
+        df[column] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+def write_output_file(df, output_path):
+    """Write a dataframe in the format given by the output file's extension."""
+    file_ext = Path(output_path).suffix.lower()
+
+    if file_ext in CSV_EXTENSIONS:
+        df.to_csv(output_path, index=False)
+    elif file_ext == ".xlsx":
+        write_workbook(output_path, {"Sheet1": df})
+    elif file_ext in EXCEL_EXTENSIONS:
+        df.to_excel(output_path, index=False)
+    elif file_ext == ".parquet":
+        require_pyarrow(file_ext)
+        arrow_compatible(df).to_parquet(output_path, index=False)
+    elif file_ext in [".feather", ".arrow"]:
+        require_pyarrow(file_ext)
+        arrow_compatible(df).reset_index(drop=True).to_feather(output_path)
+    else:
+        raise ValueError(f"Unsupported file format: {file_ext}")
+
+
+def find_input_files(paths):
+    """Expand files and directories into a list of supported input files."""
+    input_files = []
+
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            candidates = sorted(p for p in path.iterdir() if p.is_file())
+        else:
+            candidates = [path]
+
+        for file_path in candidates:
+            if file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+                full_path = str(file_path)
+                if full_path not in input_files:
+                    input_files.append(full_path)
+
+    return input_files
+
+
+def iter_file_chunks(file_path, chunksize, columns=None, sheet_name=None):
+    """Yield chunks of text fields from any supported file.
+
+    Fields are kept as text so that every chunk hashes the same way
+    regardless of how pandas would infer its dtypes. CSV, Parquet and .xlsx
+    files are streamed; other formats are read whole and sliced. Typed
+    columnar values are rendered as text to match CSV chunks. Excel files
+    are read from sheet_name, by default their first sheet.
+    """
+    file_ext = Path(file_path).suffix.lower()
+
+    if file_ext in CSV_EXTENSIONS:
+        yield from pd.read_csv(
+            file_path,
+            chunksize=chunksize,
+            dtype=str,
+            keep_default_na=False,
+            usecols=columns,
+        )
+    elif file_ext == ".parquet":
+        require_pyarrow(file_ext)
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas().astype(str)
+    elif file_ext == ".xlsx":
+        with XlsxReader(file_path) as reader:
+            yield from reader.iter_chunks(
+                sheet_name,
+                chunksize,
+                dtype=str,
+                keep_default_na=False,
+                usecols=columns,
+            )
+    elif file_ext in EXCEL_EXTENSIONS:
+        df = pd.read_excel(
+            file_path,
+            sheet_name=sheet_name or 0,
+            dtype=str,
+            keep_default_na=False,
+            usecols=columns,
+        )
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start : start + chunksize]
+    else:
+        df = read_input_file(file_path, columns=columns).astype(str)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start : start + chunksize]
+
+
+def csv_record_ends(buffer):
+    """Return the positions of the newlines that end CSV records in a buffer.
+
+    The buffer must start at a record boundary. Newlines inside quoted fields
+    are skipped by tracking quote parity; escaped quotes ("") keep it intact.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    newlines = np.flatnonzero(data == ord("\n"))
+    quotes = np.flatnonzero(data == ord('"'))
+    quotes_before = np.searchsorted(quotes, newlines)
+    return newlines[quotes_before % 2 == 0]
@@ -0,0 +1,99 @@
+"""
+Queued Log
+Thread-safe log for the Tk tools. Worker threads only put messages and UI
+calls on a queue; the Tk main loop drains it in batches on a timer.
+"""
+
+import os
+import queue
+import tempfile
+import tkinter as tk
+
+MAX_LOG_LINES = 5000
+DRAIN_INTERVAL_MS = 100
+
+
+class QueuedLog:
+    """Log messages to a Tk text widget from any thread.
+
+    Messages are written to the widget in one insert per drain, and the widget
+    keeps only the last max_lines lines. Every message also goes to a spill
+    file so that the full log of the current run is still available.
+    """
+
+    def __init__(
+        self,
+        root,
+        text_widget,
+        name,
+        max_lines=MAX_LOG_LINES,
+        interval=DRAIN_INTERVAL_MS,
+    ):
+        self.root = root
+        self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.interval = interval
+        self.queue = queue.SimpleQueue()
+
+        fd, self.spill_path = tempfile.mkstemp(prefix=f"{name}_", suffix=".log")
+        self.spill_file = os.fdopen(fd, "w", encoding="utf-8")
+
+        self.root.after(self.interval, self.drain)
+
+    def __call__(self, message):
+        """Queue a log message; safe to call from any thread."""
+        self.queue.put((None, message))
+
+    def call(self, func, *args, **kwargs):
+        """Queue a call to run on the Tk main loop; safe from any thread."""
+        self.queue.put((func, (args, kwargs)))
+
+    def clear(self):
+        """Clear the widget and empty the spill file for the next run."""
+        self.text_widget.delete(1.0, tk.END)
+        self.spill_file.seek(0)
+        self.spill_file.truncate()
+
+    def drain(self):
+        """Write queued messages and run queued calls, in order."""
+        lines = []
+        while True:
+            try:
+                func, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if func is None:
+                lines.append(f"{payload}\n")
+                continue
+
+            # Flush the lines before the call so the order is kept
+            self.write(lines)
+            lines = []
+            args, kwargs = payload
+            func(*args, **kwargs)
+
+        self.write(lines)
+        self.root.after(self.interval, self.drain)
+
+    def write(self, lines):
+        """Append a batch of lines to the spill file and the widget."""
+        if not lines:
+            return
+
+        self.spill_file.write("".join(lines))
+        self.spill_file.flush()
+
+        # Lines that would be trimmed straight away never reach the widget
+        self.text_widget.insert(tk.END, "".join(lines[-self.max_lines :]))
+        # The text ends with a newline, so the last line index is an empty line
+        line_count = int(self.text_widget.index("end-1c").split(".")[0]) - 1
+        trimmed = len(lines) > self.max_lines
+        if line_count > self.max_lines:
+            self.text_widget.delete(1.0, f"{line_count - self.max_lines + 1}.0")
+            trimmed = True
+        if trimmed:
+            self.text_widget.insert(
+                1.0, f"[Earlier lines trimmed, full log in {self.spill_path}]\n"
+            )
+        self.text_widget.see(tk.END)
@@ -0,0 +1,210 @@
+"""
+Near-Duplicate Rows
+Clusters rows whose text is similar rather than identical, using MinHash
+signatures over character shingles and locality-sensitive hashing (LSH).
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SIMILARITY = 0.8
+NUM_PERMUTATIONS = 64
+SHINGLE_SIZE = 3
+SIGNATURE_BATCH_BYTES = 4 * 1024 * 1024
+LINK_BATCH_SIZE = 100_000
+BAND_PRIME = np.uint64(0x100000001B3)
+
+
+def row_text(df):
+    """Return the normalized text of every row: casefolded, single-spaced."""
+    if df.shape[1] == 0:
+        return pd.Series("", index=df.index, dtype=object)
+
+    parts = [
+        df.iloc[:, position].astype(object).where(df.iloc[:, position].notna(), "")
+        for position in range(df.shape[1])
+    ]
+    text = parts[0].astype(str).str.cat([part.astype(str) for part in parts[1:]], " ")
+    return text.str.casefold().str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def lsh_parameters(threshold, num_permutations=NUM_PERMUTATIONS):
+    """Pick the number of bands and rows per band for a similarity threshold.
+
+    Rows sharing all signature values of any one band become candidates; the
+    chance of that rises steeply around (1 / bands) ** (1 / rows), which is
+    chosen as close to the threshold as the permutation count allows.
+    """
+    best = None
+    for rows in range(1, num_permutations + 1):
+        if num_permutations % rows:
+            continue
+        bands = num_permutations // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+def shingle_codes(encoded, shingle_size=SHINGLE_SIZE):
+    """Return the character shingles of a batch of encoded rows.
+
+    Returns the shingle codes and the index of the first shingle of every
+    row. Rows shorter than a shingle contribute their whole text as one.
+    """
+    lengths = np.fromiter((len(text) for text in encoded), dtype=np.int64)
+    padded = b"".join(encoded) + bytes(shingle_size)
+    data = np.frombuffer(padded, dtype=np.uint8).astype(np.uint64)
+    row_starts = np.cumsum(lengths) - lengths
+
+    # Pack each run of shingle_size bytes into one integer code
+    counts = np.maximum(lengths - shingle_size + 1, 1)
+    first = np.cumsum(counts) - counts
+    row_ids = np.repeat(np.arange(len(lengths)), counts)
+    positions = row_starts[row_ids] + (np.arange(len(row_ids)) - first[row_ids])
+
+    codes = np.zeros(len(row_ids), dtype=np.uint64)
+    for offset in range(shingle_size):
+        inside = offset < lengths[row_ids]
+        values = np.where(inside, data[positions + offset], np.uint64(0))
+        codes = (codes << np.uint64(8)) | values
+    return codes, first
+
+
+def minhash_signatures(texts, num_permutations=NUM_PERMUTATIONS, seed=0):
+    """Return a (rows, num_permutations) uint32 MinHash signature matrix."""
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(1, 2**63, num_permutations, dtype=np.uint64) | 1
+    offsets = rng.integers(0, 2**63, num_permutations, dtype=np.uint64)
+
+    encoded = [text.encode("utf-8") for text in texts]
+    signatures = np.empty((len(encoded), num_permutations), dtype=np.uint32)
+
+    # Batch rows so that the shingle arrays stay a few megabytes
+    start = 0
+    while start < len(encoded):
+        stop = start
+        batch_bytes = 0
+        while stop < len(encoded) and batch_bytes < SIGNATURE_BATCH_BYTES:
+            batch_bytes += len(encoded[stop]) + SHINGLE_SIZE
+            stop += 1
+
+        codes, first = shingle_codes(encoded[start:stop])
+        for j in range(num_permutations):
+            # Multiply-shift hashing: the high bits of a*x + c are well mixed
+            hashed = (codes * multipliers[j] + offsets[j]) >> np.uint64(32)
+            signatures[start:stop, j] = np.minimum.reduceat(hashed, first)
+        start = stop
+
+    return signatures
+
+
+def connected_components(count, left, right):
+    """Label the connected components of a graph given as an edge list."""
+    labels = np.arange(count)
+    while True:
+        # Pull every node down to the smallest label among its neighbours
+        smaller = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, smaller)
+        np.minimum.at(updated, right, smaller)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def bucket_pairs(order, same, batch_size=LINK_BATCH_SIZE):
+    """Yield every pair of rows sharing a bucket, in batches of about batch_size.
+
+    order lists the rows sorted by bucket key and same marks the positions of
+    order whose key equals the one before.
+    """
+    # Runs of equal keys: each row pairs with the rows after it in its run
+    run_starts = np.flatnonzero(np.concatenate([[True], ~same]))
+    run_ends = np.append(run_starts[1:], len(order))
+    run_lengths = run_ends - run_starts
+    run_of = np.repeat(np.arange(len(run_starts)), run_lengths)
+    pair_counts = run_ends[run_of] - np.arange(len(order)) - 1
+    pair_ends = np.cumsum(pair_counts)
+
+    first = 0
+    while first < len(order):
+        limit = pair_ends[first] - pair_counts[first] + batch_size
+        last = max(int(np.searchsorted(pair_ends, limit, side="right")), first + 1)
+        counts = pair_counts[first:last]
+        positions = np.repeat(np.arange(first, last), counts)
+        offsets = np.arange(len(positions)) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        yield order[positions], order[positions + offsets + 1]
+        first = last
+
+
+def near_duplicate_clusters(df, threshold=DEFAULT_SIMILARITY):
+    """Group rows whose estimated text similarity reaches the threshold.
+
+    Rows are reduced to MinHash signatures and bucketed band by band; every
+    pair of rows sharing a bucket is linked when their signatures agree on
+    at least the threshold fraction of values. Rows with identical
+    signatures are linked up front and bucketed once, so work grows with the
+    number of rows and candidate pairs rather than with all pairs of rows.
+
+    Returns one cluster ID per row (numbered from 1 in order of first
+    appearance, 0 for rows without a near duplicate) and the cluster count.
+    """
+    count = len(df)
+    if count == 0:
+        return np.zeros(0, dtype=np.int64), 0
+
+    signatures = minhash_signatures(row_text(df))
+    bands, rows_per_band = lsh_parameters(threshold, signatures.shape[1])
+
+    # Link rows with the same signature to the first row that has it
+    keys = np.zeros(count, dtype=np.uint64)
+    for column in range(signatures.shape[1]):
+        keys = keys * BAND_PRIME + signatures[:, column]
+    order = np.argsort(keys, kind="stable")
+    new_key = np.concatenate([[True], keys[order[1:]] != keys[order[:-1]]])
+    first_of = np.empty(count, dtype=np.int64)
+    first_of[order] = order[new_key][np.cumsum(new_key) - 1]
+    # Keys can collide, so copies are confirmed on the whole signature
+    copies = first_of != np.arange(count)
+    for start in range(0, count, LINK_BATCH_SIZE):
+        batch = slice(start, start + LINK_BATCH_SIZE)
+        same = signatures[batch] == signatures[first_of[batch]]
+        copies[batch] &= same.all(axis=1)
+    left = [first_of[copies]]
+    right = [np.flatnonzero(copies)]
+    distinct = np.flatnonzero(~copies)
+
+    for band in range(bands):
+        # Hash the band's signature values into one bucket key per row
+        keys = np.zeros(len(distinct), dtype=np.uint64)
+        for column in range(band * rows_per_band, (band + 1) * rows_per_band):
+            keys = keys * BAND_PRIME + signatures[distinct, column]
+        order = np.argsort(keys, kind="stable")
+        same = keys[order[1:]] == keys[order[:-1]]
+
+        # Keep only pairs whose estimated similarity reaches the threshold
+        for batch_left, batch_right in bucket_pairs(distinct[order], same):
+            agreement = signatures[batch_left] == signatures[batch_right]
+            similar = agreement.mean(axis=1) >= threshold
+            left.append(batch_left[similar])
+            right.append(batch_right[similar])
+
+    left = np.concatenate(left)
+    right = np.concatenate(right)
+    if len(left) == 0:
+        return np.zeros(count, dtype=np.int64), 0
+
+    # Every component is labelled by its first row, so sorted labels number
+    # the clusters in order of first appearance
+    labels = connected_components(count, left, right)
+    sizes = np.bincount(labels, minlength=count)
+    clustered = sizes[labels] > 1
+
+    cluster_ids = np.zeros(count, dtype=np.int64)
+    roots = np.unique(labels[clustered])
+    cluster_ids[clustered] = np.searchsorted(roots, labels[clustered]) + 1
+    return cluster_ids, len(roots)
@@ -0,0 +1,196 @@
+"""
+Value Normalization
+Optional clean-up of values before rows are hashed, so that rows differing
+only in spacing, case, Unicode form, float noise or date format compare as
+equal. Columns are normalized one at a time, and text only once per
+distinct value. Also brings text fields read out of core to the form of the
+typed values compared in memory.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+NORMALIZE_STEPS = ["trim", "casefold", "nfkc", "round", "dates"]
+NORMALIZE_HELP = "trim, casefold, nfkc, round=DECIMALS, dates"
+DATE_FORMAT = "%Y-%m-%d"
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+INTEGER_PATTERN = r"\s*[+-]?\d+\s*"
+INTEGER_PARTS = r"\s*([+-]?)0*(\d+)\s*"
+# A date needs a year: four digits, or day, month and two-digit year
+DATE_PATTERN = r"\d{4}|\d{1,2}[-/.]\d{1,2}[-/.]\d{2}"
+
+# The fields read_csv reads as missing values by default
+MISSING_TEXT = {
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+}
+
+
+class Normalizer:
+    """Column-wise normalization steps applied before hashing.
+
+    trim strips surrounding whitespace, casefold folds case, nfkc applies
+    Unicode NFKC normalization, decimals rounds numbers (including numbers
+    written as text) to that many decimals, and dates rewrites text dates as
+    ISO 8601 ('2024-01-31', with a time only when there is one). Text dates
+    are parsed month first, like pandas does, and must carry a year, so
+    text that merely looks like a date ('1-2', '3/4') is left alone. Every
+    value is decided on its own, so it normalizes the same way whichever
+    chunk or file it is read in.
+    """
+
+    def __init__(
+        self, trim=False, casefold=False, nfkc=False, decimals=None, dates=False
+    ):
+        self.trim = trim
+        self.casefold = casefold
+        self.nfkc = nfkc
+        self.decimals = decimals
+        self.dates = dates
+
+    @classmethod
+    def from_text(cls, text):
+        """Parse 'trim,casefold,nfkc,round=2,dates'; None when it is empty."""
+        options = {}
+        for step in (text or "").split(","):
+            name, _, value = step.strip().lower().partition("=")
+            if not name:
+                continue
+            if name not in NORMALIZE_STEPS:
+                raise ValueError(
+                    f"Unknown normalization step: {name} "
+                    f"(choose from {', '.join(NORMALIZE_STEPS)})"
+                )
+            if name == "round":
+                options["decimals"] = int(value or 0)
+            else:
+                options[name] = True
+        return cls(**options) if options else None
+
+    def __str__(self):
+        steps = [name for name in ["trim", "casefold", "nfkc"] if getattr(self, name)]
+        if self.decimals is not None:
+            steps.append(f"round={self.decimals}")
+        if self.dates:
+            steps.append("dates")
+        return ",".join(steps)
+
+    def __bool__(self):
+        return bool(str(self))
+
+    def with_casefold(self):
+        """Return a copy that also folds case."""
+        return Normalizer(self.trim, True, self.nfkc, self.decimals, self.dates)
+
+    def series(self, series):
+        """Return the normalized values of one column.
+
+        Numbers stay numbers and text stays text; other dtypes pass through.
+        Text is normalized once per distinct value and mapped back to rows.
+        """
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_datetime64_any_dtype(
+            series
+        ):
+            return series
+        if pd.api.types.is_float_dtype(series):
+            if self.decimals is None:
+                return series
+            # Adding 0.0 turns -0.0 into 0.0 so both hash alike
+            return series.round(self.decimals) + 0.0
+        if pd.api.types.is_numeric_dtype(series):
+            return series
+
+        codes, uniques = pd.factorize(series)
+        values = self.text(pd.Series(np.asarray(uniques, dtype=object)))
+        values = np.append(values.to_numpy(dtype=object), np.nan)
+        return pd.Series(values[codes], index=series.index, dtype=object)
+
+    def text(self, values):
+        """Normalize a series of the distinct non-missing values of a column as text."""
+        values = values.astype(str)
+        if self.nfkc:
+            values = values.str.normalize("NFKC")
+        if self.trim:
+            values = values.str.strip()
+        if self.casefold:
+            values = values.str.casefold()
+
+        if self.decimals is None and not self.dates:
+            return values
+
+        numbers = pd.to_numeric(values, errors="coerce")
+        numeric = numbers.notna() & values.str.strip().ne("")
+        if self.decimals is not None and numeric.any():
+            rounded = numbers[numeric].astype(float).round(self.decimals) + 0.0
+            values[numeric] = rounded.astype(str)
+
+        if self.dates:
+            candidates = ~numeric & values.str.contains(DATE_PATTERN, regex=True)
+            parsed = pd.to_datetime(
+                values[candidates], errors="coerce", format="mixed", utc=True
+            ).dt.tz_localize(None)
+            parsed = parsed[parsed.notna()]
+            has_time = parsed != parsed.dt.normalize()
+            values[parsed.index] = np.where(
+                has_time,
+                parsed.dt.strftime(DATETIME_FORMAT),
+                parsed.dt.strftime(DATE_FORMAT),
+            )
+        return values
+
+
+def canonical_text(series):
+    """Rewrite text fields so they key like the typed values pandas would read.
+
+    Numbers are written in one form, so '5', '5.0', '+05' and '5e0' agree
+    like an int column and a float column do once aligned, and the markers
+    read_csv takes for missing values all become ''. Integers are kept
+    exact; other numbers go through float64. Each distinct value is
+    rewritten once.
+    """
+    codes, uniques = pd.factorize(series)
+    text = pd.Series(np.asarray(uniques, dtype=object)).astype(str)
+    numbers = pd.to_numeric(text, errors="coerce").to_numpy(dtype=float)
+    finite = np.isfinite(numbers)
+    integers = text.str.fullmatch(INTEGER_PATTERN).to_numpy(dtype=bool)
+    integral = finite & ~integers
+    integral[integral] = numbers[integral] % 1 == 0
+    decimal = finite & ~integers & ~integral
+
+    values = text.to_numpy(dtype=object)
+    # Integers are rewritten as text, so there is no limit on their digits
+    parts = text[integers].str.extract(INTEGER_PARTS)
+    signs = parts[0].where(parts[0].eq("-") & parts[1].ne("0"), "")
+    values[integers] = (signs + parts[1]).to_numpy(dtype=object)
+    values[integral] = [str(int(value)) for value in numbers[integral]]
+    values[decimal] = [repr(float(value)) for value in numbers[decimal]]
+    values[text.isin(MISSING_TEXT).to_numpy()] = ""
+    values = np.append(values, "")
+    return pd.Series(values[codes], index=series.index, dtype=object)
+
+
+def parse_normalizer(text):
+    """Parse a --normalize option into a Normalizer, or None when empty."""
+    try:
+        return Normalizer.from_text(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
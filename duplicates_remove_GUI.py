@@ -1,17 +1,33 @@
 #!/usr/bin/env python3
 """
 Duplicate Row Remover with GUI
-Removes duplicate rows from CSV files based on 'is_duplicate' column and shows removed data.
+Removes duplicate rows from CSV files based on 'is_duplicate' (or the detector's
+'is_duplicate_row') column and shows removed data.
 Works with files generated by the Duplicate Detector.
 """
 
 import os
 import threading
 import tkinter as tk
+from functools import partial
 from pathlib import Path
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 
-import pandas as pd
+from duplicates_engine import (
+    FLAG_COLUMNS,
+    default_workers,
+    remove_flagged_rows,
+    run_file_tasks,
+    sheet_label,
+)
+from duplicates_io import (
+    FILE_DIALOG_TYPES,
+    SUPPORTED_EXTENSIONS,
+    output_suffix,
+    read_columns,
+)
+from duplicates_log import QueuedLog
+from duplicates_report import render_rows
 
 
 class DuplicateRemoverGUI:
@@ -24,9 +40,11 @@ class DuplicateRemoverGUI:
         # Variables
         self.input_files = []
         self.output_directory = tk.StringVar()
+        self.sheet_name = tk.StringVar()
         self.removal_stats = {}
 
         self.create_widgets()
+        self.log_queue = QueuedLog(self.root, self.log_text, "duplicate_remover")
 
     def create_widgets(self):
         # Main frame
@@ -47,7 +65,7 @@ class DuplicateRemoverGUI:
         # Description
         desc_label = ttk.Label(
             main_frame,
-            text="Remove duplicate rows from CSV files with 'is_duplicate' column",
+            text="Remove duplicate rows from files with an 'is_duplicate' or 'is_duplicate_row' column",
             font=("Arial", 10),
             foreground="gray",
         )
@@ -56,7 +74,7 @@ class DuplicateRemoverGUI:
         # Input Files Section
         ttk.Label(
             main_frame,
-            text="Input Files (with is_duplicate column):",
+            text="Input Files (with is_duplicate or is_duplicate_row column):",
             font=("Arial", 12, "bold"),
         ).grid(row=2, column=0, sticky=tk.W, pady=(0, 5))
 
@@ -113,6 +131,28 @@ class DuplicateRemoverGUI:
             variable=self.show_removed_data,
         ).grid(row=1, column=0, sticky=tk.W)
 
+        sheet_frame = ttk.Frame(options_frame)
+        sheet_frame.grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Label(sheet_frame, text="Excel sheet (blank = first sheet):").pack(
+            side=tk.LEFT
+        )
+        ttk.Entry(sheet_frame, textvariable=self.sheet_name, width=20).pack(
+            side=tk.LEFT, padx=(5, 0)
+        )
+
+        self.workers = tk.IntVar(value=default_workers())
+        workers_frame = ttk.Frame(options_frame)
+        workers_frame.grid(row=3, column=0, sticky=tk.W, pady=(5, 0))
+
+        ttk.Label(workers_frame, text="Worker processes:").pack(side=tk.LEFT)
+        ttk.Spinbox(
+            workers_frame,
+            from_=1,
+            to=max(default_workers(), 64),
+            textvariable=self.workers,
+            width=5,
+        ).pack(side=tk.LEFT, padx=(5, 0))
+
         # Output Directory Section
         ttk.Label(
             main_frame, text="Output Directory:", font=("Arial", 12, "bold")
@@ -170,46 +210,33 @@ class DuplicateRemoverGUI:
     def add_files(self):
         """Add CSV files to the processing list."""
         files = filedialog.askopenfilenames(
-            title="Select Files with 'is_duplicate' column",
-            filetypes=[
-                ("Supported files", "*.csv *.xlsx *.xls"),
-                ("CSV files", "*.csv"),
-                ("Excel files", "*.xlsx *.xls"),
-                ("All files", "*.*"),
-            ],
+            title="Select Files with 'is_duplicate' or 'is_duplicate_row' column",
+            filetypes=FILE_DIALOG_TYPES,
         )
 
+        files_added = 0
         for file in files:
             if file not in self.input_files:
-                # Validate file has is_duplicate column
+                # Validate file has a flag column
                 if self.validate_file(file):
                     self.input_files.append(file)
                     self.files_listbox.insert(tk.END, os.path.basename(file))
+                    files_added += 1
                 else:
                     messagebox.showwarning(
                         "Invalid File",
-                        f"File '{os.path.basename(file)}' does not contain 'is_duplicate' column.",
+                        f"File '{os.path.basename(file)}' does not contain an "
+                        f"'is_duplicate' or 'is_duplicate_row' column.",
                     )
 
-        self.log(
-            f"Added {len([f for f in files if self.validate_file(f)])} valid file(s)"
-        )
+        self.log(f"Added {files_added} valid file(s)")
 
     def validate_file(self, file_path):
-        """Validate that the file has the required 'is_duplicate' column."""
+        """Validate that the file has one of the flag columns."""
         try:
-            file_path = Path(file_path)
-            if file_path.suffix.lower() == ".csv":
-                df = pd.read_csv(
-                    file_path, nrows=1
-                )  # Read only first row to check columns
-            elif file_path.suffix.lower() in [".xlsx", ".xls"]:
-                df = pd.read_excel(
-                    file_path, nrows=1
-                )  # Read only first row to check columns
-            else:
-                return False
-            return "is_duplicate" in df.columns
+            # Read only the header (or schema) to check columns
+            columns = read_columns(file_path, self.selected_sheet())
+            return any(column in columns for column in FLAG_COLUMNS)
         except Exception:
             return False
 
@@ -220,10 +247,9 @@ class DuplicateRemoverGUI:
             return
 
         files_added = 0
-        supported_extensions = [".csv", ".xlsx", ".xls"]
 
         for file_path in Path(directory).iterdir():
-            if file_path.suffix.lower() in supported_extensions:
+            if file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
                 full_path = str(file_path)
                 if full_path not in self.input_files and self.validate_file(full_path):
                     self.input_files.append(full_path)
@@ -259,10 +285,8 @@ class DuplicateRemoverGUI:
             self.output_directory.set(directory)
 
     def log(self, message):
-        """Add message to the log."""
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Queue a message for the log; safe to call from the worker thread."""
+        self.log_queue(message)
 
     def validate_inputs(self):
         """Validate user inputs before processing."""
@@ -282,17 +306,17 @@ class DuplicateRemoverGUI:
 
         return True
 
-    def display_removed_data(self, filename, removed_df):
+    def display_removed_data(self, filename, removed_df, removed_count):
         """Display detailed information about removed duplicate rows."""
         if removed_df.empty:
             self.log(f"  No duplicate rows found in {filename}")
             return
 
-        self.log(f"  Removed {len(removed_df)} duplicate rows from {filename}:")
+        self.log(f"  Removed {removed_count} duplicate rows from {filename}:")
         self.log("  " + "-" * 60)
 
         # Show column headers
-        columns = [col for col in removed_df.columns if col != "is_duplicate"]
+        columns = [col for col in removed_df.columns if col not in FLAG_COLUMNS]
         header = "  | ".join(
             [f"{col[:15]:15}" for col in columns[:5]]
         )  # Show first 5 columns
@@ -301,129 +325,106 @@ class DuplicateRemoverGUI:
 
         # Show removed rows (limit to first 20 rows to avoid overwhelming the log)
         display_limit = min(20, len(removed_df))
-        for idx, (_, row) in enumerate(removed_df.head(display_limit).iterrows()):
-            row_data = []
-            for col in columns[:5]:  # Show first 5 columns
-                value = str(row[col])[:15]  # Truncate long values
-                row_data.append(f"{value:15}")
-
-            row_str = "  | ".join(row_data)
+        rows = render_rows(
+            removed_df.head(display_limit),
+            columns[:5],  # Show first 5 columns
+            width=15,
+            pad=True,
+            names=False,
+            separator="  | ",
+        )
+        for row_str in rows:
             self.log(f"  {row_str}")
 
-        if len(removed_df) > display_limit:
-            self.log(f"  ... and {len(removed_df) - display_limit} more rows")
+        if removed_count > display_limit:
+            self.log(f"  ... and {removed_count - display_limit} more rows")
 
         self.log("  " + "-" * 60)
 
-    def process_single_file(self, file_path, file_index, total_files):
-        """Process a single file to remove duplicates."""
-        try:
-            file_path = Path(file_path)
-            self.log(f"Processing ({file_index + 1}/{total_files}): {file_path.name}")
-
-            # Read the file based on its extension
-            if file_path.suffix.lower() == ".csv":
-                df = pd.read_csv(file_path)
-            elif file_path.suffix.lower() in [".xlsx", ".xls"]:
-                df = pd.read_excel(file_path)
-            else:
-                self.log(f"Error: Unsupported file format: {file_path.suffix}")
-                return
-
-            # Validate is_duplicate column exists
-            if "is_duplicate" not in df.columns:
-                self.log(f"Error: 'is_duplicate' column not found in {file_path.name}")
-                return
-
-            original_count = len(df)
-
-            # Separate duplicate and non-duplicate rows
-            duplicate_rows = df[df["is_duplicate"]]
-            # Clean data by removing duplicates
-            clean_df = df[~df["is_duplicate"]].copy()
-
-            # Remove the is_duplicate column from clean data
-            if "is_duplicate" in clean_df.columns:
-                clean_df = clean_df.drop("is_duplicate", axis=1)
-
-            removed_count = len(duplicate_rows)
-            remaining_count = len(clean_df)
-
-            # Store statistics
-            self.removal_stats[file_path.name] = {
-                "original": original_count,
-                "removed": removed_count,
-                "remaining": remaining_count,
-            }
-
-            # Create output filename
-            if self.keep_original.get():
-                output_filename = f"{file_path.stem}_cleaned.csv"
-            else:
-                output_filename = file_path.name
-
-            output_path = Path(self.output_directory.get()) / output_filename
-
-            # Save cleaned data
-            clean_df.to_csv(output_path, index=False)
-
-            # Log results
-            self.log(f"  Original rows: {original_count}")
-            self.log(f"  Removed duplicates: {removed_count}")
-            self.log(f"  Remaining rows: {remaining_count}")
-            self.log(f"  Saved as: {output_filename}")
-
-            # Show removed data if requested
-            if self.show_removed_data.get() and not duplicate_rows.empty:
-                self.display_removed_data(file_path.name, duplicate_rows)
-
-            self.log("-" * 70)
+    def selected_sheet(self):
+        """Return the Excel sheet to read, or None for the first sheet."""
+        return self.sheet_name.get().strip() or None
+
+    def output_path_for(self, file_path):
+        """Return the cleaned output path for an input file."""
+        file_path = Path(file_path)
+        if self.keep_original.get():
+            label = sheet_label(file_path, self.selected_sheet())
+            output_filename = f"{label.stem}_cleaned{output_suffix(file_path)}"
+        else:
+            output_filename = file_path.name
+
+        return Path(self.output_directory.get()) / output_filename
+
+    def log_file_result(
+        self, file_path, file_index, total_files, outcome, show_removed
+    ):
+        """Log the result of one file and record its removal statistics."""
+        file_path = Path(file_path)
+        result, lines, error = outcome
+        self.log(f"Processing ({file_index + 1}/{total_files}): {file_path.name}")
+
+        for line in lines:
+            self.log(line)
+
+        if error is not None:
+            self.log(f"Error processing {file_path.name}: {error}")
+            return
 
-        except Exception as e:
-            self.log(f"Error processing {file_path.name}: {str(e)}")
+        stats, duplicate_rows = result
+        self.removal_stats[file_path.name] = stats
+
+        # Show removed data if requested
+        if show_removed and not duplicate_rows.empty:
+            self.display_removed_data(file_path.name, duplicate_rows, stats["removed"])
 
-    def process_files(self):
-        """Process all selected files to remove duplicates."""
+        self.log("-" * 70)
+
+    def process_files(self, tasks, workers, output_directory, show_removed, sheet):
+        """Process all selected files to remove duplicates.
+
+        Runs on the worker thread; Tk updates go through the log queue.
+        """
         try:
             self.removal_stats.clear()
-            total_files = len(self.input_files)
+            total_files = len(tasks)
 
             self.log("Starting duplicate removal process...")
             self.log(f"Processing {total_files} file(s)")
             self.log("=" * 70)
 
-            # Set progress bar to determinate mode
-            self.progress.config(mode="determinate", maximum=total_files)
+            remove = partial(remove_flagged_rows, sheet_name=sheet)
+            results = run_file_tasks(remove, tasks, workers)
 
-            for i, file_path in enumerate(self.input_files):
-                self.process_single_file(file_path, i, total_files)
+            for i, ((file_path, _), outcome) in enumerate(zip(tasks, results)):
+                self.log_file_result(file_path, i, total_files, outcome, show_removed)
 
                 # Update progress bar
-                self.progress["value"] = i + 1
-                self.root.update_idletasks()
+                self.log_queue.call(self.progress.config, value=i + 1)
 
             # Generate summary report
-            self.generate_summary_report()
+            self.generate_summary_report(output_directory)
 
-            messagebox.showinfo(
+            self.log_queue.call(
+                messagebox.showinfo,
                 "Success",
                 f"Duplicate removal completed!\n\n"
                 f"Processed {total_files} file(s)\n"
-                f"Output saved to: {self.output_directory.get()}\n\n"
+                f"Output saved to: {output_directory}\n\n"
                 f"Check the log for detailed information about removed duplicates.",
             )
 
         except Exception as e:
             error_msg = f"An error occurred during processing: {str(e)}"
             self.log(error_msg)
-            messagebox.showerror("Error", error_msg)
+            self.log_queue.call(messagebox.showerror, "Error", error_msg)
 
         finally:
             # Re-enable the process button and reset progress bar
-            self.process_button.config(state=tk.NORMAL)
-            self.progress["value"] = 0
+            self.log_queue.call(self.process_button.config, state=tk.NORMAL)
+            self.log_queue.call(self.progress.config, value=0)
 
-    def generate_summary_report(self):
+    def generate_summary_report(self, output_directory):
         """Generate a summary report of the removal process."""
         self.log("=" * 70)
         self.log("DUPLICATE REMOVAL SUMMARY REPORT")
@@ -460,21 +461,35 @@ class DuplicateRemoverGUI:
             )
 
         self.log("=" * 70)
-        self.log(f"All cleaned files saved to: {self.output_directory.get()}")
+        self.log(f"All cleaned files saved to: {output_directory}")
 
     def start_processing(self):
         """Start the duplicate removal process in a separate thread."""
         if not self.validate_inputs():
             return
 
-        # Disable the process button
+        # Disable the process button and set the progress bar to determinate mode
         self.process_button.config(state=tk.DISABLED)
+        self.progress.config(mode="determinate", maximum=len(self.input_files))
 
         # Clear previous logs
-        self.log_text.delete(1.0, tk.END)
+        self.log_queue.clear()
+
+        # Read the settings here; the worker thread never touches Tk
+        tasks = [
+            (file_path, self.output_path_for(file_path))
+            for file_path in self.input_files
+        ]
+        args = (
+            tasks,
+            self.workers.get(),
+            self.output_directory.get(),
+            self.show_removed_data.get(),
+            self.selected_sheet(),
+        )
 
         # Start processing in a separate thread to keep GUI responsive
-        processing_thread = threading.Thread(target=self.process_files)
+        processing_thread = threading.Thread(target=self.process_files, args=args)
         processing_thread.daemon = True
         processing_thread.start()
 
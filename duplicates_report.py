@@ -0,0 +1,75 @@
+"""
+Duplicate Reports
+Formats bounded previews of duplicate rows with vectorized string operations
+and writes complete duplicate listings to report files.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+ROW_NUMBER_COLUMN = "row_number"
+
+
+def render_rows(df, columns, width=None, pad=False, names=True, separator=" | "):
+    """Render the given columns of every row as one string per row.
+
+    Values are cut to width characters, and padded to it when pad is set.
+    With names, each value is prefixed by its column name.
+    """
+    parts = []
+    for column in columns:
+        # numpy renders missing values as 'nan'/'None' instead of keeping them
+        values = pd.Series(
+            df[column].to_numpy(dtype=object).astype(str), index=df.index
+        ).astype(object)
+        if width is not None:
+            values = values.str[:width]
+            if pad:
+                values = values.str.ljust(width)
+        if names:
+            values = f"{column}: " + values
+        parts.append(values)
+
+    if not parts:
+        return pd.Series("", index=df.index, dtype=object)
+    return parts[0].str.cat(parts[1:], sep=separator)
+
+
+def preview_lines(df, row_numbers, max_columns=3):
+    """Return '  Row N: col: value | ...' lines for a sample of duplicate rows."""
+    if df.empty:
+        return []
+
+    numbers = pd.Series(row_numbers, index=df.index).astype(str)
+    text = render_rows(df, df.columns[:max_columns])
+    return ("  Row " + numbers + ": " + text + "...").tolist()
+
+
+def report_path_for(output_path):
+    """Return the path of the duplicate listing that goes with an output file."""
+    output_path = Path(output_path)
+    stem = output_path.stem.replace("_detected", "")
+    return output_path.with_name(f"{stem}_report.csv")
+
+
+def row_number_column(columns):
+    """Return ROW_NUMBER_COLUMN, suffixed with a number if columns already has it."""
+    name = ROW_NUMBER_COLUMN
+    suffix = 1
+    while name in columns:
+        name = f"{ROW_NUMBER_COLUMN}_{suffix}"
+        suffix += 1
+    return name
+
+
+def write_duplicate_report(df, row_numbers, report_path, append=False):
+    """Write duplicate rows with their 1-based row numbers to a CSV listing."""
+    listing = df.copy()
+    listing.insert(0, row_number_column(listing.columns), row_numbers)
+    listing.to_csv(
+        report_path,
+        mode="a" if append else "w",
+        header=not append,
+        index=False,
+    )
@@ -0,0 +1,232 @@
+"""
+Raw CSV Scanning
+Splits a memory-mapped CSV file into records and hashes each record's bytes
+with numpy, without parsing fields into a DataFrame.
+"""
+
+import numpy as np
+
+from duplicates_io import csv_record_ends
+
+SCAN_BLOCK_SIZE = 1024 * 1024
+HASH_PRIME = 0x100000001B3
+HASH_PRIME_INVERSE = pow(HASH_PRIME, -1, 1 << 64)
+QUOTE = ord('"')
+COMMA = ord(",")
+CARRIAGE_RETURN = ord("\r")
+ZERO = ord("0")
+MINUS = ord("-")
+DOT = ord(".")
+# Classes of the bytes a number can hold, and of the missing-value markers
+DIGIT, NUMBER_OTHER, DOT_CLASS, MINUS_CLASS, MARKER = 1, 2, 3, 4, 5
+BYTE_CLASSES = np.zeros(256, dtype=np.uint8)
+BYTE_CLASSES[list(b"0123456789")] = DIGIT
+BYTE_CLASSES[list(b"+eE \t")] = NUMBER_OTHER
+BYTE_CLASSES[DOT] = DOT_CLASS
+BYTE_CLASSES[MINUS] = MINUS_CLASS
+BYTE_CLASSES[list(b"nN#")] = MARKER
+# Bytes of each class are counted per field in 12-bit lanes of an int64
+LANE_BITS = 12
+LANE_MASK = (1 << LANE_BITS) - 1
+CLASS_COUNTS = np.zeros(256, dtype=np.int64)
+for lane, kind in enumerate([DIGIT, NUMBER_OTHER, DOT_CLASS, MINUS_CLASS, MARKER]):
+    CLASS_COUNTS[BYTE_CLASSES == kind] = 1 << (LANE_BITS * lane)
+MAX_MARKER_LENGTH = 8
+# Decimals of up to this many digits are written back unchanged by repr
+MAX_PLAIN_DIGITS = 15
+
+TRUE_SUFFIX = b",True\n"
+FALSE_SUFFIX = b",False\n"
+
+
+def iter_record_blocks(data, block_size=SCAN_BLOCK_SIZE):
+    """Yield the (starts, stops) byte offsets of CSV records, one block at a time.
+
+    Stops exclude the line ending. A block grows until it holds at least one
+    complete record, so records longer than the block size are still found.
+    """
+    total = len(data)
+    position = 0
+    size = block_size
+
+    while position < total:
+        end = min(position + size, total)
+        ends = position + csv_record_ends(data[position:end])
+
+        if end < total:
+            if len(ends) == 0:
+                size *= 2
+                continue
+        elif len(ends) == 0 or ends[-1] + 1 < total:
+            # The last record has no line ending
+            ends = np.append(ends, total)
+
+        starts = np.concatenate([[position], ends[:-1] + 1])
+        stops = ends - ((ends > starts) & (data[ends - 1] == CARRIAGE_RETURN))
+        yield starts, stops
+
+        position = int(ends[-1]) + 1
+        size = block_size
+
+
+def suspect_records(data, starts, stops):
+    """Find the records of a block holding a field canonical_text may rewrite.
+
+    Those are numbers not written the way canonical_text writes them ('5.0',
+    '+5', '05', '1e3', ' 5', '0.50') and short fields holding 'n', 'N' or
+    '#', like the missing-value markers 'NA', 'null' or '#N/A'. Decimals of
+    up to 15 digits without trailing zeros are already in that form. Every
+    other field keys the same as its raw bytes. Quotes are ignored, like in
+    RecordHasher.
+
+    Returns a flag per record and the set of column positions of the fields
+    found.
+    """
+    base = int(starts[0])
+    block = data[base : int(stops[-1])]
+
+    # Unquoted commas and line endings separate the fields of a block
+    quotes = block == QUOTE
+    quoted = (np.cumsum(quotes, dtype=np.uint8) - quotes) & 1 == 1
+    commas = (block == COMMA) & ~quoted
+    boundary = commas.copy()
+    endings = stops[:-1] - base
+    boundary[endings] = True
+    boundary[endings[starts[1:] - stops[:-1] == 2] + 1] = True
+    field_ids = np.cumsum(boundary, dtype=np.int64)
+
+    flags = np.zeros(len(starts), dtype=bool)
+    content = np.flatnonzero(~boundary & ~quotes)
+    if len(content) == 0:
+        return flags, set()
+    values = block[content]
+    fields = field_ids[content]
+    firsts = np.flatnonzero(np.diff(fields, prepend=-1) != 0)
+    lasts = np.append(firsts[1:], len(fields)) - 1
+    lengths = lasts - firsts + 1
+
+    # One count per byte class, summed per field in lanes of one int64
+    counts = np.add.reduceat(CLASS_COUNTS[values], firsts)
+    digits, others, dots, minuses, markers = [
+        (counts >> (LANE_BITS * lane)) & LANE_MASK for lane in range(5)
+    ]
+    long_fields = lengths > LANE_MASK
+    numeric = (digits > 0) & (digits + others + dots + minuses == lengths)
+
+    # Content bytes of the numeric fields by offset, 0 past their end
+    candidates = np.flatnonzero(numeric & ~long_fields)
+    candidate_firsts = firsts[candidates]
+    candidate_lasts = lasts[candidates]
+
+    def byte_at(offsets):
+        positions = candidate_firsts + offsets
+        inside_field = positions <= candidate_lasts
+        result = np.zeros(len(candidates), dtype=np.uint8)
+        result[inside_field] = values[positions[inside_field]]
+        return result
+
+    signed = (values[candidate_firsts] == MINUS).astype(np.int64)
+    lead = byte_at(signed)
+    after_lead = byte_at(signed + 1)
+    last = values[candidate_lasts]
+    small = (lead == ZERO) & np.all(
+        [byte_at(signed + offset) == ZERO for offset in range(2, 6)], axis=0
+    )
+    lead_digit = BYTE_CLASSES[lead] == DIGIT
+    candidate_lengths = lengths[candidates]
+    candidate_digits = digits[candidates]
+    candidate_others = others[candidates]
+    candidate_dots = dots[candidates]
+    candidate_minuses = minuses[candidates]
+
+    sign_ok = (candidate_minuses == 0) | ((candidate_minuses == 1) & (signed == 1))
+    lead_ok = lead_digit & ((lead != ZERO) | (candidate_lengths == signed + 1))
+    integer = (candidate_others == 0) & (candidate_dots == 0) & lead_ok
+    decimal = (
+        (candidate_dots == 1)
+        & (candidate_others == 0)
+        & lead_digit
+        & ((lead != ZERO) | (after_lead == DOT))
+        & (BYTE_CLASSES[last] == DIGIT)
+        & (last != ZERO)
+        & (candidate_digits <= MAX_PLAIN_DIGITS)
+        & ~small
+    )
+    plain = sign_ok & (integer | decimal) & ~((signed == 1) & (lead == ZERO) & integer)
+    suspect = ((markers > 0) & (lengths <= MAX_MARKER_LENGTH)) | long_fields
+    suspect[candidates[~plain]] = True
+
+    # Fields found, by record and by position within their record
+    suspect_firsts = content[firsts[suspect]]
+    records = np.searchsorted(starts - base, suspect_firsts, side="right") - 1
+    flags[records] = True
+    comma_positions = np.flatnonzero(commas)
+    positions = np.searchsorted(comma_positions, suspect_firsts) - np.searchsorted(
+        comma_positions, starts[records] - base
+    )
+    return flags, set(positions.tolist())
+
+
+def hash_powers(length):
+    """Return the powers of the hash prime and of its inverse modulo 2**64."""
+    powers = np.full(length, HASH_PRIME, dtype=np.uint64)
+    inverse_powers = np.full(length, HASH_PRIME_INVERSE, dtype=np.uint64)
+    powers[0] = inverse_powers[0] = 1
+    with np.errstate(over="ignore"):
+        return np.cumprod(powers), np.cumprod(inverse_powers)
+
+
+def finalize_hashes(hashes):
+    """Mix the bits of 64-bit hashes (splitmix64 finalizer)."""
+    hashes = hashes ^ (hashes >> np.uint64(30))
+    hashes *= np.uint64(0xBF58476D1CE4E5B9)
+    hashes ^= hashes >> np.uint64(27)
+    hashes *= np.uint64(0x94D049BB133111EB)
+    return hashes ^ (hashes >> np.uint64(31))
+
+
+class RecordHasher:
+    """Hash the normalized bytes of CSV records with a polynomial hash.
+
+    Quote characters are left out of the hash so that a field hashes the same
+    whether or not it was quoted; callers verify equal hashes by parsing the
+    records they report. Each record's hash is computed from prefix sums over
+    its block, so hashing costs a few numpy passes over the bytes.
+    """
+
+    def __init__(self):
+        self.powers, self.inverse_powers = hash_powers(SCAN_BLOCK_SIZE + 1)
+
+    def hash_records(self, data, starts, stops):
+        """Return one uint64 hash per record of a block."""
+        base = int(starts[0])
+        block = data[base : int(stops[-1])]
+
+        keep = block != QUOTE
+        kept_before = np.zeros(len(block) + 1, dtype=np.int64)
+        np.cumsum(keep, out=kept_before[1:])
+        compact = block[keep]
+
+        if len(compact) + 1 > len(self.powers):
+            self.powers, self.inverse_powers = hash_powers(len(compact) + 1)
+
+        prefix = np.zeros(len(compact) + 1, dtype=np.uint64)
+        weighted = (compact.astype(np.uint64) + np.uint64(1)) * self.powers[
+            : len(compact)
+        ]
+        np.cumsum(weighted, out=prefix[1:])
+
+        first = kept_before[starts - base]
+        last = kept_before[stops - base]
+        hashes = (prefix[last] - prefix[first]) * self.inverse_powers[first]
+        hashes ^= (last - first).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        return finalize_hashes(hashes)
+
+
+def write_flagged_records(output, data, starts, stops, flags):
+    """Write records straight from the buffer with their duplicate flag appended."""
+    view = memoryview(data)
+    suffixes = (FALSE_SUFFIX, TRUE_SUFFIX)
+    for start, stop, flag in zip(starts.tolist(), stops.tolist(), flags.tolist()):
+        output.write(view[start:stop])
+        output.write(suffixes[flag])
@@ -0,0 +1,175 @@
+"""
+Schema Profiles
+Learns compact column dtypes from a sample of a CSV file and remembers them
+in a JSON file, so later reads of the same or similarly named files skip
+pandas' type inference and produce smaller dataframes.
+"""
+
+import json
+import os
+import re
+import time
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow-backed strings are optional
+    pa = None
+
+SCHEMA_FILENAME = ".duplicates_schema.json"
+SAMPLE_ROWS = 10_000
+CATEGORY_RATIO = 0.5
+LOCK_TIMEOUT = 30
+LOCK_POLL_INTERVAL = 0.01
+
+
+def schema_key(file_path):
+    """Return the name that similarly named files share, digits wildcarded.
+
+    'sales_2024-01.csv' and 'sales_2024-02.csv' both become 'sales_#-#.csv'.
+    """
+    return re.sub(r"\d+", "#", Path(file_path).name.lower())
+
+
+def compact_dtypes(df):
+    """Infer compact dtypes for the columns of a dataframe.
+
+    Strings with few distinct values become categories and other strings
+    Arrow-backed strings. Integers are read as int64 and returned in the
+    list of columns to downcast once the real values are known, since the
+    CSV parser silently wraps values that overflow a narrower type.
+    """
+    dtypes = {}
+    downcast = []
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_bool_dtype(series):
+            dtypes[column] = "bool"
+        elif pd.api.types.is_integer_dtype(series):
+            dtypes[column] = "int64"
+            downcast.append(column)
+        elif pd.api.types.is_float_dtype(series):
+            dtypes[column] = "float64"
+        elif pd.api.types.infer_dtype(series, skipna=True) == "string":
+            count = int(series.notna().sum())
+            if series.nunique() <= CATEGORY_RATIO * count:
+                dtypes[column] = "category"
+            elif pa is not None:
+                dtypes[column] = "string[pyarrow]"
+    return dtypes, downcast
+
+
+def downcast_integers(df, columns):
+    """Store integer columns in the smallest integer type that holds them."""
+    for column in columns:
+        df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+class SchemaStore:
+    """JSON file of compact column dtypes, keyed by file name pattern.
+
+    A stored schema is used for a file whose name matches the pattern and
+    whose header has exactly the stored columns. When the data no longer
+    fits the stored dtypes, the file is read with plain inference and the
+    schema is learned again from the whole file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.schemas = self.load()
+
+    def load(self):
+        """Read the stored schemas, or none when the file is missing or unreadable."""
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except ValueError:
+            return {}
+
+    @contextmanager
+    def locked(self):
+        """Hold a lock file next to the schemas, shared by all processes.
+
+        A lock older than LOCK_TIMEOUT seconds is taken to be left over
+        from a crashed run and broken.
+        """
+        lock_path = self.path.with_name(f"{self.path.name}.lock")
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - lock_path.stat().st_mtime > LOCK_TIMEOUT:
+                        lock_path.unlink()
+                except FileNotFoundError:
+                    pass
+                time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+    def lookup(self, file_path, columns):
+        """Return the stored schema for a file, or None if there is none."""
+        entry = self.schemas.get(schema_key(file_path))
+        if entry is None or entry["columns"] != list(columns):
+            return None
+        return entry
+
+    def learn(self, file_path, df, previous=None):
+        """Profile a dataframe read from file_path and save its schema.
+
+        Columns whose dtype differs from a previous schema are left to
+        pandas' inference, so files sharing the schema read as they would
+        without it.
+        """
+        dtypes, downcast = compact_dtypes(df)
+        if previous is not None:
+            dtypes = {
+                column: dtype
+                for column, dtype in dtypes.items()
+                if previous["dtypes"].get(column) == dtype
+            }
+            downcast = [column for column in downcast if column in dtypes]
+        entry = {"columns": list(df.columns), "dtypes": dtypes, "downcast": downcast}
+        self.save(schema_key(file_path), entry)
+        return entry
+
+    def save(self, key, entry):
+        """Store one schema on disk, keeping those saved by other processes.
+
+        The file is read again and rewritten atomically under the lock, so
+        workers learning schemas at the same time do not lose each other's.
+        """
+        with self.locked():
+            self.schemas = self.load()
+            self.schemas[key] = entry
+            temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps(self.schemas, indent=1), encoding="utf-8")
+            os.replace(temp_path, self.path)
+
+    def read_csv(self, file_path):
+        """Read a CSV file with its stored schema, learning one from a sample first."""
+        columns = pd.read_csv(file_path, nrows=0).columns
+        entry = self.lookup(file_path, columns)
+        if entry is None:
+            entry = self.learn(file_path, pd.read_csv(file_path, nrows=SAMPLE_ROWS))
+
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                df = pd.read_csv(file_path, dtype=entry["dtypes"])
+        except (ValueError, TypeError):
+            # The file does not fit the schema; keep only what it agrees with
+            df = pd.read_csv(file_path)
+            entry = self.learn(file_path, df, previous=entry)
+            df = df.astype(entry["dtypes"])
+
+        return downcast_integers(df, entry["downcast"])
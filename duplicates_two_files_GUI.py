@@ -12,7 +12,22 @@ from pathlib import Path
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 
 import pandas as pd
-from openpyxl.styles import PatternFill
+
+from duplicates_compare import (
+    compare_dataframes,
+    compare_files_partitioned,
+    save_comparison_results,
+)
+from duplicates_engine import read_input_files
+from duplicates_io import (
+    EXCEL_EXTENSIONS,
+    FILE_DIALOG_TYPES,
+    excel_sheet_names,
+    read_columns,
+)
+from duplicates_log import QueuedLog
+from duplicates_normalize import NORMALIZE_HELP, Normalizer
+from duplicates_report import render_rows
 
 
 class FileComparisonGUI:
@@ -25,16 +40,23 @@ class FileComparisonGUI:
         # Variables
         self.file1_path = tk.StringVar()
         self.file2_path = tk.StringVar()
+        self.sheet1 = tk.StringVar()
+        self.sheet2 = tk.StringVar()
         self.output_directory = tk.StringVar()
         self.output_format = tk.StringVar(value="csv")
         self.comparison_mode = tk.StringVar(value="exact")
         self.include_unique = tk.BooleanVar(value=True)
         self.highlight_duplicates = tk.BooleanVar(value=True)
+        self.out_of_core = tk.BooleanVar(value=False)
+        self.prefilter = tk.BooleanVar(value=False)
+        self.normalize = tk.StringVar()
 
         # Data storage
         self.comparison_results = {}
+        self.settings = {}
 
         self.create_widgets()
+        self.log_queue = QueuedLog(self.root, self.log_text, "file_comparison")
 
     def create_widgets(self):
         # Main frame with notebook for tabs
@@ -106,9 +128,17 @@ class FileComparisonGUI:
         ttk.Button(
             file1_frame,
             text="Browse",
-            command=lambda: self.browse_file(self.file1_path, "Select First File"),
+            command=lambda: self.browse_file(
+                self.file1_path, "Select First File", self.sheet1_combo
+            ),
         ).grid(row=0, column=1)
 
+        ttk.Label(file1_frame, text="Sheet:").grid(row=0, column=2, padx=(10, 5))
+        self.sheet1_combo = ttk.Combobox(
+            file1_frame, textvariable=self.sheet1, state="readonly", width=15
+        )
+        self.sheet1_combo.grid(row=0, column=3)
+
         # File 2
         ttk.Label(files_frame, text="File 2:", font=("Arial", 11, "bold")).grid(
             row=2, column=0, sticky=tk.W, pady=(10, 5)
@@ -128,9 +158,17 @@ class FileComparisonGUI:
         ttk.Button(
             file2_frame,
             text="Browse",
-            command=lambda: self.browse_file(self.file2_path, "Select Second File"),
+            command=lambda: self.browse_file(
+                self.file2_path, "Select Second File", self.sheet2_combo
+            ),
         ).grid(row=0, column=1)
 
+        ttk.Label(file2_frame, text="Sheet:").grid(row=0, column=2, padx=(10, 5))
+        self.sheet2_combo = ttk.Combobox(
+            file2_frame, textvariable=self.sheet2, state="readonly", width=15
+        )
+        self.sheet2_combo.grid(row=0, column=3)
+
         # Comparison Settings
         settings_frame = ttk.LabelFrame(
             self.setup_tab, text="Comparison Settings", padding="15"
@@ -180,6 +218,17 @@ class FileComparisonGUI:
             self.columns_frame, text="Load Columns", command=self.load_columns
         ).grid(row=1, column=1, padx=(10, 0), sticky=tk.N)
 
+        # Value normalization before rows are compared
+        normalize_frame = ttk.Frame(settings_frame)
+        normalize_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=(0, 15))
+
+        ttk.Label(normalize_frame, text=f"Normalize values ({NORMALIZE_HELP}):").grid(
+            row=0, column=0, sticky=tk.W
+        )
+        ttk.Entry(normalize_frame, textvariable=self.normalize, width=30).grid(
+            row=1, column=0, sticky=tk.W, pady=(5, 0)
+        )
+
         # Output Settings
         output_frame = ttk.LabelFrame(
             self.setup_tab, text="Output Settings", padding="15"
@@ -222,6 +271,12 @@ class FileComparisonGUI:
             variable=self.output_format,
             value="xlsx",
         ).pack(anchor=tk.W)
+        ttk.Radiobutton(
+            format_frame, text="Parquet", variable=self.output_format, value="parquet"
+        ).pack(anchor=tk.W)
+        ttk.Radiobutton(
+            format_frame, text="Feather", variable=self.output_format, value="feather"
+        ).pack(anchor=tk.W)
 
         # Additional Options
         ttk.Label(
@@ -236,6 +291,16 @@ class FileComparisonGUI:
             text="Highlight duplicates (Excel only)",
             variable=self.highlight_duplicates,
         ).grid(row=6, column=0, sticky=tk.W)
+        ttk.Checkbutton(
+            output_frame,
+            text="Out-of-core comparison for very large files (CSV output)",
+            variable=self.out_of_core,
+        ).grid(row=7, column=0, sticky=tk.W)
+        ttk.Checkbutton(
+            output_frame,
+            text="Prefilter out-of-core rows with a Bloom filter (mostly different files)",
+            variable=self.prefilter,
+        ).grid(row=8, column=0, sticky=tk.W)
 
         # Process Button
         self.process_button = ttk.Button(
@@ -294,19 +359,26 @@ class FileComparisonGUI:
         self.results_tab.columnconfigure(0, weight=1)
         self.results_tab.rowconfigure(3, weight=1)
 
-    def browse_file(self, path_var, title):
+    def browse_file(self, path_var, title, sheet_combo):
         """Browse for input files."""
         file_path = filedialog.askopenfilename(
             title=title,
-            filetypes=[
-                ("Supported files", "*.csv *.xlsx *.xls"),
-                ("CSV files", "*.csv"),
-                ("Excel files", "*.xlsx *.xls"),
-                ("All files", "*.*"),
-            ],
+            filetypes=FILE_DIALOG_TYPES,
         )
         if file_path:
             path_var.set(file_path)
+            self.load_sheets(file_path, sheet_combo)
+
+    def load_sheets(self, file_path, sheet_combo):
+        """Offer the sheets of an Excel workbook, with the first one selected."""
+        sheets = []
+        if Path(file_path).suffix.lower() in EXCEL_EXTENSIONS:
+            try:
+                sheets = excel_sheet_names(file_path)
+            except Exception as e:
+                messagebox.showerror("Error", f"Error reading sheets: {str(e)}")
+        sheet_combo.config(values=sheets)
+        sheet_combo.set(sheets[0] if sheets else "")
 
     def browse_output_directory(self):
         """Browse for output directory."""
@@ -321,12 +393,12 @@ class FileComparisonGUI:
             return
 
         try:
-            # Read first few rows to get column names
-            df1 = self.read_file(self.file1_path.get(), nrows=1)
-            df2 = self.read_file(self.file2_path.get(), nrows=1)
+            # Read only the headers (or schemas) to get column names
+            columns1 = read_columns(self.file1_path.get(), self.sheet1.get() or None)
+            columns2 = read_columns(self.file2_path.get(), self.sheet2.get() or None)
 
             # Get common columns
-            common_columns = list(set(df1.columns) & set(df2.columns))
+            common_columns = list(set(columns1) & set(columns2))
 
             if not common_columns:
                 messagebox.showwarning(
@@ -346,27 +418,14 @@ class FileComparisonGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Error loading columns: {str(e)}")
 
-    def read_file(self, file_path, nrows=None):
-        """Read file based on extension."""
-        file_ext = Path(file_path).suffix.lower()
-
-        if file_ext == ".csv":
-            return pd.read_csv(file_path, nrows=nrows)
-        elif file_ext in [".xlsx", ".xls"]:
-            return pd.read_excel(file_path, nrows=nrows)
-        else:
-            raise ValueError(f"Unsupported file format: {file_ext}")
-
     def log(self, message):
-        """Add message to the log."""
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Queue a message for the log; safe to call from the worker thread."""
+        self.log_queue(message)
 
     def update_summary(self, key, value):
-        """Update summary labels."""
+        """Queue an update of a summary label; safe from the worker thread."""
         if key in self.summary_labels:
-            self.summary_labels[key].config(text=str(value))
+            self.log_queue.call(self.summary_labels[key].config, text=str(value))
 
     def validate_inputs(self):
         """Validate user inputs."""
@@ -403,244 +462,187 @@ class FileComparisonGUI:
                 )
                 return False
 
-        return True
-
-    def prepare_dataframes_for_comparison(self, df1, df2):
-        """Prepare dataframes based on comparison mode."""
-        mode = self.comparison_mode.get()
-
-        if mode == "selected_columns":
-            # Get selected columns
-            selected_indices = self.columns_listbox.curselection()
-            selected_columns = [self.columns_listbox.get(i) for i in selected_indices]
-
-            # Filter dataframes to selected columns only
-            df1_compare = df1[selected_columns].copy()
-            df2_compare = df2[selected_columns].copy()
-
-        elif mode == "case_insensitive":
-            # Convert all string columns to lowercase
-            df1_compare = df1.copy()
-            df2_compare = df2.copy()
+        try:
+            Normalizer.from_text(self.normalize.get())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return False
 
-            for col in df1_compare.select_dtypes(include=["object"]).columns:
-                if col in df2_compare.columns:
-                    df1_compare[col] = df1_compare[col].astype(str).str.lower()
-                    df2_compare[col] = df2_compare[col].astype(str).str.lower()
+        return True
 
-        else:  # exact match
-            # Find common columns
-            common_columns = list(set(df1.columns) & set(df2.columns))
-            df1_compare = df1[common_columns].copy()
-            df2_compare = df2[common_columns].copy()
+    def selected_columns(self):
+        """Return the columns chosen in the column listbox."""
+        selected_indices = self.columns_listbox.curselection()
+        return [self.columns_listbox.get(i) for i in selected_indices]
 
-        return df1_compare, df2_compare
+    def read_settings(self):
+        """Return the comparison settings as plain values for the worker thread."""
+        mode = self.comparison_mode.get()
+        return {
+            "file1": self.file1_path.get(),
+            "file2": self.file2_path.get(),
+            "sheets": (self.sheet1.get() or None, self.sheet2.get() or None),
+            "output_directory": self.output_directory.get(),
+            "output_format": self.output_format.get(),
+            "mode": mode,
+            "selected_columns": (
+                self.selected_columns() if mode == "selected_columns" else None
+            ),
+            "include_unique": self.include_unique.get(),
+            "highlight_duplicates": self.highlight_duplicates.get(),
+            "out_of_core": self.out_of_core.get(),
+            "prefilter": self.prefilter.get(),
+            "normalizer": Normalizer.from_text(self.normalize.get()),
+        }
 
     def find_duplicates_between_files(self, df1, df2):
         """Find duplicate rows between two dataframes."""
-        # Prepare dataframes for comparison
-        df1_compare, df2_compare = self.prepare_dataframes_for_comparison(df1, df2)
-
-        # Add source indicators
-        df1_with_source = df1.copy()
-        df2_with_source = df2.copy()
-        df1_with_source["source_file"] = "File_1"
-        df2_with_source["source_file"] = "File_2"
-
-        # Find duplicates using merge
-        df1_compare.merge(df2_compare, how="inner", left_index=False, right_index=False)
-
-        # Get original rows that are duplicates
-        df1_with_source[
-            df1_compare.duplicated(keep=False)
-            | df1_compare.isin(df2_compare.to_dict("list")).all(axis=1)
-        ]
-        df2_with_source[
-            df2_compare.duplicated(keep=False)
-            | df2_compare.isin(df1_compare.to_dict("list")).all(axis=1)
-        ]
-
-        # Alternative approach - use merge to find matches
-        merged = df1_compare.reset_index().merge(
-            df2_compare.reset_index(),
-            on=list(df1_compare.columns),
-            how="inner",
-            suffixes=("_file1", "_file2"),
+        return compare_dataframes(
+            df1,
+            df2,
+            mode=self.settings["mode"],
+            selected_columns=self.settings["selected_columns"],
+            include_unique=self.settings["include_unique"],
+            normalizer=self.settings["normalizer"],
         )
 
-        if not merged.empty:
-            # Get the actual duplicate rows from original dataframes
-            file1_indices = merged["index_file1"].unique()
-            file2_indices = merged["index_file2"].unique()
-
-            duplicates_from_file1 = df1_with_source.iloc[file1_indices].copy()
-            duplicates_from_file2 = df2_with_source.iloc[file2_indices].copy()
-
-            # Combine all duplicates
-            all_duplicates = pd.concat(
-                [duplicates_from_file1, duplicates_from_file2], ignore_index=True
-            )
-        else:
-            all_duplicates = pd.DataFrame()
-
-        # Find unique rows
-        if self.include_unique.get():
-            # Rows in file1 but not in file2
-            file1_unique_mask = ~df1_compare.isin(df2_compare.to_dict("list")).all(
-                axis=1
-            )
-            file1_unique = df1_with_source[file1_unique_mask].copy()
-
-            # Rows in file2 but not in file1
-            file2_unique_mask = ~df2_compare.isin(df1_compare.to_dict("list")).all(
-                axis=1
-            )
-            file2_unique = df2_with_source[file2_unique_mask].copy()
-
-            unique_rows = pd.concat([file1_unique, file2_unique], ignore_index=True)
-        else:
-            unique_rows = pd.DataFrame()
-
-        return all_duplicates, unique_rows
-
     def save_results(self, duplicates_df, unique_df, file1_name, file2_name):
         """Save comparison results to file."""
         timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
         base_filename = f"comparison_{file1_name}_vs_{file2_name}_{timestamp}"
 
-        output_format = self.output_format.get()
-        output_dir = Path(self.output_directory.get())
-
-        if output_format == "csv":
-            # Save as separate CSV files
-            if not duplicates_df.empty:
-                duplicates_path = output_dir / f"{base_filename}_duplicates.csv"
-                duplicates_df.to_csv(duplicates_path, index=False)
-                self.log(f"Duplicates saved to: {duplicates_path.name}")
+        save_comparison_results(
+            duplicates_df,
+            unique_df,
+            self.settings["output_directory"],
+            base_filename,
+            output_format=self.settings["output_format"],
+            include_unique=self.settings["include_unique"],
+            highlight_duplicates=self.settings["highlight_duplicates"],
+            log=self.log,
+        )
 
-            if not unique_df.empty and self.include_unique.get():
-                unique_path = output_dir / f"{base_filename}_unique.csv"
-                unique_df.to_csv(unique_path, index=False)
-                self.log(f"Unique rows saved to: {unique_path.name}")
+    def log_comparison_results(self, counts):
+        """Update the summary and log the comparison statistics."""
+        duplicates_count = counts["duplicates1"] + counts["duplicates2"]
+
+        # Update summary
+        self.update_summary("Total rows in File 1", f"{counts['rows1']:,}")
+        self.update_summary("Total rows in File 2", f"{counts['rows2']:,}")
+        self.update_summary("Duplicates found", duplicates_count)
+        self.update_summary("Unique to File 1", counts["unique1"])
+        self.update_summary("Unique to File 2", counts["unique2"])
+
+        # Log detailed results
+        self.log("\n" + "=" * 60)
+        self.log("COMPARISON RESULTS")
+        self.log("=" * 60)
+        self.log(f"Total duplicate rows found: {duplicates_count}")
+        self.log(f"  - From File 1: {counts['duplicates1']}")
+        self.log(f"  - From File 2: {counts['duplicates2']}")
+
+        if self.settings["include_unique"]:
+            self.log(f"Unique rows: {counts['unique1'] + counts['unique2']}")
+            self.log(f"  - Unique to File 1: {counts['unique1']}")
+            self.log(f"  - Unique to File 2: {counts['unique2']}")
+
+        return duplicates_count
+
+    def compare_in_memory(self, file1_name, file2_name):
+        """Compare both files after loading them completely."""
+        # Read files
+        self.log("Reading input files...")
+        df1, df2 = read_input_files(
+            [self.settings["file1"], self.settings["file2"]],
+            workers=2,
+            sheet_names=list(self.settings["sheets"]),
+        )
 
-        else:  # Excel format
-            excel_path = output_dir / f"{base_filename}.xlsx"
+        self.log(f"File 1 ({file1_name}): {len(df1)} rows, {len(df1.columns)} columns")
+        self.log(f"File 2 ({file2_name}): {len(df2)} rows, {len(df2.columns)} columns")
+
+        # Find duplicates
+        self.log("Analyzing duplicates between files...")
+        duplicates_df, unique_df = self.find_duplicates_between_files(df1, df2)
+
+        # Calculate statistics
+        def count_from(df, label):
+            return int((df["source_file"] == label).sum()) if not df.empty else 0
+
+        counts = {
+            "rows1": len(df1),
+            "rows2": len(df2),
+            "duplicates1": count_from(duplicates_df, "File_1"),
+            "duplicates2": count_from(duplicates_df, "File_2"),
+            "unique1": count_from(unique_df, "File_1"),
+            "unique2": count_from(unique_df, "File_2"),
+        }
+        self.log_comparison_results(counts)
+
+        # Show sample duplicates
+        if not duplicates_df.empty:
+            self.log("\nSample duplicate rows (first 5):")
+            self.log("-" * 60)
+
+            sample_duplicates = duplicates_df.head(5)
+            # Show first few columns
+            cols_to_show = [
+                col for col in sample_duplicates.columns if col != "source_file"
+            ][:4]
+            previews = (
+                "["
+                + sample_duplicates["source_file"]
+                + "] "
+                + render_rows(sample_duplicates, cols_to_show, width=20)
+            )
+            for row_preview in previews:
+                self.log(row_preview)
 
-            with pd.ExcelWriter(excel_path, engine="openpyxl") as writer:
-                if not duplicates_df.empty:
-                    duplicates_df.to_excel(writer, sheet_name="Duplicates", index=False)
+        # Save results
+        self.log("\nSaving results...")
+        self.save_results(duplicates_df, unique_df, file1_name, file2_name)
 
-                if not unique_df.empty and self.include_unique.get():
-                    unique_df.to_excel(writer, sheet_name="Unique_Rows", index=False)
+        return counts
 
-                # Add highlighting if requested
-                if self.highlight_duplicates.get() and not duplicates_df.empty:
-                    workbook = writer.book
-                    if "Duplicates" in workbook.sheetnames:
-                        worksheet = workbook["Duplicates"]
-                        yellow_fill = PatternFill(
-                            start_color="FFFF00", end_color="FFFF00", fill_type="solid"
-                        )
+    def compare_out_of_core(self, file1_name, file2_name):
+        """Compare both files through on-disk hash partitions."""
+        timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
 
-                        # Highlight duplicate rows
-                        for row in range(2, len(duplicates_df) + 2):  # Skip header
-                            for col in range(1, len(duplicates_df.columns) + 1):
-                                cell = worksheet.cell(row=row, column=col)
-                                cell.fill = yellow_fill
+        counts = compare_files_partitioned(
+            self.settings["file1"],
+            self.settings["file2"],
+            self.settings["output_directory"],
+            f"comparison_{file1_name}_vs_{file2_name}_{timestamp}",
+            mode=self.settings["mode"],
+            selected_columns=self.settings["selected_columns"],
+            include_unique=self.settings["include_unique"],
+            log=self.log,
+            sheet_names=self.settings["sheets"],
+            prefilter=self.settings["prefilter"],
+            normalizer=self.settings["normalizer"],
+        )
+        self.log_comparison_results(counts)
 
-            self.log(f"Results saved to: {excel_path.name}")
+        return counts
 
     def compare_files(self):
-        """Main comparison logic."""
+        """Main comparison logic.
+
+        Runs on the worker thread; Tk updates go through the log queue.
+        """
         import time
 
         start_time = time.time()
 
         try:
-            # Read files
-            self.log("Reading input files...")
-            df1 = self.read_file(self.file1_path.get())
-            df2 = self.read_file(self.file2_path.get())
+            file1_name = Path(self.settings["file1"]).stem
+            file2_name = Path(self.settings["file2"]).stem
 
-            file1_name = Path(self.file1_path.get()).stem
-            file2_name = Path(self.file2_path.get()).stem
-
-            self.log(
-                f"File 1 ({file1_name}): {len(df1)} rows, {len(df1.columns)} columns"
-            )
-            self.log(
-                f"File 2 ({file2_name}): {len(df2)} rows, {len(df2.columns)} columns"
-            )
-
-            # Update summary
-            self.update_summary("Total rows in File 1", f"{len(df1):,}")
-            self.update_summary("Total rows in File 2", f"{len(df2):,}")
-
-            # Find duplicates
-            self.log("Analyzing duplicates between files...")
-            duplicates_df, unique_df = self.find_duplicates_between_files(df1, df2)
-
-            # Calculate statistics
-            duplicates_count = len(duplicates_df)
-            file1_duplicates = (
-                len(duplicates_df[duplicates_df["source_file"] == "File_1"])
-                if not duplicates_df.empty
-                else 0
-            )
-            file2_duplicates = (
-                len(duplicates_df[duplicates_df["source_file"] == "File_2"])
-                if not duplicates_df.empty
-                else 0
-            )
-
-            unique_to_file1 = (
-                len(unique_df[unique_df["source_file"] == "File_1"])
-                if not unique_df.empty
-                else 0
-            )
-            unique_to_file2 = (
-                len(unique_df[unique_df["source_file"] == "File_2"])
-                if not unique_df.empty
-                else 0
-            )
-
-            # Update summary
-            self.update_summary("Duplicates found", duplicates_count)
-            self.update_summary("Unique to File 1", unique_to_file1)
-            self.update_summary("Unique to File 2", unique_to_file2)
-
-            # Log detailed results
-            self.log("\n" + "=" * 60)
-            self.log("COMPARISON RESULTS")
-            self.log("=" * 60)
-            self.log(f"Total duplicate rows found: {duplicates_count}")
-            self.log(f"  - From File 1: {file1_duplicates}")
-            self.log(f"  - From File 2: {file2_duplicates}")
-
-            if self.include_unique.get():
-                self.log(f"Unique rows: {len(unique_df)}")
-                self.log(f"  - Unique to File 1: {unique_to_file1}")
-                self.log(f"  - Unique to File 2: {unique_to_file2}")
-
-            # Show sample duplicates
-            if not duplicates_df.empty:
-                self.log("\nSample duplicate rows (first 5):")
-                self.log("-" * 60)
-
-                sample_duplicates = duplicates_df.head(5)
-                for idx, row in sample_duplicates.iterrows():
-                    # Show first few columns
-                    cols_to_show = [col for col in row.index if col != "source_file"][
-                        :4
-                    ]
-                    row_preview = " | ".join(
-                        [f"{col}: {str(row[col])[:20]}" for col in cols_to_show]
-                    )
-                    self.log(f"[{row['source_file']}] {row_preview}")
-
-            # Save results
-            self.log("\nSaving results...")
-            self.save_results(duplicates_df, unique_df, file1_name, file2_name)
+            if self.settings["out_of_core"]:
+                counts = self.compare_out_of_core(file1_name, file2_name)
+            else:
+                counts = self.compare_in_memory(file1_name, file2_name)
+            duplicates_count = counts["duplicates1"] + counts["duplicates2"]
 
             # Calculate processing time
             processing_time = time.time() - start_time
@@ -650,23 +652,24 @@ class FileComparisonGUI:
             self.log("Comparison completed successfully!")
 
             # Show success message
-            messagebox.showinfo(
+            self.log_queue.call(
+                messagebox.showinfo,
                 "Success",
                 f"File comparison completed!\n\n"
                 f"Duplicates found: {duplicates_count}\n"
                 f"Processing time: {processing_time:.2f} seconds\n"
-                f"Results saved to: {self.output_directory.get()}",
+                f"Results saved to: {self.settings['output_directory']}",
             )
 
         except Exception as e:
             error_msg = f"Error during comparison: {str(e)}"
             self.log(error_msg)
-            messagebox.showerror("Error", error_msg)
+            self.log_queue.call(messagebox.showerror, "Error", error_msg)
 
         finally:
             # Re-enable button and stop progress
-            self.process_button.config(state=tk.NORMAL)
-            self.progress.stop()
+            self.log_queue.call(self.process_button.config, state=tk.NORMAL)
+            self.log_queue.call(self.progress.stop)
 
     def start_comparison(self):
         """Start file comparison in separate thread."""
@@ -680,7 +683,7 @@ class FileComparisonGUI:
         notebook.select(1)  # Select results tab
 
         # Clear previous results
-        self.log_text.delete(1.0, tk.END)
+        self.log_queue.clear()
 
         # Reset summary
         for key in self.summary_labels:
@@ -690,6 +693,9 @@ class FileComparisonGUI:
         self.process_button.config(state=tk.DISABLED)
         self.progress.start()
 
+        # Read the settings here; the worker thread never touches Tk
+        self.settings = self.read_settings()
+
         # Start comparison in separate thread
         comparison_thread = threading.Thread(target=self.compare_files)
         comparison_thread.daemon = True
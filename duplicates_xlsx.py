@@ -0,0 +1,484 @@
+"""
+Streaming XLSX Reader and Writer
+Thin chunking wrappers over openpyxl's read-only and write-only modes. Sheets
+are read a row at a time and handed to pandas in chunks, with values
+converted the same way as with pd.read_excel; dataframes are written a row
+at a time without keeping the cells of the workbook in memory.
+"""
+
+import datetime
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from contextlib import ExitStack
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE, TYPE_ERROR, TYPE_NUMERIC
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+DEFAULT_CHUNKSIZE = 100_000
+WRITE_BLOCK_ROWS = 50_000
+HIGHLIGHT_FILL = PatternFill(
+    start_color="FFFF00", end_color="FFFF00", fill_type="solid"
+)
+SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+WINDOWS_EPOCH = np.datetime64("1899-12-30")
+MICROSECONDS_PER_DAY = 86_400_000_000
+SECONDS_PER_DAY = 86_400
+# Kinds of cell values written as XML without openpyxl
+EMPTY, TEXT, BOOLEAN, NUMBER, OTHER = range(5)
+# Cells of the sheet XML as openpyxl and Excel write them: the columns of
+# the cells with content, and a cell of one column holding a value or text
+OPEN_CELL = re.compile(rb'<c r="([A-Z]+)\d+"[^>]*(?<!/)>')
+VALUE_CELL = rb'<c r="%s\d+"[^>]*(?<!/)>(?:(?!</c>).)*?<[vt]\b[^>]*>[^<]'
+PREFIXED_CELL_TAGS = [b":c ", b":c>", b":c/>"]
+
+
+def convert_cell(cell):
+    """Convert a read-only cell like pd.read_excel: '' when empty, NaN for errors."""
+    value = cell.value
+    if value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC and not isinstance(value, bool):
+        if value == int(value):
+            return int(value)
+        return float(value)
+    return value
+
+
+class XlsxReader:
+    """Read the sheets of one .xlsx workbook as chunks of rows.
+
+    The workbook is opened once in openpyxl's read-only mode, so shared
+    strings and styles are loaded once and each sheet is parsed in a single
+    streaming pass.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.workbook = load_workbook(
+            file_path, read_only=True, data_only=True, keep_links=False
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the workbook archive."""
+        self.workbook.close()
+
+    def sheet_names(self):
+        """Return the sheet names in workbook order."""
+        return self.workbook.sheetnames
+
+    def sheet(self, sheet_name):
+        """Return a sheet by name, the first one without a name."""
+        if sheet_name is None:
+            sheet_name = self.sheet_names()[0]
+        if sheet_name not in self.workbook.sheetnames:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+        sheet = self.workbook[sheet_name]
+        # Stored dimensions can be wrong; read the rows as they are
+        sheet.reset_dimensions()
+        return sheet
+
+    def sheet_width(self, sheet_name, nrows=None):
+        """Return the number of columns of a sheet: its widest row, like pd.read_excel.
+
+        Only the header and the first nrows rows are counted when nrows is
+        given. The whole sheet is measured from its raw XML when possible,
+        and otherwise from its values, without building cells.
+        """
+        sheet = self.sheet(sheet_name)
+        if nrows is None:
+            width = self.scan_width(sheet)
+            if width is not None:
+                return width
+
+        width = 0
+        rows = sheet.iter_rows(values_only=True)
+        for row in islice(rows, None if nrows is None else nrows + 1):
+            for position in range(len(row), width, -1):
+                if row[position - 1] is not None and row[position - 1] != "":
+                    width = position
+                    break
+        return width
+
+    def scan_width(self, sheet):
+        """Find the rightmost cell holding a value by scanning the sheet's XML.
+
+        This is several times faster than parsing the cells. Returns None
+        when the XML is not written the way the scan expects (every cell
+        starting with its reference, no namespace prefixes) or when shared
+        strings may be empty, so that the cells are parsed instead.
+        """
+        worksheet_path = getattr(sheet, "_worksheet_path", None)
+        if worksheet_path is None or "" in self.workbook.shared_strings:
+            return None
+
+        width = 0
+        with zipfile.ZipFile(self.file_path) as archive:
+            with archive.open(worksheet_path) as source:
+                carry = b""
+                while True:
+                    block = source.read(SCAN_BLOCK_SIZE)
+                    data = carry + block
+                    if block:
+                        # Scan whole rows; the rest waits for the next block
+                        cut = data.rfind(b"</row>")
+                        if cut < 0:
+                            carry = data
+                            continue
+                        carry = data[cut:]
+                        data = data[:cut]
+
+                    cells = sum(data.count(tag) for tag in [b"<c ", b"<c>", b"<c/>"])
+                    if cells != data.count(b'<c r="') or any(
+                        tag in data for tag in PREFIXED_CELL_TAGS
+                    ):
+                        return None
+                    columns = {
+                        column_index_from_string(letters.decode())
+                        for letters in OPEN_CELL.findall(data)
+                    }
+                    # The widest column of the block with a value, if wider
+                    for column in sorted(columns, reverse=True):
+                        if column <= width:
+                            break
+                        letters = get_column_letter(column).encode()
+                        if re.search(VALUE_CELL % letters, data, re.S):
+                            width = column
+                            break
+
+                    if not block:
+                        break
+        return width
+
+    def iter_rows(self, sheet_name):
+        """Yield the rows of a sheet as lists of values, like pd.read_excel.
+
+        Trailing empty cells of a row are dropped. Without a sheet_name the
+        first sheet is read.
+        """
+        for cells in self.sheet(sheet_name).rows:
+            row = [convert_cell(cell) for cell in cells]
+            while row and row[-1] == "":
+                row.pop()
+            yield row
+
+    def iter_chunks(
+        self, sheet_name, chunksize=DEFAULT_CHUNKSIZE, nrows=None, **parser_options
+    ):
+        """Yield dataframes of up to chunksize rows from a sheet.
+
+        The first row is the header. Parser options such as dtype and usecols
+        go to pandas' TextParser, which also infers the column types like
+        pd.read_excel. Trailing empty rows are dropped, and like CSV chunks
+        the row index runs on across chunks.
+        """
+        rows = self.iter_rows(sheet_name)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        # Every chunk is padded to the widest row so the columns line up
+        width = self.sheet_width(sheet_name, nrows)
+        chunk = []
+        blank_rows = 0
+        emitted = 0
+        for row in rows:
+            if not row:
+                blank_rows += 1
+                continue
+            chunk.extend([[]] * blank_rows)
+            blank_rows = 0
+            chunk.append(row)
+
+            if nrows is not None and emitted + len(chunk) >= nrows:
+                chunk = chunk[: nrows - emitted]
+                while chunk and not chunk[-1]:
+                    chunk.pop()
+                break
+            if len(chunk) >= chunksize:
+                yield self.parse_chunk(header, chunk, width, emitted, parser_options)
+                emitted += len(chunk)
+                chunk = []
+
+        if chunk or emitted == 0:
+            yield self.parse_chunk(header, chunk, width, emitted, parser_options)
+
+    def parse_chunk(self, header, chunk, width, start, parser_options):
+        """Convert raw rows to a dataframe with pandas' Excel parsing rules.
+
+        Rows are padded to the width of the sheet, which every chunk shares
+        so that the header maps to the same columns.
+        """
+        data = [row + [""] * (width - len(row)) for row in [header] + chunk]
+        parser = pd.io.parsers.TextParser(
+            data, header=0, skip_blank_lines=False, **parser_options
+        )
+        df = parser.read()
+        df.index += start
+        return df
+
+
+def cell_values(series):
+    """Return the values of a column as openpyxl writes them, like to_excel.
+
+    Missing values become empty cells, infinities text, time zones are
+    dropped, and control characters that Excel refuses are removed.
+    """
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_localize(None)
+    elif isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    text = pd.api.types.infer_dtype(series, skipna=True) == "string"
+    if text:
+        series = series.str.replace(ILLEGAL_CHARACTERS_RE, "", regex=True)
+
+    values = series.to_numpy(dtype=object, copy=True)
+    values[pd.isna(series).to_numpy()] = None
+    if pd.api.types.is_float_dtype(series):
+        infinite = np.isinf(series.to_numpy(dtype=float))
+        values[infinite] = [str(value) for value in values[infinite]]
+    elif series.dtype == object and not text:
+        # Columns mixing types are converted value by value
+        for i, value in enumerate(values):
+            if isinstance(value, str):
+                values[i] = ILLEGAL_CHARACTERS_RE.sub("", value)
+            elif isinstance(value, datetime.datetime) and value.tzinfo is not None:
+                values[i] = value.replace(tzinfo=None)
+            elif isinstance(value, float) and np.isinf(value):
+                values[i] = str(value)
+    return values
+
+
+def excel_serials(values):
+    """Return the Excel serial numbers of datetime64 values, like openpyxl's to_excel."""
+    microseconds = (values - WINDOWS_EPOCH).astype("timedelta64[us]").astype(np.int64)
+    days, day_microseconds = np.divmod(microseconds, MICROSECONDS_PER_DAY)
+    # Excel counts the nonexistent 1900-02-29, so earlier days shift by one
+    days = np.where((days > 0) & (days <= 60), days - 1, days)
+    seconds, fraction = np.divmod(day_microseconds, 1_000_000)
+    return days + (seconds + fraction / 10**6) / SECONDS_PER_DAY
+
+
+def value_kind(value):
+    """Classify a converted cell value for column_cells."""
+    if value is None:
+        return EMPTY
+    if isinstance(value, str):
+        return TEXT
+    if isinstance(value, (bool, np.bool_)):
+        return BOOLEAN
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return NUMBER
+    return OTHER
+
+
+def value_kinds(series, values):
+    """Return the kind of each converted value of a column, by dtype where it can."""
+    missing = np.array([value is None for value in values], dtype=bool)
+    if pd.api.types.is_bool_dtype(series):
+        kind = BOOLEAN
+    elif pd.api.types.is_numeric_dtype(series):
+        kind = NUMBER
+    elif pd.api.types.infer_dtype(series, skipna=True) == "string":
+        kind = TEXT
+    else:
+        return np.fromiter(map(value_kind, values), dtype=np.int8, count=len(values))
+    kinds = np.where(missing, EMPTY, kind).astype(np.int8)
+    if kind == NUMBER:
+        # Infinities were turned into text
+        kinds[np.array([isinstance(value, str) for value in values], dtype=bool)] = TEXT
+    return kinds
+
+
+def column_cells(series, letter, rows, date_style):
+    """Return the cell XML of one column of a block, '' for empty cells.
+
+    rows holds the row numbers as text. Values are written like openpyxl
+    writes them, except that floats keep all their digits. Returns None
+    when the column holds values other than numbers, text, booleans and
+    datetimes, which are left to openpyxl.
+    """
+    references = '<c r="' + letter + rows
+    cells = np.full(len(series), "", dtype=object)
+
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_localize(None)
+    if pd.api.types.is_datetime64_dtype(series):
+        present = series.notna().to_numpy()
+        serials = excel_serials(series.to_numpy()[present]).astype(str).astype(object)
+        cells[present] = (
+            references[present] + f'" s="{date_style}"><v>' + serials + "</v></c>"
+        )
+        return cells
+
+    values = cell_values(series)
+    kinds = value_kinds(series, values)
+    if (kinds == OTHER).any():
+        return None
+
+    numbers = kinds == NUMBER
+    if pd.api.types.is_float_dtype(series):
+        floats = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        texts = floats[numbers].astype(str).astype(object)
+    else:
+        texts = values[numbers].astype(str).astype(object)
+    cells[numbers] = references[numbers] + '"><v>' + texts + "</v></c>"
+
+    booleans = kinds == BOOLEAN
+    flags = np.where(values[booleans].astype(bool), "1", "0").astype(object)
+    cells[booleans] = references[booleans] + '" t="b"><v>' + flags + "</v></c>"
+
+    strings = kinds == TEXT
+    text = pd.Series(values[strings], dtype=object)
+    escaped = (
+        text.str.replace("&", "&amp;", regex=False)
+        .str.replace("<", "&lt;", regex=False)
+        .str.replace(">", "&gt;", regex=False)
+    )
+    # Like openpyxl, keep the whitespace around text that has some
+    spaced = (text != text.str.strip()).to_numpy(dtype=bool)
+    tags = np.where(spaced, '<t xml:space="preserve">', "<t>").astype(object)
+    cells[strings] = (
+        references[strings]
+        + '" t="inlineStr"><is>'
+        + tags
+        + escaped.to_numpy(dtype=object)
+        + "</t></is></c>"
+    )
+    return cells
+
+
+def write_sheet_rows(target, df, block_rows, date_style):
+    """Write the data rows of a sheet as XML to a binary file, a block at a time.
+
+    Returns False, with nothing written, when a column has to be left to
+    openpyxl.
+    """
+    letters = [get_column_letter(position + 1) for position in range(df.shape[1])]
+    for start in range(0, len(df), block_rows):
+        block = df.iloc[start : start + block_rows]
+        rows = np.arange(start + 2, start + len(block) + 2).astype(str).astype(object)
+        columns = []
+        for position, letter in enumerate(letters):
+            cells = column_cells(block.iloc[:, position], letter, rows, date_style)
+            if cells is None:
+                target.seek(0)
+                target.truncate()
+                return False
+            columns.append(cells)
+
+        lines = [
+            f'<row r="{row}">' + "".join(cells) + "</row>"
+            for row, *cells in zip(rows, *columns)
+        ]
+        target.write("".join(lines).encode("utf-8"))
+    return True
+
+
+def splice_rows(file_path, sheet_rows):
+    """Insert written data rows into the sheets of a saved workbook.
+
+    sheet_rows maps the archive path of a sheet to a binary file holding
+    its rows, which go at the end of the sheet's data. The workbook is
+    rewritten member by member next to file_path and then replaces it.
+    """
+    file_path = Path(file_path)
+    temp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.tmp")
+    try:
+        with zipfile.ZipFile(file_path) as source, zipfile.ZipFile(
+            temp_path, "w", zipfile.ZIP_DEFLATED
+        ) as target:
+            for info in source.infolist():
+                data = source.read(info)
+                if info.filename not in sheet_rows:
+                    target.writestr(info, data)
+                    continue
+
+                head, tail = data.split(b"</sheetData>", 1)
+                member = zipfile.ZipInfo(info.filename, info.date_time)
+                member.compress_type = zipfile.ZIP_DEFLATED
+                with target.open(member, "w", force_zip64=True) as output:
+                    output.write(head)
+                    rows = sheet_rows[info.filename]
+                    rows.seek(0)
+                    shutil.copyfileobj(rows, output)
+                    output.write(b"</sheetData>" + tail)
+        os.replace(temp_path, file_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def write_workbook(file_path, sheets, highlight=(), block_rows=WRITE_BLOCK_ROWS):
+    """Write dataframes to an .xlsx workbook, one sheet per name in sheets.
+
+    openpyxl writes the workbook in write-only mode with the header rows;
+    the data rows are turned into cell XML a block of rows at a time with
+    vectorized operations on each column, spooled to a temporary file and
+    inserted into the saved sheets, so memory stays bounded by the block.
+    Sheets holding values that only openpyxl converts, such as dates or
+    times of day in text columns, are appended by openpyxl row by row.
+    Sheets named in highlight get their data rows filled yellow by a single
+    conditional format instead of a style on every cell.
+    """
+    if not sheets:
+        raise ValueError("A workbook needs at least one sheet")
+
+    workbook = Workbook(write_only=True)
+    bold = Font(bold=True)
+    spliced = []
+    with ExitStack() as stack:
+        for name, df in sheets.items():
+            sheet = workbook.create_sheet(name)
+            header = []
+            for column in df.columns:
+                cell = WriteOnlyCell(
+                    sheet,
+                    value=column if isinstance(column, (int, float)) else str(column),
+                )
+                cell.font = bold
+                header.append(cell)
+            sheet.append(header)
+
+            # Datetimes take the number format openpyxl gives them
+            date_style = WriteOnlyCell(sheet, value=datetime.datetime(2000, 1, 1))
+            rows = stack.enter_context(tempfile.TemporaryFile())
+            if len(df) and df.shape[1]:
+                if write_sheet_rows(rows, df, block_rows, date_style.style_id):
+                    spliced.append((sheet, rows))
+                else:
+                    for start in range(0, len(df), block_rows):
+                        block = df.iloc[start : start + block_rows]
+                        columns = [cell_values(block[column]) for column in block]
+                        for row in zip(*columns):
+                            sheet.append(row)
+
+            if name in highlight and len(df) and df.shape[1]:
+                last_cell = f"{get_column_letter(df.shape[1])}{len(df) + 1}"
+                sheet.conditional_formatting.add(
+                    f"A2:{last_cell}",
+                    FormulaRule(formula=["TRUE"], fill=HIGHLIGHT_FILL),
+                )
+        workbook.save(file_path)
+        # Sheets know their archive path once saved
+        splice_rows(
+            file_path, {sheet.path.lstrip("/"): rows for sheet, rows in spliced}
+        )
@@ -0,0 +1,46 @@
+"""Tests for duplicates_bloom."""
+
+import numpy as np
+import pytest
+
+from duplicates_bloom import BloomFilter
+
+
+def random_keys(count, seed):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 2**64, count, dtype=np.uint64, endpoint=False)
+
+
+@pytest.mark.parametrize("max_bytes", [64, 1024 * 1024])
+def test_added_keys_are_always_found(max_bytes):
+    keys = random_keys(50_000, 0)
+    bloom = BloomFilter.for_capacity(len(keys), 0.01, max_bytes)
+
+    for block in np.array_split(keys, 7):
+        bloom.add(block)
+
+    assert bloom.contains(keys).all()
+    # Keys added again, or looked up out of order, are found as well
+    assert bloom.contains(keys[::-1]).all()
+
+
+def test_false_positive_rate_is_close_to_the_target():
+    bloom = BloomFilter.for_capacity(20_000, 0.01)
+    bloom.add(random_keys(20_000, 1))
+
+    rate = bloom.contains(random_keys(100_000, 2)).mean()
+
+    assert rate < 0.02
+    assert bloom.expected_false_positive_rate(20_000) == pytest.approx(0.01, rel=0.2)
+
+
+def test_capped_filter_stays_within_max_bytes():
+    bloom = BloomFilter.for_capacity(1_000_000, 0.001, max_bytes=4096)
+
+    assert bloom.nbytes == 4096
+    assert bloom.expected_false_positive_rate(1_000_000) > 0.001
+
+
+def test_invalid_false_positive_rate_is_rejected():
+    with pytest.raises(ValueError):
+        BloomFilter.for_capacity(10, 1.5)
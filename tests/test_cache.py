@@ -0,0 +1,60 @@
+"""Tests for duplicates_cache."""
+
+import pandas as pd
+
+from duplicates_cache import CACHE_FILENAME
+from duplicates_engine import process_file
+
+REUSED = "Unchanged since last run"
+
+
+def run(input_path, output_directory, mode="row"):
+    lines = []
+    process_file(
+        input_path,
+        output_directory,
+        mode=mode,
+        log=lines.append,
+        cache_path=output_directory / CACHE_FILENAME,
+    )
+    return lines
+
+
+def test_missing_report_invalidates_entry(tmp_path):
+    input_path = tmp_path / "data.csv"
+    pd.DataFrame({"id": [1, 2, 1], "name": ["a", "b", "a"]}).to_csv(
+        input_path, index=False
+    )
+    output_directory = tmp_path / "output"
+    output_directory.mkdir()
+    report_path = output_directory / "data_row_duplicates_report.csv"
+
+    assert not any(REUSED in line for line in run(input_path, output_directory))
+    assert any(REUSED in line for line in run(input_path, output_directory))
+
+    report_path.unlink()
+    assert not any(REUSED in line for line in run(input_path, output_directory))
+    assert report_path.exists()
+
+    report_path.write_text("row_number,id,name\n", encoding="utf-8")
+    assert not any(REUSED in line for line in run(input_path, output_directory))
+    assert len(pd.read_csv(report_path)) == 2
+
+
+def test_missing_near_row_report_invalidates_entry(tmp_path):
+    input_path = tmp_path / "data.csv"
+    pd.DataFrame({"name": ["Jane Smith", "jane  smith", "Bob"]}).to_csv(
+        input_path, index=False
+    )
+    output_directory = tmp_path / "output"
+    output_directory.mkdir()
+    report_path = output_directory / "data_near_row_duplicates_report.csv"
+
+    run(input_path, output_directory, "near_row")
+    assert any(REUSED in line for line in run(input_path, output_directory, "near_row"))
+
+    report_path.unlink()
+    assert not any(
+        REUSED in line for line in run(input_path, output_directory, "near_row")
+    )
+    assert report_path.exists()
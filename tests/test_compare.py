@@ -0,0 +1,155 @@
+"""Tests for duplicates_compare."""
+
+import pandas as pd
+import pytest
+
+from duplicates_compare import (
+    compare_dataframes,
+    compare_files_partitioned,
+    compare_many_files,
+)
+from duplicates_io import read_input_file
+
+
+@pytest.fixture
+def mixed_files(tmp_path):
+    """An int column in one file and the same values as floats in the other."""
+    path1 = tmp_path / "ints.csv"
+    path2 = tmp_path / "floats.csv"
+    pd.DataFrame({"id": [1, 2, 3, 4], "name": ["a", "b", "c", "d"]}).to_csv(
+        path1, index=False
+    )
+    pd.DataFrame({"id": [1.0, 2.0, 5.0], "name": ["a", "b", "e"]}).to_csv(
+        path2, index=False
+    )
+    return path1, path2
+
+
+def in_memory_counts(path1, path2):
+    duplicates, unique = compare_dataframes(
+        read_input_file(path1), read_input_file(path2)
+    )
+    return len(duplicates), len(unique)
+
+
+def partitioned_counts(path1, path2, output_dir):
+    counts = compare_files_partitioned(
+        path1, path2, output_dir, "comparison", partitions=4, chunksize=2
+    )
+    return (
+        counts["duplicates1"] + counts["duplicates2"],
+        counts["unique1"] + counts["unique2"],
+    )
+
+
+def test_partitioned_matches_in_memory_on_mixed_numbers(mixed_files, tmp_path):
+    path1, path2 = mixed_files
+
+    assert in_memory_counts(path1, path2) == (4, 3)
+    assert partitioned_counts(path1, path2, tmp_path) == (4, 3)
+
+
+def test_partitioned_matches_in_memory_across_formats(mixed_files, tmp_path):
+    pytest.importorskip("pyarrow")
+    path1, path2 = mixed_files
+    parquet_path = tmp_path / "floats.parquet"
+    read_input_file(path2).to_parquet(parquet_path, index=False)
+
+    assert in_memory_counts(path1, parquet_path) == (4, 3)
+    assert partitioned_counts(path1, parquet_path, tmp_path) == (4, 3)
+
+
+def test_many_files_match_numbers_across_formats(mixed_files, tmp_path):
+    pytest.importorskip("pyarrow")
+    path1, path2 = mixed_files
+    parquet_path = tmp_path / "floats.parquet"
+    read_input_file(path2).to_parquet(parquet_path, index=False)
+
+    intersections = compare_many_files(
+        [path1, path2, parquet_path], tmp_path, "comparison", chunksize=2
+    )
+
+    rows = dict(zip(intersections["files"], intersections["rows"]))
+    assert rows == {"1,2": 2, "1,3": 2, "2,3": 3, "1,2,3": 2}
+    membership = pd.read_csv(tmp_path / "comparison_membership.csv")
+    assert sorted(membership["file_count"]) == [1, 1, 2, 3, 3]
+
+
+def test_compare_dataframes_tags_rows_by_file():
+    df1 = pd.DataFrame({"id": [1, 2, 2, 3], "name": ["a", "b", "b", "c"]})
+    df2 = pd.DataFrame({"name": ["b", "d"], "id": [2, 4]})
+
+    duplicates, unique = compare_dataframes(df1, df2)
+
+    assert duplicates["id"].tolist() == [2, 2, 2]
+    assert duplicates["source_file"].tolist() == ["File_1", "File_1", "File_2"]
+    assert unique["id"].tolist() == [1, 3, 4]
+    assert unique["source_file"].tolist() == ["File_1", "File_1", "File_2"]
+
+
+def test_compare_dataframes_modes():
+    df1 = pd.DataFrame({"id": [1, 2], "name": ["Alice", "Bob"]})
+    df2 = pd.DataFrame({"id": [1, 3], "name": ["ALICE", "Bob"]})
+
+    assert len(compare_dataframes(df1, df2)[0]) == 0
+    assert len(compare_dataframes(df1, df2, mode="case_insensitive")[0]) == 2
+    duplicates, _ = compare_dataframes(
+        df1, df2, mode="selected_columns", selected_columns=["name"]
+    )
+    assert duplicates["id"].tolist() == [2, 3]
+    with pytest.raises(ValueError):
+        compare_dataframes(df1, df2, mode="selected_columns", selected_columns=["x"])
+
+
+def test_compare_dataframes_without_unique_rows():
+    df = pd.DataFrame({"id": [1] * 1000})
+
+    duplicates, unique = compare_dataframes(df, df, include_unique=False)
+
+    assert len(duplicates) == 2000
+    assert unique.empty
+
+
+def sorted_output(path):
+    rows = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return rows.sort_values(list(rows.columns), ignore_index=True)
+
+
+@pytest.mark.parametrize("filter_bytes", [8, 1024 * 1024])
+@pytest.mark.parametrize("smaller", ["first", "second"])
+def test_prefilter_does_not_change_partitioned_output(tmp_path, filter_bytes, smaller):
+    # An 8-byte filter passes almost every row, a large one screens most out
+    large = pd.DataFrame({"id": range(300), "name": [f"n{i % 7}" for i in range(300)]})
+    small = pd.DataFrame(
+        {"id": [float(i) for i in range(0, 600, 20)], "name": ["n0", "n6"] * 15}
+    )
+    paths = [tmp_path / "large.csv", tmp_path / "small.csv"]
+    large.to_csv(paths[0], index=False)
+    small.to_csv(paths[1], index=False)
+    if smaller == "first":
+        paths.reverse()
+
+    outputs = {}
+    for prefilter in [False, True]:
+        output_dir = tmp_path / str(prefilter)
+        output_dir.mkdir()
+        counts = compare_files_partitioned(
+            *paths,
+            output_dir,
+            "comparison",
+            partitions=3,
+            chunksize=50,
+            prefilter=prefilter,
+            filter_bytes=filter_bytes,
+        )
+        outputs[prefilter] = (
+            counts,
+            sorted_output(output_dir / "comparison_duplicates.csv"),
+            sorted_output(output_dir / "comparison_unique.csv"),
+        )
+
+    without, with_filter = outputs[False], outputs[True]
+    assert with_filter[0] == without[0]
+    assert without[0]["duplicates1"] + without[0]["duplicates2"] > 0
+    pd.testing.assert_frame_equal(with_filter[1], without[1])
+    pd.testing.assert_frame_equal(with_filter[2], without[2])
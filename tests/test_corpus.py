@@ -0,0 +1,25 @@
+"""Tests for duplicates_corpus."""
+
+import pandas as pd
+import pytest
+
+from duplicates_corpus import CORPUS_REPORT_FILENAME, find_corpus_duplicates
+
+
+def test_rows_match_across_formats(tmp_path):
+    pytest.importorskip("pyarrow")
+    csv_path = tmp_path / "day1.csv"
+    parquet_path = tmp_path / "day2.parquet"
+    pd.DataFrame({"id": [1, 2, 3], "name": ["a", "b", "c"]}).to_csv(
+        csv_path, index=False
+    )
+    pd.DataFrame({"id": [1.0, 4.0], "name": ["a", "d"]}).to_parquet(
+        parquet_path, index=False
+    )
+
+    result = find_corpus_duplicates([csv_path, parquet_path], tmp_path, workers=1)
+
+    report = pd.read_csv(tmp_path / CORPUS_REPORT_FILENAME)
+    assert result["duplicate_count"] == 1
+    assert report["file"].tolist() == ["day1.csv", "day2.parquet"]
+    assert report["row_number"].tolist() == [1, 1]
@@ -0,0 +1,374 @@
+"""Tests for duplicates_engine."""
+
+import subprocess
+import sys
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import duplicates_engine
+from duplicates_engine import (
+    clean_file,
+    detect_duplicate_columns,
+    detect_duplicate_values_in_columns,
+    detect_row_duplicates_in_file,
+    flag_row_duplicates,
+    main,
+    process_file,
+    read_input_files,
+    remove_flagged_rows,
+    row_groups,
+    run_file_tasks,
+    summarize_column_duplicates,
+    unpack_masks,
+    write_value_flags,
+)
+from duplicates_normalize import Normalizer
+
+
+def write_csv(path, data):
+    pd.DataFrame(data).to_csv(path, index=False)
+    return path
+
+
+def test_remove_flagged_rows_in_place(tmp_path):
+    path = tmp_path / "data.csv"
+    rows = 30_000
+    pd.DataFrame(
+        {
+            "id": range(rows),
+            "name": [f"name {i}" for i in range(rows)],
+            "is_duplicate": [i % 3 == 0 for i in range(rows)],
+        }
+    ).to_csv(path, index=False)
+
+    stats, _ = remove_flagged_rows(path, path, chunksize=1000)
+
+    cleaned = pd.read_csv(path)
+    assert stats == {"original": rows, "removed": 10_000, "remaining": 20_000}
+    assert list(cleaned.columns) == ["id", "name"]
+    assert cleaned["id"].tolist() == [i for i in range(rows) if i % 3]
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_duplicate_columns_compare_numbers_by_value():
+    df = pd.DataFrame(
+        {
+            "int": [1, 2, 3],
+            "float": [1.0, 2.0, 3.0],
+            "text": ["1", "2", "3"],
+            "flag": [True, False, True],
+            "bit": [1, 0, 1],
+            "gaps": [1.0, np.nan, 3.0],
+            "nullable": pd.array([1, None, 3], dtype="Int64"),
+        }
+    )
+
+    names, groups = detect_duplicate_columns(df)
+
+    assert names == ["int", "float", "flag", "bit", "gaps", "nullable"]
+    assert list(groups.values()) == [
+        ["int", "float"],
+        ["flag", "bit"],
+        ["gaps", "nullable"],
+    ]
+
+
+def test_engine_runs_without_tkinter():
+    code = "import sys, duplicates_engine; sys.exit('tkinter' in sys.modules)"
+    root = Path(__file__).resolve().parent.parent
+    assert subprocess.run([sys.executable, "-c", code], cwd=root).returncode == 0
+
+
+@pytest.mark.parametrize(
+    "mode, duplicate_count, output",
+    [
+        ("row", 2, "data_row_duplicates_detected.csv"),
+        ("column", 2, "data_column_duplicates_detected.csv"),
+        ("column_values", 6, "data_column_values_duplicates_detected.csv"),
+    ],
+)
+def test_process_file_modes(tmp_path, mode, duplicate_count, output):
+    path = write_csv(
+        tmp_path / "data.csv",
+        {"id": [1, 2, 1], "copy": [1, 2, 1], "name": ["a", "b", "a"]},
+    )
+    lines = []
+
+    result = process_file(path, tmp_path, mode=mode, log=lines.append)
+
+    assert result["duplicate_count"] == duplicate_count
+    assert result["output"] == output
+    assert (tmp_path / output).exists()
+    assert (
+        lines[0]
+        == f"Processing: data.csv (Mode: {mode.replace('_', ' ').title()} Detection)"
+    )
+
+
+def test_command_line_detect_then_remove(tmp_path):
+    path = write_csv(tmp_path / "data.csv", {"id": [1, 2, 1, 3], "x": [5, 6, 5, 7]})
+    output_directory = tmp_path / "output"
+    output_directory.mkdir()
+
+    assert (
+        main(["detect", str(path), "-o", str(output_directory), "-j", "1", "-q"]) == 0
+    )
+    flagged = output_directory / "data_row_duplicates_detected.csv"
+    assert pd.read_csv(flagged)["is_duplicate_row"].tolist() == [
+        True,
+        False,
+        True,
+        False,
+    ]
+
+    assert main(["remove", str(flagged), "-o", str(output_directory), "-q"]) == 0
+    cleaned = pd.read_csv(output_directory / "data_row_duplicates_detected_cleaned.csv")
+    assert cleaned["id"].tolist() == [2, 3]
+
+
+def test_command_line_needs_output_directory(tmp_path, capsys):
+    path = write_csv(tmp_path / "data.csv", {"id": [1]})
+
+    assert main(["detect", str(path), "-o", str(tmp_path / "missing")]) == 2
+    assert "Output directory does not exist" in capsys.readouterr().err
+
+
+def test_streaming_matches_in_memory_row_mode(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,x\n1.0,x\nNA,y\n,y\n2,z\n", encoding="utf-8")
+    flags = []
+    for options in [{}, {"chunksize": 2}]:
+        output_directory = tmp_path / str(len(flags))
+        output_directory.mkdir()
+
+        result = process_file(path, output_directory, mode="row", **options)
+
+        output = pd.read_csv(output_directory / result["output"])
+        flags.append(output["is_duplicate_row"].tolist())
+        assert result["duplicate_count"] == 4
+
+    assert flags[0] == flags[1] == [True, True, True, True, False]
+
+
+def test_summarize_column_duplicates():
+    series = pd.Series(["a", "b", "a", None, None, "c"] + ["a"] * 5)
+
+    mask, value_count, value_positions = summarize_column_duplicates(
+        series, max_positions=3
+    )
+
+    assert mask.tolist() == [True, False, True, True, True, False] + [True] * 5
+    assert value_count == 2
+    assert value_positions[0] == ("a", [0, 2, 6], 7)
+    value, positions, occurrences = value_positions[1]
+    assert pd.isna(value) and positions == [3, 4] and occurrences == 2
+    assert summarize_column_duplicates(pd.Series([1, 2, 3])) is None
+
+
+def test_summarize_column_duplicates_lists_first_values():
+    series = pd.Series([3, 1, 3, 2, 1, 2, 4])
+
+    _, value_count, value_positions = summarize_column_duplicates(series, max_values=2)
+
+    assert value_count == 3
+    assert value_positions == [(3, [0, 2], 2), (1, [1, 4], 2)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_file_tasks_keeps_order_and_errors(tmp_path, workers):
+    paths = [
+        write_csv(tmp_path / "a.csv", {"id": [1, 1, 2]}),
+        tmp_path / "missing.csv",
+        write_csv(tmp_path / "c.csv", {"id": [1, 2, 3]}),
+    ]
+    func = partial(process_file, output_directory=tmp_path, mode="row")
+
+    results = list(run_file_tasks(func, [(path,) for path in paths], workers))
+
+    assert [result["duplicate_count"] for result, _, _ in results[::2]] == [2, 0]
+    assert [error is None for _, _, error in results] == [True, False, True]
+    assert results[0][1][0] == "Processing: a.csv (Mode: Row Detection)"
+
+
+def test_read_input_files_in_parallel(tmp_path):
+    paths = [write_csv(tmp_path / f"{i}.csv", {"id": [i] * (i + 1)}) for i in range(3)]
+
+    frames = read_input_files(paths, workers=2)
+
+    assert [df["id"].tolist() for df in frames] == [[0], [1, 1], [2, 2, 2]]
+
+
+def test_row_groups_compare_actual_values(monkeypatch):
+    df = pd.DataFrame({"value": [1, "1", 1, None, np.nan], "name": ["a"] * 5})
+    assert pd.util.hash_pandas_object(df["value"].iloc[:2], index=False).nunique() == 1
+
+    labels = row_groups(df)
+    assert flag_row_duplicates(labels).tolist() == df.duplicated(keep=False).tolist()
+
+    # Rows whose hashes collide are still told apart by their values
+    monkeypatch.setattr(
+        duplicates_engine, "hash_rows", lambda df, *args: np.zeros(len(df), np.uint64)
+    )
+    assert flag_row_duplicates(row_groups(df)).tolist() == [
+        True,
+        False,
+        True,
+        True,
+        True,
+    ]
+
+
+def test_in_memory_row_mode_keeps_mixed_types_apart(tmp_path):
+    df = pd.DataFrame({"value": [1, "1", 2.5, 2.5]})
+
+    result = detect_row_duplicates_in_file(df, tmp_path / "data.csv", tmp_path, print)
+
+    assert result["duplicate_count"] == 2
+    assert df["is_duplicate_row"].tolist() == [False, False, True, True]
+
+
+@pytest.mark.parametrize(
+    "keep, flags",
+    [
+        ("none", [True, True, True, False, True, True]),
+        ("first", [False, False, True, False, True, True]),
+        ("last", [True, True, True, False, False, False]),
+        ("max", [True, True, False, False, True, False]),
+    ],
+)
+def test_keep_policies_match_between_memory_and_streaming(tmp_path, keep, flags):
+    path = tmp_path / "data.csv"
+    path.write_text(
+        "id,name,updated\n1,a,5\n2,b,1\n1,c,9\n3,d,4\n1.0,e,7\n2,f,3\n",
+        encoding="utf-8",
+    )
+    options = {"key_columns": ["id"], "keep": keep, "max_column": "updated"}
+    outputs = []
+    for chunksize in [None, 2]:
+        output_directory = tmp_path / str(chunksize)
+        output_directory.mkdir()
+
+        result = process_file(
+            path, output_directory, mode="row", chunksize=chunksize, **options
+        )
+        cleaned = clean_file(path, output_directory, chunksize=chunksize, **options)
+
+        output = pd.read_csv(output_directory / result["output"])
+        assert output["is_duplicate_row"].tolist() == flags
+        assert result["duplicate_count"] == sum(flags)
+        outputs.append(pd.read_csv(output_directory / cleaned["output"]))
+
+    assert outputs[0]["name"].tolist() == [
+        name for name, flag in zip("abcdef", flags) if not flag
+    ]
+    # The whole file is read with typed columns, so ids come back as floats
+    pd.testing.assert_frame_equal(outputs[0], outputs[1], check_dtype=False)
+
+
+def test_dates_normalize_alike_in_memory_and_in_chunks(tmp_path):
+    # The last chunk holds a date next to plain text
+    path = write_csv(
+        tmp_path / "data.csv",
+        {
+            "when": [
+                "01/31/2024",
+                "2024-01-31",
+                "2024-02-01",
+                "02/01/2024",
+                "Jan 31 2024",
+                "lobby",
+            ]
+        },
+    )
+    outputs = []
+    for chunksize in [None, 2]:
+        output_directory = tmp_path / str(chunksize)
+        output_directory.mkdir()
+
+        result = process_file(
+            path,
+            output_directory,
+            chunksize=chunksize,
+            normalizer=Normalizer(dates=True),
+        )
+
+        outputs.append(pd.read_csv(output_directory / result["output"]))
+
+    assert outputs[0]["is_duplicate_row"].tolist() == [True] * 5 + [False]
+    pd.testing.assert_frame_equal(outputs[0], outputs[1])
+
+
+@pytest.mark.parametrize(
+    "name, flags",
+    [
+        ("data.csv", ["TRUE", "", " 1 ", "0", "false", None]),
+        ("data.parquet", [1.0, np.nan, 1.0, 0.0, 0.0, np.nan]),
+        ("data.parquet", [True, None, True, False, False, None]),
+    ],
+)
+def test_remove_reads_flags_explicitly(tmp_path, name, flags):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / name
+    df = pd.DataFrame({"id": range(6), "is_duplicate": flags})
+    if name.endswith(".csv"):
+        df.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, index=False)
+
+    stats, _ = remove_flagged_rows(path, tmp_path / f"cleaned_{name}")
+
+    assert stats == {"original": 6, "removed": 2, "remaining": 4}
+
+
+@pytest.mark.parametrize("name", ["data.csv", "data.parquet"])
+def test_remove_rejects_unknown_flags(tmp_path, name):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / name
+    df = pd.DataFrame({"id": range(3), "is_duplicate": ["true", "yes", "0"]})
+    if name.endswith(".csv"):
+        df.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, index=False)
+
+    with pytest.raises(ValueError, match="Unrecognised value 'yes'"):
+        remove_flagged_rows(path, tmp_path / f"cleaned_{name}")
+    assert not (tmp_path / f"cleaned_{name}").exists()
+
+
+@pytest.mark.parametrize("name", ["values.csv", "values.parquet"])
+def test_packed_value_masks_match_duplicated(tmp_path, monkeypatch, name):
+    if name.endswith(".parquet"):
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(duplicates_engine, "VALUE_FLAG_BLOCK_ROWS", 16)
+    rng = np.random.default_rng(0)
+    rows = 45
+    df = pd.DataFrame(
+        {
+            "a": rng.integers(0, 30, rows),
+            "b": rng.choice(["x", "y", None], rows),
+            "unique": range(rows),
+            "c": rng.integers(0, 60, rows).astype(float),
+        }
+    )
+
+    columns, packed, info = detect_duplicate_values_in_columns(df)
+    flag_names = [f"{column}_is_duplicate" for column in columns]
+    write_value_flags(df, flag_names, packed, tmp_path / name)
+
+    assert columns == ["a", "b", "c"]
+    assert packed.shape == (3, 6)
+    if name.endswith(".csv"):
+        output = pd.read_csv(tmp_path / name)
+    else:
+        output = pd.read_parquet(tmp_path / name)
+    for column, flag_name in zip(columns, flag_names):
+        expected = df[column].duplicated(keep=False)
+        assert output[flag_name].tolist() == expected.tolist()
+        assert info[column]["count"] == expected.sum()
+    assert (
+        unpack_masks(packed, 40, 45).tolist() == output[flag_names][40:].values.tolist()
+    )
@@ -0,0 +1,107 @@
+"""Tests for incremental row detection in duplicates_engine."""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from duplicates_engine import (
+    detect_row_duplicates_incremental,
+    process_file,
+    save_incremental_state,
+)
+
+OUTPUT = "log_row_duplicates_detected.csv"
+
+
+def run(path, output_directory):
+    lines = []
+    result = detect_row_duplicates_incremental(path, output_directory, lines.append)
+    return result, lines
+
+
+def flags(output_directory):
+    return pd.read_csv(output_directory / OUTPUT)["is_duplicate_row"].tolist()
+
+
+def test_appended_rows_update_earlier_flags(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text("id,event\n1,start\nNA,stop\n2,start\n", encoding="utf-8")
+
+    result, _ = run(path, tmp_path)
+    assert result["duplicate_count"] == 0
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("1.0,start\n,stop\n3,start\n")
+    result, lines = run(path, tmp_path)
+
+    assert "Resuming after 3 rows already processed" in lines
+    assert "Parsed 3 new rows" in lines
+    assert result == {
+        "output": OUTPUT,
+        "duplicate_count": 4,
+        "total_items": 6,
+    }
+    assert flags(tmp_path) == [1, 1, 0, 1, 1, 0]
+
+    # A full run of the same file agrees, as does a fresh incremental run
+    full = tmp_path / "full"
+    full.mkdir()
+    process_file(path, full, mode="row")
+    expected = pd.read_csv(full / OUTPUT)["is_duplicate_row"].astype(int).tolist()
+    assert flags(tmp_path) == expected
+    (tmp_path / "log_row_duplicates_detected.state.npz").unlink()
+    run(path, tmp_path)
+    assert flags(tmp_path) == expected
+
+
+def test_shrunk_or_rewritten_file_is_processed_again(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text("id\n1\n2\n1\n", encoding="utf-8")
+    run(path, tmp_path)
+
+    path.write_text("id\n5\n5\n", encoding="utf-8")
+    result, lines = run(path, tmp_path)
+    assert "No usable state from a previous run, processing the whole file" in lines
+    assert result["total_items"] == 2
+    assert flags(tmp_path) == [1, 1]
+
+    # Same length as before, but different content
+    path.write_text("id\n7\n8\n", encoding="utf-8")
+    result, lines = run(path, tmp_path)
+    assert "No usable state from a previous run, processing the whole file" in lines
+    assert flags(tmp_path) == [0, 0]
+
+
+def test_last_record_without_line_ending_waits(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text("id,event\n1,start\n1,sta", encoding="utf-8")
+
+    result, lines = run(path, tmp_path)
+    assert result["total_items"] == 1
+    assert (
+        "The last record has no line ending yet; it will be read on the next run"
+        in lines
+    )
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("rt\n2,stop\n")
+    result, _ = run(path, tmp_path)
+    assert result["total_items"] == 3
+    assert flags(tmp_path) == [1, 1, 0]
+
+
+def test_state_from_older_version_is_ignored(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text("id\n1\n2\n", encoding="utf-8")
+    run(path, tmp_path)
+    state_path = tmp_path / "log_row_duplicates_detected.state.npz"
+    with np.load(state_path) as data:
+        state = {name: data[name] for name in data.files}
+    meta = json.loads(str(state.pop("meta")))
+    del meta["version"]
+    save_incremental_state(state_path, meta, **state)
+
+    _, lines = run(path, tmp_path)
+
+    assert "No usable state from a previous run, processing the whole file" in lines
@@ -0,0 +1,53 @@
+"""Tests for duplicates_index."""
+
+import json
+
+import pandas as pd
+
+from duplicates_compare import compare_dataframes
+from duplicates_index import (
+    ReferenceIndex,
+    build_reference_index,
+    compare_with_index,
+    metadata_path,
+)
+from duplicates_io import read_input_file
+
+
+def write_files(tmp_path):
+    reference_path = tmp_path / "master.csv"
+    incoming_path = tmp_path / "incoming.csv"
+    pd.DataFrame({"id": [1, 2, 3, 4], "name": ["a", "b", "c", "d"]}).to_csv(
+        reference_path, index=False
+    )
+    pd.DataFrame({"id": [1.0, 2.0, 5.0], "name": ["a", "b", "e"]}).to_csv(
+        incoming_path, index=False
+    )
+    return reference_path, incoming_path
+
+
+def test_index_matches_in_memory_comparison(tmp_path):
+    reference_path, incoming_path = write_files(tmp_path)
+    index_path = tmp_path / "master.rowindex"
+
+    build_reference_index(reference_path, index_path, chunksize=2)
+    counts = compare_with_index(incoming_path, index_path, tmp_path, chunksize=2)
+
+    duplicates, _ = compare_dataframes(
+        read_input_file(reference_path), read_input_file(incoming_path)
+    )
+    in_incoming = (duplicates["source_file"] == "File_2").sum()
+    assert counts == {"rows": 3, "duplicates": in_incoming, "unique": 3 - in_incoming}
+    assert in_incoming == 2
+
+
+def test_index_from_older_version_is_not_current(tmp_path):
+    reference_path, _ = write_files(tmp_path)
+    index_path = tmp_path / "master.rowindex"
+    build_reference_index(reference_path, index_path)
+    assert ReferenceIndex(index_path).is_current()
+
+    metadata = json.loads(metadata_path(index_path).read_text(encoding="utf-8"))
+    del metadata["version"]
+    metadata_path(index_path).write_text(json.dumps(metadata), encoding="utf-8")
+    assert not ReferenceIndex(index_path).is_current()
@@ -0,0 +1,53 @@
+"""Tests for duplicates_io."""
+
+import pandas as pd
+import pytest
+
+from duplicates_engine import process_file
+from duplicates_io import (
+    iter_file_chunks,
+    output_suffix,
+    read_columns,
+    read_input_file,
+    write_output_file,
+)
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather", ".arrow"])
+def test_columnar_round_trip(tmp_path, suffix):
+    path = tmp_path / f"data{suffix}"
+    df = pd.DataFrame({"id": [1, 2, 3], "mixed": [1, "two", None]})
+
+    write_output_file(df, path)
+
+    assert read_columns(path) == ["id", "mixed"]
+    result = read_input_file(path)
+    assert result["id"].tolist() == [1, 2, 3]
+    assert result["mixed"].tolist()[:2] == ["1", "two"]
+    assert pd.isna(result["mixed"].iloc[2])
+    assert read_input_file(path, nrows=2, columns=["id"])["id"].tolist() == [1, 2]
+    assert output_suffix(path) == suffix
+
+
+def test_parquet_chunks_as_text(tmp_path):
+    path = tmp_path / "data.parquet"
+    pd.DataFrame({"id": [1, 2, 3], "x": [0.5, None, 2.0]}).to_parquet(path)
+
+    chunks = list(iter_file_chunks(path, 2))
+
+    assert [chunk["id"].tolist() for chunk in chunks] == [["1", "2"], ["3"]]
+    assert chunks[0]["x"].tolist()[0] == "0.5"
+
+
+def test_row_mode_keeps_columnar_format(tmp_path):
+    path = tmp_path / "data.parquet"
+    pd.DataFrame({"id": [1, 2, 1]}).to_parquet(path)
+
+    result = process_file(path, tmp_path, mode="row")
+
+    assert result["output"] == "data_row_duplicates_detected.parquet"
+    output = pd.read_parquet(tmp_path / result["output"])
+    assert output["is_duplicate_row"].dtype == bool
+    assert output["is_duplicate_row"].tolist() == [True, False, True]
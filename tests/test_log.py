@@ -0,0 +1,117 @@
+"""Tests for duplicates_log, with stand-ins for the Tk root and text widget."""
+
+import threading
+import tkinter as tk
+from pathlib import Path
+
+import pytest
+
+from duplicates_log import QueuedLog
+
+
+class FakeRoot:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, interval, func):
+        self.scheduled.append(func)
+
+
+class FakeText:
+    """The parts of tk.Text that QueuedLog uses, over a plain string."""
+
+    def __init__(self):
+        self.content = ""
+
+    def lines(self):
+        return self.content.splitlines()
+
+    def insert(self, index, text):
+        if index == tk.END:
+            self.content += text
+        else:
+            self.content = text + self.content
+
+    def delete(self, start, end):
+        if end == tk.END:
+            self.content = ""
+        else:
+            first_kept = int(end.split(".")[0]) - 1
+            self.content = "".join(self.content.splitlines(True)[first_kept:])
+
+    def index(self, index):
+        return f"{self.content.count(chr(10)) + 1}.0"
+
+    def see(self, index):
+        pass
+
+
+@pytest.fixture
+def make_log(tmp_path, monkeypatch):
+    """Build logs spilling into tmp_path, and close their spill files after."""
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    logs = []
+
+    def make(max_lines=5):
+        root, widget = FakeRoot(), FakeText()
+        logs.append(QueuedLog(root, widget, "test", max_lines=max_lines))
+        return root, widget, logs[-1]
+
+    yield make
+    for log in logs:
+        log.spill_file.close()
+
+
+def test_messages_from_threads_reach_the_widget_on_drain(make_log):
+    root, widget, log = make_log()
+    threads = [threading.Thread(target=log, args=(f"line {i}",)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert widget.content == ""
+
+    log.drain()
+
+    assert sorted(widget.lines()) == ["line 0", "line 1", "line 2"]
+    assert root.scheduled == [log.drain, log.drain]
+
+
+def test_calls_run_in_order_with_messages(make_log):
+    _, widget, log = make_log()
+    seen = []
+    log("before")
+    log.call(lambda value: seen.append((value, widget.lines())), "call")
+    log("after")
+
+    log.drain()
+
+    assert seen == [("call", ["before"])]
+    assert widget.lines() == ["before", "after"]
+
+
+def test_widget_keeps_last_lines_and_spill_file_keeps_all(tmp_path, make_log):
+    _, widget, log = make_log(max_lines=3)
+    for i in range(10):
+        log(f"line {i}")
+
+    log.drain()
+
+    assert widget.lines() == [
+        f"[Earlier lines trimmed, full log in {log.spill_path}]",
+        "line 7",
+        "line 8",
+        "line 9",
+    ]
+    log("line 10")
+    log.drain()
+    assert widget.lines()[1:] == ["line 8", "line 9", "line 10"]
+    assert widget.lines()[0].startswith("[Earlier lines trimmed")
+
+    spilled = Path(log.spill_path).read_text(encoding="utf-8").splitlines()
+    assert spilled == [f"line {i}" for i in range(11)]
+    assert Path(log.spill_path).parent == tmp_path
+
+    log.clear()
+    assert widget.content == ""
+    assert Path(log.spill_path).read_text(encoding="utf-8") == ""
@@ -0,0 +1,87 @@
+"""Tests for duplicates_near."""
+
+import numpy as np
+import pandas as pd
+
+import duplicates_near
+from duplicates_near import (
+    lsh_parameters,
+    minhash_signatures,
+    near_duplicate_clusters,
+    row_text,
+)
+
+
+def test_near_duplicates_cluster_and_other_rows_do_not():
+    df = pd.DataFrame(
+        {
+            "name": ["John Smith", "Mary Jones", "john  SMITH", "Peter Brown"],
+            "street": ["12 Main Street", "4 Elm Road", "12 main street", "9 Oak Lane"],
+        }
+    )
+
+    cluster_ids, cluster_count = near_duplicate_clusters(df)
+
+    assert cluster_ids.tolist() == [1, 0, 1, 0]
+    assert cluster_count == 1
+
+
+def brute_force_clusters(df, threshold):
+    """Link every pair sharing a band bucket whose signatures agree enough."""
+    signatures = minhash_signatures(row_text(df))
+    bands, rows_per_band = lsh_parameters(threshold, signatures.shape[1])
+    count = len(df)
+    labels = list(range(count))
+
+    def find(i):
+        while labels[i] != i:
+            i = labels[i]
+        return i
+
+    for i in range(count):
+        for j in range(i + 1, count):
+            bucketed = any(
+                np.array_equal(
+                    signatures[i, band * rows_per_band : (band + 1) * rows_per_band],
+                    signatures[j, band * rows_per_band : (band + 1) * rows_per_band],
+                )
+                for band in range(bands)
+            )
+            if bucketed and (signatures[i] == signatures[j]).mean() >= threshold:
+                labels[max(find(i), find(j))] = min(find(i), find(j))
+
+    roots = [find(i) for i in range(count)]
+    sizes = pd.Series(roots).value_counts()
+    numbered = {}
+    cluster_ids = []
+    for root in roots:
+        if sizes[root] == 1:
+            cluster_ids.append(0)
+        else:
+            cluster_ids.append(numbered.setdefault(root, len(numbered) + 1))
+    return cluster_ids
+
+
+def test_every_pair_in_a_bucket_is_checked():
+    rng = np.random.default_rng(0)
+    words = ["alpha", "beta", "gamma", "delta", "omega", "sigma"]
+    text = [" ".join(rng.choice(words, 3)) for _ in range(150)]
+    df = pd.DataFrame({"text": text + text[:5]})
+
+    for threshold in [0.3, 0.5]:
+        cluster_ids, _ = near_duplicate_clusters(df, threshold)
+        assert cluster_ids.tolist() == brute_force_clusters(df, threshold)
+
+
+def test_rows_apart_in_a_bucket_are_linked(monkeypatch):
+    # All three rows share the first band; only rows 0 and 2 are similar
+    signatures = np.arange(3 * 64, dtype=np.uint32).reshape(3, 64)
+    copied = np.arange(64) % 8 != 0
+    signatures[2, copied] = signatures[0, copied]
+    signatures[:, :8] = 7
+    monkeypatch.setattr(duplicates_near, "minhash_signatures", lambda texts: signatures)
+
+    cluster_ids, cluster_count = near_duplicate_clusters(pd.DataFrame({"x": [1, 2, 3]}))
+
+    assert cluster_ids.tolist() == [1, 0, 1]
+    assert cluster_count == 1
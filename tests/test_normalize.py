@@ -0,0 +1,47 @@
+"""Tests for duplicates_normalize."""
+
+import warnings
+
+import pandas as pd
+
+from duplicates_normalize import Normalizer, canonical_text
+
+
+def normalized(values, text="dates"):
+    series = pd.Series(values, dtype=object)
+    return Normalizer.from_text(text).series(series).tolist()
+
+
+def test_dates_rewritten_in_date_columns():
+    assert normalized(["2024-01-31", "01/31/2024", "Jan 31 2024 10:30", ""]) == [
+        "2024-01-31",
+        "2024-01-31",
+        "2024-01-31 10:30:00",
+        "",
+    ]
+
+
+def test_text_that_looks_like_dates_is_kept():
+    assert normalized(["1-2", "3/4", "12:30", "abc"]) == ["1-2", "3/4", "12:30", "abc"]
+
+
+def test_dates_rewritten_whatever_values_they_are_with():
+    values = ["01/31/2024", "room 1", "room 2", "lobby", "hall"]
+    assert normalized(values) == ["2024-01-31"] + values[1:]
+    assert normalized(values[:1]) == ["2024-01-31"]
+
+
+def test_canonical_text_keys_numbers_by_value():
+    values = pd.Series(["5", "5.0", "+05", "5e0", "0.10", "NA", "", "x"])
+    assert canonical_text(values).tolist() == ["5", "5", "5", "5", "0.1", "", "", "x"]
+
+
+def test_canonical_text_handles_long_integers_and_infinities():
+    long_integer = "1" * 5000
+    values = pd.Series([long_integer, "-0", "-007", "inf", "-inf"])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        keys = canonical_text(values).tolist()
+
+    assert keys == [long_integer, "0", "-7", "inf", "-inf"]
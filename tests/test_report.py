@@ -0,0 +1,40 @@
+"""Tests for duplicates_report."""
+
+import pandas as pd
+import pytest
+
+from duplicates_engine import process_file
+from duplicates_report import row_number_column, write_duplicate_report
+
+
+def test_row_number_column_avoids_existing_names():
+    assert row_number_column(["id"]) == "row_number"
+    assert row_number_column(["row_number"]) == "row_number_1"
+    assert row_number_column(["row_number", "row_number_1"]) == "row_number_2"
+
+
+def test_write_duplicate_report_keeps_row_number_column(tmp_path):
+    df = pd.DataFrame({"row_number": [7, 7], "name": ["a", "a"]})
+    report_path = tmp_path / "report.csv"
+
+    write_duplicate_report(df, [1, 2], report_path)
+
+    listing = pd.read_csv(report_path)
+    assert list(listing.columns) == ["row_number_1", "row_number", "name"]
+    assert listing["row_number_1"].tolist() == [1, 2]
+
+
+@pytest.mark.parametrize("options", [{}, {"chunksize": 2}, {"scan": True}])
+def test_row_mode_with_row_number_column(tmp_path, options):
+    input_path = tmp_path / "data.csv"
+    pd.DataFrame({"row_number": [1, 2, 1, 3], "name": ["a", "b", "a", "c"]}).to_csv(
+        input_path, index=False
+    )
+    output_directory = tmp_path / "output"
+    output_directory.mkdir()
+
+    process_file(input_path, output_directory, mode="row", **options)
+
+    report = next(output_directory.glob("*_report.csv"))
+    listing = pd.read_csv(report)
+    assert listing["row_number_1"].tolist() == [1, 3]
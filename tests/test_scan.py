@@ -0,0 +1,80 @@
+"""Tests for the memory-mapped scan path of row mode."""
+
+import numpy as np
+import pandas as pd
+
+from duplicates_engine import detect_row_duplicates_scan, process_file
+from duplicates_scan import iter_record_blocks, suspect_records
+
+CSV = (
+    b"id,text,amount\r\n"
+    b'1,"two\r\nlines",5\r\n'
+    b"2,plain,1.50\r\n"
+    b'1,"two\r\nlines",5.0\r\n'
+    b"\r\n"
+    b'2,"plain",1.5\r\n'
+    b"3,NA,+7\r\n"
+    b"3,,7\r\n"
+    b"4,x,8\r\n"
+    b"4,x,9"
+)
+
+
+def flags(output_directory, output):
+    return pd.read_csv(output_directory / output)["is_duplicate_row"].tolist()
+
+
+def test_scan_matches_in_memory_row_mode(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(CSV)
+    scan_directory = tmp_path / "scan"
+    memory_directory = tmp_path / "memory"
+    scan_directory.mkdir()
+    memory_directory.mkdir()
+
+    scan = detect_row_duplicates_scan(path, scan_directory)
+    memory = process_file(path, memory_directory, mode="row")
+
+    assert scan["duplicate_count"] == memory["duplicate_count"] == 6
+    assert scan["total_items"] == memory["total_items"] == 8
+    expected = [True, True, True, True, True, True, False, False]
+    assert flags(scan_directory, scan["output"]) == expected
+    assert flags(memory_directory, memory["output"]) == expected
+
+    report = pd.read_csv(scan_directory / scan["report"], keep_default_na=False)
+    assert report["row_number"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert report["text"].tolist()[0] == "two\r\nlines"
+
+
+def test_scan_tells_apart_records_with_equal_bytes(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(b'a,b\n"x,y",z\nx,"y,z"\n')
+
+    result = detect_row_duplicates_scan(path, tmp_path)
+
+    assert result["duplicate_count"] == 0
+
+
+def test_suspect_records():
+    data = np.frombuffer(
+        b'a,b\n1,x\n1.0,x\n"5",""\n05,y\n-5,y\n12,"a,1.50"\nNA,z\n'
+        b"Anna Smith,3\n-0,y",
+        dtype=np.uint8,
+    )
+    (starts, stops), *_ = iter_record_blocks(data)
+
+    flags, positions = suspect_records(data, starts, stops)
+
+    assert positions == {0}
+    assert flags.tolist() == [
+        False,
+        False,
+        True,
+        False,
+        True,
+        False,
+        False,
+        True,
+        False,
+        True,
+    ]
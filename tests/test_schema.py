@@ -0,0 +1,62 @@
+"""Tests for duplicates_schema."""
+
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+import duplicates_schema
+from duplicates_schema import SchemaStore
+
+
+def test_schema_is_learned_once_and_reused_for_similar_names(tmp_path):
+    store_path = tmp_path / "schema.json"
+    for month in ["01", "02"]:
+        pd.DataFrame({"id": [1, 2, 3], "kind": ["a", "a", "a"]}).to_csv(
+            tmp_path / f"sales_{month}.csv", index=False
+        )
+
+    first = SchemaStore(store_path).read_csv(tmp_path / "sales_01.csv")
+    stored = json.loads(store_path.read_text(encoding="utf-8"))
+    second = SchemaStore(store_path).read_csv(tmp_path / "sales_02.csv")
+
+    assert list(stored) == ["sales_#.csv"]
+    assert stored["sales_#.csv"]["dtypes"]["kind"] == "category"
+    assert str(first["id"].dtype) == str(second["id"].dtype) == "int8"
+    assert isinstance(second["kind"].dtype, pd.CategoricalDtype)
+
+
+def test_concurrent_stores_keep_each_others_schemas(tmp_path):
+    store_path = tmp_path / "schema.json"
+    names = [f"file_{letter}.csv" for letter in "abcdefghijklmnop"]
+    df = pd.DataFrame({"id": [1, 2]})
+    stores = [SchemaStore(store_path) for _ in names]
+    barrier = threading.Barrier(len(names))
+
+    def learn(store, name):
+        barrier.wait()
+        store.learn(tmp_path / name, df)
+
+    threads = [threading.Thread(target=learn, args=pair) for pair in zip(stores, names)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(json.loads(store_path.read_text(encoding="utf-8"))) == names
+    assert [path.name for path in tmp_path.iterdir()] == ["schema.json"]
+
+
+def test_stale_lock_is_broken(tmp_path, monkeypatch):
+    monkeypatch.setattr(duplicates_schema, "LOCK_TIMEOUT", 1)
+    store_path = tmp_path / "schema.json"
+    lock_path = tmp_path / "schema.json.lock"
+    lock_path.touch()
+    os.utime(lock_path, (time.time() - 60, time.time() - 60))
+
+    SchemaStore(store_path).learn(tmp_path / "data.csv", pd.DataFrame({"id": [1]}))
+
+    assert list(json.loads(store_path.read_text(encoding="utf-8"))) == ["data.csv"]
+    assert not lock_path.exists()
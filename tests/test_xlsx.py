@@ -0,0 +1,230 @@
+"""Tests for duplicates_xlsx."""
+
+import datetime
+import zipfile
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils.datetime import CALENDAR_MAC_1904
+
+from duplicates_io import iter_file_chunks
+from duplicates_xlsx import XlsxReader, write_workbook
+
+MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+RELATIONSHIPS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+
+
+def read_chunks(path, sheet_name=None, chunksize=2, **options):
+    with XlsxReader(path) as reader:
+        return pd.concat(list(reader.iter_chunks(sheet_name, chunksize, **options)))
+
+
+def write_raw_workbook(path, sheet_data):
+    """Write a one-sheet workbook from hand-written sheetData XML."""
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(
+            "[Content_Types].xml",
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+            'content-types"><Default Extension="rels" ContentType="application/'
+            'vnd.openxmlformats-package.relationships+xml"/><Default Extension="xml"'
+            ' ContentType="application/xml"/><Override PartName="/xl/workbook.xml"'
+            f' ContentType="{CONTENT_TYPE}.sheet.main+xml"/><Override PartName='
+            f'"/xl/worksheets/sheet1.xml" ContentType="{CONTENT_TYPE}.worksheet+xml"'
+            "/></Types>",
+        )
+        archive.writestr(
+            "_rels/.rels",
+            f'<Relationships xmlns="{PACKAGE}"><Relationship Id="rId1" '
+            f'Type="{RELATIONSHIPS}/officeDocument" Target="xl/workbook.xml"/>'
+            "</Relationships>",
+        )
+        archive.writestr(
+            "xl/workbook.xml",
+            f'<workbook xmlns="{MAIN}" xmlns:r="{RELATIONSHIPS}"><sheets>'
+            '<sheet name="Data" sheetId="1" r:id="rId1"/></sheets></workbook>',
+        )
+        archive.writestr(
+            "xl/_rels/workbook.xml.rels",
+            f'<Relationships xmlns="{PACKAGE}"><Relationship Id="rId1" '
+            f'Type="{RELATIONSHIPS}/worksheet" Target="worksheets/sheet1.xml"/>'
+            "</Relationships>",
+        )
+        archive.writestr(
+            "xl/worksheets/sheet1.xml",
+            f'<worksheet xmlns="{MAIN}"><sheetData>{sheet_data}</sheetData>'
+            "</worksheet>",
+        )
+
+
+def test_inline_strings_and_shared_formulas(tmp_path):
+    path = tmp_path / "raw.xlsx"
+    write_raw_workbook(
+        path,
+        '<row r="1"><c r="A1" t="inlineStr"><is><t>id</t></is></c>'
+        '<c r="B1" t="inlineStr"><is><t>name</t></is></c>'
+        '<c r="C1" t="inlineStr"><is><t>double</t></is></c></row>'
+        '<row r="2"><c r="A2"><v>1</v></c><c r="B2" t="inlineStr"><is><t>a</t>'
+        '</is></c><c r="C2"><f t="shared" ref="C2:C4" si="0">A2*2</f><v>2</v></c>'
+        "</row>"
+        '<row r="3"><c r="A3"><v>2</v></c><c r="B3" t="inlineStr"><is><t>b</t>'
+        '</is></c><c r="C3"><f t="shared" si="0"/><v>4</v></c></row>'
+        '<row r="5"><c r="A5"><v>3</v></c><c r="C5"><f t="shared" si="0"/>'
+        "<v>6</v></c></row>",
+    )
+
+    df = read_chunks(path)
+
+    # The last chunk has no names, so only the values match across chunks
+    pd.testing.assert_frame_equal(df, pd.read_excel(path), check_dtype=False)
+    assert df["double"].tolist()[:2] == [2, 4]
+    assert df["name"].tolist()[:2] == ["a", "b"]
+    assert len(df) == 4
+
+
+def test_1904_date_system(tmp_path):
+    path = tmp_path / "mac.xlsx"
+    workbook = Workbook()
+    workbook.epoch = CALENDAR_MAC_1904
+    sheet = workbook.active
+    dates = [datetime.datetime(2024, 1, 31), datetime.datetime(1999, 12, 31, 10, 30)]
+    sheet.append(["when"])
+    for date in dates:
+        sheet.append([date])
+    workbook.save(path)
+
+    df = read_chunks(path)
+
+    assert df["when"].tolist() == dates
+    pd.testing.assert_frame_equal(df, pd.read_excel(path))
+
+
+def test_multiple_sheets_round_trip(tmp_path):
+    path = tmp_path / "book.xlsx"
+    first = pd.DataFrame({"id": [1, 2, 3], "name": ["a", "b", "c"]})
+    second = pd.DataFrame({"value": [1.5, np.nan, 3.0], "flag": [True, False, True]})
+
+    write_workbook(path, {"First": first, "Second": second}, highlight=["Second"])
+
+    with XlsxReader(path) as reader:
+        assert reader.sheet_names() == ["First", "Second"]
+    pd.testing.assert_frame_equal(read_chunks(path, "First"), first)
+    pd.testing.assert_frame_equal(read_chunks(path, "Second"), second)
+    workbook = load_workbook(path)
+    assert not workbook["First"].conditional_formatting
+    assert workbook["Second"].conditional_formatting
+
+
+def test_writer_converts_values_like_to_excel(tmp_path):
+    path = tmp_path / "values.xlsx"
+    df = pd.DataFrame(
+        {
+            "text": ["plain", "bell\x07", None],
+            "number": [1.0, np.inf, np.nan],
+            "when": pd.to_datetime(["2024-01-31", None, "2024-02-01"]).tz_localize(
+                "UTC"
+            ),
+            "mixed": [1, "two", 3.5],
+        }
+    )
+
+    write_workbook(path, {"Sheet1": df})
+
+    sheet = load_workbook(path)["Sheet1"]
+    rows = list(sheet.iter_rows(min_row=2, values_only=True))
+    assert rows[0] == ("plain", 1, datetime.datetime(2024, 1, 31), 1)
+    assert rows[1] == ("bell", "inf", None, "two")
+    assert rows[2] == (None, None, datetime.datetime(2024, 2, 1), 3.5)
+
+
+def test_prebuilt_rows_match_openpyxl(tmp_path):
+    path = tmp_path / "fast.xlsx"
+    expected_path = tmp_path / "openpyxl.xlsx"
+    df = pd.DataFrame(
+        {
+            "id": pd.array([1, None, -3, 4, 5], dtype="Int64"),
+            "text": ["a & b", "<tag>", " padded ", None, "plain"],
+            "flag": [True, False, True, False, True],
+            "when": pd.to_datetime(
+                ["1900-01-01", "1900-02-28 12:00", "1900-03-01", None, "2024-05-06"],
+                format="mixed",
+            ),
+            "kind": pd.Categorical(["x", "y", None, "x", "y"]),
+        }
+    )
+    dates = pd.DataFrame({"day": [datetime.date(2024, 1, 2), "text"]})
+
+    write_workbook(path, {"Data": df, "Dates": dates}, block_rows=2)
+    with pd.ExcelWriter(expected_path, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="Data", index=False)
+        dates.to_excel(writer, sheet_name="Dates", index=False)
+
+    workbook, expected = load_workbook(path), load_workbook(expected_path)
+    for name in ["Data", "Dates"]:
+        assert list(workbook[name].values) == list(expected[name].values)
+    assert workbook["Data"]["B4"].value == " padded "
+    assert workbook["Data"]["D2"].is_date
+    pd.testing.assert_frame_equal(
+        read_chunks(path, "Data", chunksize=3), pd.read_excel(path, "Data")
+    )
+
+
+def test_chunks_as_text(tmp_path):
+    path = tmp_path / "book.xlsx"
+    write_workbook(path, {"Sheet1": pd.DataFrame({"id": [1, 2], "x": [0.5, None]})})
+
+    chunks = list(iter_file_chunks(path, 1))
+
+    assert [chunk["id"].tolist() for chunk in chunks] == [["1"], ["2"]]
+    assert chunks[1]["x"].tolist() == [""]
+
+
+def test_rows_wider_than_the_first_chunk(tmp_path):
+    path = tmp_path / "wide.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in [["id", "name"], [1, "a"], [2, "b"], [3, "c", None, "late"], [4]]:
+        sheet.append(row)
+    workbook.save(path)
+
+    df = read_chunks(path)
+
+    # Chunks without "late" infer that column as floats, not text
+    pd.testing.assert_frame_equal(df, pd.read_excel(path), check_dtype=False)
+    assert list(df.columns) == ["id", "name", "Unnamed: 2", "Unnamed: 3"]
+    assert df["Unnamed: 3"].tolist()[2] == "late"
+    with XlsxReader(path) as reader:
+        assert reader.scan_width(reader.sheet(None)) == 4
+        assert reader.sheet_width(None, nrows=2) == 2
+
+
+def test_empty_cells_do_not_widen_the_sheet(tmp_path):
+    path = tmp_path / "raw.xlsx"
+    write_raw_workbook(
+        path,
+        '<row r="1"><c r="A1" t="inlineStr"><is><t>id</t></is></c></row>'
+        '<row r="2"><c r="A2"><v>1</v></c><c r="B2" t="str"><f>""</f><v></v></c>'
+        '<c r="C2" t="inlineStr"><is><t/></is></c><c r="D2" s="1"/></row>'
+        '<row r="3"><c r="A3"><v>2</v></c><c r="B3"><f>A3</f></c></row>',
+    )
+
+    with XlsxReader(path) as reader:
+        assert reader.scan_width(reader.sheet(None)) == 1
+        assert reader.sheet_width(None, nrows=5) == 1
+    pd.testing.assert_frame_equal(read_chunks(path), pd.read_excel(path))
+
+
+def test_cells_without_references_are_measured_by_value(tmp_path):
+    path = tmp_path / "raw.xlsx"
+    write_raw_workbook(
+        path,
+        '<row><c t="inlineStr"><is><t>id</t></is></c></row>'
+        "<row><c><v>1</v></c></row><row><c><v>2</v></c><c/><c><v>3</v></c></row>",
+    )
+
+    with XlsxReader(path) as reader:
+        assert reader.scan_width(reader.sheet(None)) is None
+        assert reader.sheet_width(None) == 3
+    pd.testing.assert_frame_equal(read_chunks(path), pd.read_excel(path))